@@ -1,6 +1,25 @@
 import google.generativeai as genai
 import os
-from typing import List, Dict
+import time
+from typing import List, Dict, Iterator, Optional
+from ai_agent.metrics import metrics
+from ai_agent.concurrency import model_call_slot, ModelBusyError
+from ai_agent.resilience import call_model, record_fallback, fallback_reason
+from ai_agent.usage import model_label, usage_from_response, record_tokens
+
+SYSTEM_PROMPT = """You are a helpful AI assistant for a government petition and grievance management system. 
+Your role is to:
+1. Help citizens understand how to submit petitions
+2. Explain the petition process and status meanings
+3. Answer questions about departments and urgency levels
+4. Provide general guidance on using the system
+
+Be concise, professional, and helpful. If asked about specific petition details, remind users to check their dashboard."""
+
+UNAVAILABLE_MESSAGE = "I'm sorry, the chatbot service is currently unavailable. Please try again later."
+EMPTY_RESPONSE_MESSAGE = "I apologize, but I couldn't generate a response. Please try rephrasing your question."
+ERROR_MESSAGE = "I encountered an error processing your message. Please try again or contact support if the issue persists."
+FALLBACK_MESSAGES = {UNAVAILABLE_MESSAGE, EMPTY_RESPONSE_MESSAGE, ERROR_MESSAGE}
 
 def get_chatbot_model():
     """Initialize Gemini model for chatbot conversations."""
@@ -25,13 +44,29 @@ def get_chatbot_model():
     
     return model
 
-def get_chatbot_response(user_message: str, conversation_history: List[Dict] = None) -> str:
+def build_chat_prompt(user_message: str, conversation_history: List[Dict] = None, summary: str = "") -> str:
+    """Combine the system prompt, session summary, recent history and the new message."""
+    lines = [SYSTEM_PROMPT, ""]
+    
+    if summary:
+        lines.append(f"Summary of earlier conversation:\n{summary}\n")
+    
+    # History is already bounded by the chat session (see ai_agent.sessions)
+    for msg in conversation_history or []:
+        role = "User" if msg["role"] == "user" else "Assistant"
+        lines.append(f"{role}: {msg['content']}")
+    
+    lines.append(f"User: {user_message}\nAssistant:")
+    return "\n".join(lines)
+
+def get_chatbot_response(user_message: str, conversation_history: List[Dict] = None, summary: str = "") -> str:
     """
     Get chatbot response from Gemini.
     
     Args:
         user_message: The user's message
         conversation_history: List of previous messages [{"role": "user"|"assistant", "content": "..."}]
+        summary: Compact summary of older turns
     
     Returns:
         Chatbot response text
@@ -39,40 +74,90 @@ def get_chatbot_response(user_message: str, conversation_history: List[Dict] = N
     model = get_chatbot_model()
     
     if not model:
-        return "I'm sorry, the chatbot service is currently unavailable. Please try again later."
+        return UNAVAILABLE_MESSAGE
     
     try:
-        # Build conversation context
-        system_prompt = """You are a helpful AI assistant for a government petition and grievance management system. 
-Your role is to:
-1. Help citizens understand how to submit petitions
-2. Explain the petition process and status meanings
-3. Answer questions about departments and urgency levels
-4. Provide general guidance on using the system
-
-Be concise, professional, and helpful. If asked about specific petition details, remind users to check their dashboard."""
-
-        # Combine system prompt with conversation history
-        full_prompt = f"{system_prompt}\n\n"
-        
-        if conversation_history:
-            for msg in conversation_history[-5:]:  # Keep last 5 messages for context
-                role = "User" if msg["role"] == "user" else "Assistant"
-                full_prompt += f"{role}: {msg['content']}\n"
-        
-        full_prompt += f"User: {user_message}\nAssistant:"
+        full_prompt = build_chat_prompt(user_message, conversation_history, summary)
         
         # Generate response
-        response = model.generate_content(full_prompt)
+        response = call_model('chatbot', 'generate', model.generate_content, full_prompt)
         
         if response and response.text:
             return response.text.strip()
         else:
-            return "I apologize, but I couldn't generate a response. Please try rephrasing your question."
+            return EMPTY_RESPONSE_MESSAGE
     
+    except ModelBusyError:
+        raise
     except Exception as e:
-        print(f"Chatbot error: {e}")
-        return "I encountered an error processing your message. Please try again or contact support if the issue persists."
+        record_fallback('chatbot', fallback_reason(e), e)
+        return ERROR_MESSAGE
+
+def stream_chatbot_response(user_message: str, conversation_history: List[Dict] = None,
+                            summary: str = "", result: Optional[Dict] = None) -> Iterator[str]:
+    """
+    Stream chatbot response text chunks from Gemini as they are generated.
+    
+    Records time-to-first-token and total generation time. If the consumer
+    stops iterating (client disconnected), the upstream stream is abandoned.
+    Raises ModelBusyError on the first iteration if no model call slot is free.
+    
+    If `result` is given, result['outcome'] is set once the stream ends:
+    'ok' for a complete answer, else 'unavailable', 'empty', 'error' or
+    'cancelled' (the text then ends in a fallback message, or is partial).
+    """
+    if result is None:
+        result = {}
+    model = get_chatbot_model()
+    
+    if not model:
+        result['outcome'] = 'unavailable'
+        yield UNAVAILABLE_MESSAGE
+        return
+    
+    started = time.perf_counter()
+    first_token_at = None
+    outcome = 'ok'
+    
+    # Holds a model call slot for the whole stream; busy -> ModelBusyError on first next()
+    with model_call_slot('chatbot_stream'):
+        try:
+            response = call_model(
+                'chatbot_stream', 'generate', model.generate_content,
+                build_chat_prompt(user_message, conversation_history, summary),
+                stream=True, use_slot=False
+            )
+        
+            for chunk in response:
+                try:
+                    text = chunk.text
+                except ValueError:
+                    # Chunk without text parts (e.g. safety metadata)
+                    continue
+            
+                if not text:
+                    continue
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                    metrics.observe('chatbot_stream_ttft_ms', (first_token_at - started) * 1000)
+                yield text
+        
+            record_tokens('chatbot_stream', model_label(model.model_name), *usage_from_response(response))
+            if first_token_at is None:
+                outcome = 'empty'
+                yield EMPTY_RESPONSE_MESSAGE
+    
+        except GeneratorExit:
+            outcome = 'cancelled'
+            raise
+        except Exception as e:
+            outcome = 'error'
+            record_fallback('chatbot_stream', fallback_reason(e), e)
+            yield ERROR_MESSAGE
+        finally:
+            result['outcome'] = outcome
+            metrics.observe('chatbot_stream_total_ms', (time.perf_counter() - started) * 1000, outcome=outcome)
+            metrics.increment('chatbot_stream_requests', outcome=outcome)
 
 def get_petition_help(topic: str = "general") -> str:
     """Get help text for specific petition-related topics."""
@@ -0,0 +1,42 @@
+"""
+Outbound Model Call Limiter
+
+A process-wide semaphore capping concurrent Gemini calls (generation and
+embeddings) so bursts of chat traffic cannot exhaust the server's worker
+threads or the API quota.
+"""
+
+from contextlib import contextmanager
+import threading
+from django.conf import settings
+from ai_agent.metrics import metrics
+
+DEFAULT_CONCURRENCY_SETTINGS = {
+    'max_concurrent_calls': 8,
+    'acquire_timeout': 2.0,
+    'retry_after': 5,
+}
+
+def concurrency_settings():
+    return {**DEFAULT_CONCURRENCY_SETTINGS, **getattr(settings, 'AI_CONCURRENCY', {})}
+
+class ModelBusyError(Exception):
+    """Raised when no model call slot frees up within the acquire timeout."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Too many concurrent AI model calls, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+_config = concurrency_settings()
+_semaphore = threading.BoundedSemaphore(_config['max_concurrent_calls'])
+
+@contextmanager
+def model_call_slot(feature):
+    """Hold one of the global model call slots for the duration of the block."""
+    if not _semaphore.acquire(timeout=_config['acquire_timeout']):
+        metrics.increment('ai_model_calls_rejected', feature=feature)
+        raise ModelBusyError(_config['retry_after'])
+    try:
+        yield
+    finally:
+        _semaphore.release()
@@ -1,19 +1,68 @@
+import threading
 import chromadb
 from chromadb.config import Settings
 import google.generativeai as genai
 import os
+from django.conf import settings
+from ai_agent.resilience import call_model, record_fallback, fallback_reason
 
-# Initialize ChromaDB client
-chroma_client = chromadb.Client(Settings(
-    anonymized_telemetry=False,
-    allow_reset=True
-))
+DEFAULT_VECTOR_INDEX = {
+    'host': '',
+    'port': 8000,
+    'path': 'chroma_data',
+    'collection': 'petitions',
+}
 
-# Get or create collection for petitions
-petition_collection = chroma_client.get_or_create_collection(
-    name="petitions",
-    metadata={"description": "Petition embeddings for duplicate detection"}
-)
+_collection = None
+_collection_lock = threading.Lock()
+
+def vector_index_settings():
+    return {**DEFAULT_VECTOR_INDEX, **getattr(settings, 'VECTOR_INDEX', {})}
+
+def _create_client(config):
+    """Chroma server client when a host is configured, else the on-disk store."""
+    client_settings = Settings(anonymized_telemetry=False)
+    if config['host']:
+        return chromadb.HttpClient(host=config['host'], port=config['port'], settings=client_settings)
+    return chromadb.PersistentClient(path=config['path'], settings=client_settings)
+
+def get_petition_collection():
+    """
+    The shared petition index (see VECTOR_INDEX), opened on first use.
+
+    Every process (web, Celery workers, management commands) reads and writes
+    the same index, so chunks added by a worker are visible to the web
+    process. Raises if the index cannot be reached; the next call retries.
+    """
+    global _collection
+    if _collection is None:
+        with _collection_lock:
+            if _collection is None:
+                config = vector_index_settings()
+                _collection = _create_client(config).get_or_create_collection(
+                    name=config['collection'],
+                    metadata={"description": "Petition embeddings for duplicate detection"}
+                )
+    return _collection
+
+def get_embeddings(texts):
+    """Embed several texts in one request; None if the call fails."""
+    api_key = os.environ.get("GOOGLE_API_KEY")
+    if not api_key:
+        return None
+
+    try:
+        genai.configure(api_key=api_key, transport='rest')
+        result = call_model(
+            'embedding', 'embed', genai.embed_content,
+            model="models/embedding-001",
+            content=list(texts),
+            task_type="retrieval_document"
+        )
+        return result['embedding']
+    except Exception as e:
+        record_fallback('embedding', fallback_reason(e), e)
+        return None
 
 def get_embedding(text: str):
     """Generate embedding using Gemini API."""
@@ -23,14 +72,15 @@ def get_embedding(text: str):
     
     try:
         genai.configure(api_key=api_key, transport='rest')
-        result = genai.embed_content(
+        result = call_model(
+            'embedding', 'embed', genai.embed_content,
             model="models/embedding-001",
             content=text,
             task_type="retrieval_document"
         )
         return result['embedding']
     except Exception as e:
-        print(f"Embedding generation failed: {e}")
+        record_fallback('embedding', fallback_reason(e), e)
         return None
 
 def check_duplicate(title: str, description: str, threshold: float = 0.85):
@@ -53,27 +103,32 @@ def check_duplicate(title: str, description: str, threshold: float = 0.85):
         return {"is_duplicate": False, "similar_petitions": []}
     
     try:
-        # Query for similar petitions
-        results = petition_collection.query(
+        # Query for similar petitions; document chunks share the index, so
+        # fetch extra results and keep the best match per petition
+        results = get_petition_collection().query(
             query_embeddings=[embedding],
-            n_results=5
+            n_results=15
         )
         
-        similar_petitions = []
-        is_duplicate = False
+        best = {}
         
         if results['ids'] and len(results['ids'][0]) > 0:
-            for i, petition_id in enumerate(results['ids'][0]):
+            for i, entry_id in enumerate(results['ids'][0]):
                 distance = results['distances'][0][i] if 'distances' in results else 1.0
                 similarity = 1 - distance  # Convert distance to similarity
+                metadata = (results['metadatas'][0][i] if 'metadatas' in results else None) or {}
+                petition_id = str(metadata.get('petition_id', entry_id))
                 
-                if similarity >= threshold:
-                    is_duplicate = True
-                    similar_petitions.append({
+                if similarity >= threshold and similarity > best.get(petition_id, {}).get('similarity', -1):
+                    best[petition_id] = {
                         'id': petition_id,
                         'similarity': similarity,
-                        'metadata': results['metadatas'][0][i] if 'metadatas' in results else {}
-                    })
+                        'matched': metadata.get('source', 'petition'),
+                        'metadata': metadata
+                    }
+        
+        similar_petitions = sorted(best.values(), key=lambda p: p['similarity'], reverse=True)[:5]
+        is_duplicate = bool(similar_petitions)
         
         return {
             "is_duplicate": is_duplicate,
@@ -84,6 +139,34 @@ def check_duplicate(title: str, description: str, threshold: float = 0.85):
         print(f"Duplicate check failed: {e}")
         return {"is_duplicate": False, "similar_petitions": []}
 
+def get_petition_embedding(petition_id: int):
+    """Stored embedding of an indexed petition, or None (saves an embedding call)."""
+    try:
+        result = get_petition_collection().get(ids=[str(petition_id)], include=["embeddings"])
+        embeddings = result.get('embeddings')
+        if embeddings is not None and len(embeddings) > 0:
+            return list(embeddings[0])
+    except Exception as e:
+        print(f"Failed to read embedding for petition {petition_id}: {e}")
+    return None
+
+def nearest_petitions(embedding, n_results: int = 50):
+    """
+    Nearest petitions to an embedding as (petition_id, similarity), best first.
+
+    Document chunks share the index, so each petition appears once with its
+    best-matching entry.
+    """
+    results = get_petition_collection().query(query_embeddings=[embedding], n_results=n_results)
+    best = {}
+    if results['ids'] and len(results['ids'][0]) > 0:
+        for i, entry_id in enumerate(results['ids'][0]):
+            distance = results['distances'][0][i] if 'distances' in results else 1.0
+            metadata = (results['metadatas'][0][i] if 'metadatas' in results else None) or {}
+            petition_id = int(metadata.get('petition_id', entry_id))
+            best[petition_id] = max(best.get(petition_id, -1.0), 1 - distance)
+    return sorted(best.items(), key=lambda item: item[1], reverse=True)
+
 def add_petition_to_index(petition_id: int, title: str, description: str):
     """Add a petition to the ChromaDB index."""
     combined_text = f"{title}\n\n{description}"
@@ -94,10 +177,10 @@ def add_petition_to_index(petition_id: int, title: str, description: str):
         return False
     
     try:
-        petition_collection.add(
+        get_petition_collection().add(
             embeddings=[embedding],
             documents=[combined_text],
-            metadatas=[{"title": title, "petition_id": petition_id}],
+            metadatas=[{"title": title, "petition_id": petition_id, "source": "petition"}],
             ids=[str(petition_id)]
         )
         return True
@@ -105,10 +188,53 @@ def add_petition_to_index(petition_id: int, title: str, description: str):
         print(f"Failed to add petition to index: {e}")
         return False
 
+def _chunk_id(source: str, document_id: int, index: int):
+    return f"{source}-{document_id}-{index}"
+
+def add_document_chunks_to_index(petition_id: int, title: str, source: str, document_id: int, chunks, batch_size: int = 20):
+    """
+    Add text chunks of an attached document to the ChromaDB index.
+
+    Chunks are stored with the owning petition's metadata, so a match on
+    document text reports that petition. Returns the number of chunks indexed.
+    """
+    remove_document_from_index(source, document_id)
+    indexed = 0
+    for start in range(0, len(chunks), batch_size):
+        batch = chunks[start:start + batch_size]
+        embeddings = get_embeddings(batch)
+        if not embeddings:
+            continue
+        try:
+            get_petition_collection().add(
+                embeddings=embeddings,
+                documents=batch,
+                metadatas=[
+                    {"title": title, "petition_id": petition_id, "source": source,
+                     "document_id": document_id, "chunk": start + i}
+                    for i in range(len(batch))
+                ],
+                ids=[_chunk_id(source, document_id, start + i) for i in range(len(batch))]
+            )
+            indexed += len(batch)
+        except Exception as e:
+            print(f"Failed to add {source} {document_id} chunks to index: {e}")
+    return indexed
+
+def remove_document_from_index(source: str, document_id: int):
+    """Remove all chunks of one attached document from the ChromaDB index."""
+    try:
+        get_petition_collection().delete(where={"$and": [{"source": source}, {"document_id": document_id}]})
+        return True
+    except Exception as e:
+        print(f"Failed to remove {source} {document_id} from index: {e}")
+        return False
+
 def remove_petition_from_index(petition_id: int):
-    """Remove a petition from the ChromaDB index."""
+    """Remove a petition and its document chunks from the ChromaDB index."""
     try:
-        petition_collection.delete(ids=[str(petition_id)])
+        get_petition_collection().delete(ids=[str(petition_id)])
+        get_petition_collection().delete(where={"petition_id": petition_id})
         return True
     except Exception as e:
         print(f"Failed to remove petition from index: {e}")
@@ -0,0 +1,232 @@
+"""
+Local Heuristic Triage
+
+Deterministic keyword/phrase classifier for department and urgency. It runs
+in-process in well under a millisecond and is used:
+- as a pre-filter: confident results skip the Gemini call entirely
+- as the fallback when Gemini is unavailable, so a gas leak report is not
+  filed as "General" / "LOW"
+
+Accuracy and latency are measured with `python evaluate_triage.py` against
+the tuning set (ai_agent/triage_samples.json) and held-out petitions
+(ai_agent/triage_holdout.json) that the cue lists were not fitted to.
+"""
+
+import re
+
+DEFAULT_DEPARTMENT = 'General'
+DEFAULT_URGENCY = 'MEDIUM'
+TITLE_WEIGHT = 2.0
+
+# Confidence at which a local result is used without asking Gemini
+# (overridable via settings.AI_TRIAGE_HEURISTICS)
+DEFAULT_PREFILTER_CONFIDENCE = {
+    'department': 0.6,
+    'urgency': 0.8,
+}
+
+# Department -> {phrase: weight}. Phrases are matched on word boundaries;
+# a trailing '*' matches any word ending (e.g. 'pothole*').
+DEPARTMENT_LEXICONS = {
+    'Roads & Transport': {
+        'road*': 1.0, 'pothole*': 2.0, 'street': 0.5, 'highway': 1.5, 'traffic': 1.5,
+        'signal*': 1.0, 'bus': 1.5, 'buses': 1.5, 'bus stop': 2.0, 'footpath': 1.5,
+        'pavement': 1.0, 'speed breaker': 2.0, 'flyover': 2.0, 'bridge': 1.0,
+        'parking': 1.5, 'zebra crossing': 2.0, 'transport': 1.5, 'tarmac': 1.5,
+        'underpass': 2.0,
+    },
+    'Electricity': {
+        'electric*': 2.0, 'power cut*': 2.5, 'power outage': 2.5, 'power supply': 2.0,
+        'outage*': 1.0, 'transformer': 2.5, 'voltage': 2.0, 'streetlight*': 2.0,
+        'street light*': 2.0, 'live wire*': 2.5, 'wire*': 1.0, 'meter': 1.0,
+        'electrocut*': 2.5, 'blackout': 2.0, 'power': 1.0, 'pole': 1.0,
+    },
+    'Water Supply': {
+        'water supply': 2.5, 'drinking water': 2.5, 'tap*': 1.5, 'pipeline': 2.0,
+        'pipe*': 1.0, 'water': 1.0, 'leakage': 1.0, 'borewell': 2.0, 'tanker': 2.0,
+        'contaminated water': 2.5, 'water pressure': 2.5, 'no water': 2.5,
+        'muddy water': 2.5, 'water connection': 2.5,
+    },
+    'Sanitation': {
+        'garbage': 2.5, 'trash': 2.0, 'waste': 1.5, 'sewage': 2.5, 'sewer*': 2.5,
+        'drain*': 1.5, 'gutter*': 2.0, 'toilet*': 2.0, 'dustbin*': 2.0, 'litter*': 1.5,
+        'stink*': 1.5, 'smell*': 1.0, 'mosquito*': 1.0, 'dump*': 1.5, 'clean*': 1.0,
+        'manhole*': 2.0, 'overflowing': 1.0,
+    },
+    'Police': {
+        'police': 2.5, 'theft': 2.5, 'stolen': 2.5, 'robbery': 2.5, 'harass*': 2.5,
+        'assault*': 2.5, 'crime*': 2.0, 'fight*': 1.0, 'threat*': 1.5, 'chain snatch*': 2.5,
+        'drunk*': 1.5, 'noise': 1.0, 'loud music': 1.5, 'eve teasing': 2.5, 'violence': 2.0,
+        'burglar*': 2.5, 'gambling': 2.0, 'illegal': 1.0,
+    },
+    'Health': {
+        'hospital*': 2.5, 'clinic*': 2.0, 'doctor*': 2.0, 'medicine*': 2.0, 'health': 1.5,
+        'dengue': 2.5, 'malaria': 2.5, 'fever': 1.5, 'ambulance': 2.5, 'disease*': 1.5,
+        'vaccin*': 2.5, 'nurse*': 2.0, 'patient*': 2.0, 'outbreak': 2.0, 'epidemic': 2.5,
+        'food poisoning': 2.5, 'primary health centre': 2.5,
+    },
+    'Education': {
+        'school*': 2.5, 'teacher*': 2.5, 'student*': 2.0, 'college*': 2.0, 'classroom*': 2.5,
+        'education': 2.0, 'exam*': 1.5, 'scholarship*': 2.5, 'mid-day meal': 2.5,
+        'midday meal': 2.5, 'textbook*': 2.5, 'admission*': 1.5, 'tuition': 1.5,
+        'anganwadi': 2.0, 'library': 1.0,
+    },
+}
+
+# Urgency cues, checked from most to least severe; the first level with a
+# match wins. Regex fragments are allowed for phrases like "no water for days".
+# 'strong' cues are specific phrases that are rarely false alarms; a single
+# 'weak' cue ("fire", "dead", "emergency") is common in harmless petitions
+# ("fire safety suggestion", "dead animal on road"), so on its own it is not
+# confident enough to skip the model.
+_DURATION = r'(?:\d+|two|three|four|five|several|many|a few)\s+(?:days|weeks)'
+URGENCY_CUES = {
+    'CRITICAL': {
+        'strong': [
+            r'on fire', r'caught fire', r'fire (?:broke out|spreading)', r'gas leak\w*', r'explosion',
+            r'electrocut\w*', r'live wires?', r'short circuit', r'sparking', r'collapsed', r'about to fall',
+            r'drown\w*', r'died', r'death', r'unconscious', r'life[- ]threatening', r'kidnap\w*',
+            r'cholera', r'flooded (?:houses?|homes?|streets?)', r'water entering (?:houses?|homes?)',
+        ],
+        'weak': [
+            r'fire', r'smoke', r'dead', r'dying', r'emergency', r'flood\w*', r'attack\w*',
+            r'collapse', r'outbreak', r'epidemic',
+        ],
+    },
+    'HIGH': {
+        'strong': [
+            r'no water for ' + _DURATION, r'no (?:power|electricity) for ' + _DURATION,
+            r'without (?:water|power|electricity) for ' + _DURATION,
+            r'sewage (?:mixing|overflow\w*)', r'contaminated (?:drinking )?water', r'open manhole\w*',
+            r'no doctors?', r'children at risk', r'chain snatch\w*', r'dog bit(?:e|ten|ing)',
+        ],
+        'weak': [
+            # How long a problem has lasted only says it is urgent together
+            # with a loss of service (the strong cues above)
+            r'for (?:the (?:last|past) )?' + _DURATION, r'since ' + _DURATION,
+            r'contaminated', r'accident\w*', r'injur\w*', r'unsafe', r'danger\w*', r'hazard\w*',
+            r'dengue', r'malaria', r'fever', r'theft', r'stolen', r'robbery', r'harass\w*',
+            r'bit(?:ten|ing)', r'threat\w*', r'urgent\w*', r'immediately', r'elderly',
+        ],
+    },
+    'MEDIUM': {
+        'strong': [],
+        'weak': [
+            r'broken', r'not working', r'damaged', r'leak\w*', r'overflow\w*', r'pothole\w*',
+            r'irregular', r'delay\w*', r'pending', r'blocked', r'garbage', r'stray',
+            r'low (?:water )?pressure', r'flickering', r'absent',
+        ],
+    },
+    'LOW': {
+        'strong': [
+            r'suggest\w*', r'please consider', r'would be (?:nice|good|helpful)', r'feedback',
+        ],
+        'weak': [
+            r'request(?:ing)? (?:for|to)', r'idea', r'improve\w*', r'beautif\w*',
+            r'paint\w*', r'bench(?:es)?', r'plant(?:ing)? (?:more )?trees',
+        ],
+    },
+}
+SEVERE_LEVELS = ('CRITICAL', 'HIGH')
+
+# A cue preceded by one of these within a few words does not count
+# ("no fire", "not an emergency", "nobody injured")
+_NEGATION = re.compile(r'\b(?:no|not|never|without|nobody|nothing|non)\b(?:\W+\w+)?\W*\Z')
+
+def _phrase_pattern(phrase):
+    if phrase.endswith('*'):
+        return re.escape(phrase[:-1]) + r'\w*'
+    return re.escape(phrase)
+
+def _compile_lexicon(lexicon):
+    # Longest phrases first so "power cut" wins over "power" in the alternation
+    ordered = sorted(lexicon, key=len, reverse=True)
+    pattern = re.compile(r'\b(' + '|'.join(_phrase_pattern(p) for p in ordered) + r')\b')
+    lookup = [(re.compile(_phrase_pattern(p) + r'\Z'), lexicon[p]) for p in ordered]
+    return pattern, lookup
+
+# Compiled once at import
+_DEPARTMENT_INDEX = {name: _compile_lexicon(lexicon) for name, lexicon in DEPARTMENT_LEXICONS.items()}
+def _compile_cues(cues):
+    return re.compile(r'\b(?:' + '|'.join(cues) + r')\b') if cues else None
+
+_URGENCY_INDEX = [
+    (level, _compile_cues(cues['strong']), _compile_cues(cues['weak']))
+    for level, cues in URGENCY_CUES.items()
+]
+
+def _normalize(text):
+    return " ".join((text or '').lower().split())
+
+def _lexicon_score(text, index):
+    pattern, lookup = index
+    score = 0.0
+    for match in pattern.findall(text):
+        for phrase_re, weight in lookup:
+            if phrase_re.match(match):
+                score += weight
+                break
+    return score
+
+def classify_department_local(title, description):
+    """
+    Classify a petition by department lexicon scores.
+
+    Returns (department, confidence). Title matches count double; confidence
+    combines the winner's share of the total score with its absolute score.
+    """
+    title, description = _normalize(title), _normalize(description)
+    scores = {
+        name: TITLE_WEIGHT * _lexicon_score(title, index) + _lexicon_score(description, index)
+        for name, index in _DEPARTMENT_INDEX.items()
+    }
+    best = max(scores, key=scores.get)
+    total = sum(scores.values())
+    if not scores[best]:
+        return DEFAULT_DEPARTMENT, 0.0
+
+    share = scores[best] / total
+    strength = min(1.0, scores[best] / 5.0)
+    return best, round(share * strength, 3)
+
+def _cue_hits(pattern, text):
+    """Distinct non-negated cue matches."""
+    if pattern is None:
+        return set()
+    return {
+        match.group(0) for match in pattern.finditer(text)
+        if not _NEGATION.search(text[max(0, match.start() - 40):match.start()])
+    }
+
+def predict_urgency_local(title, description):
+    """
+    Predict urgency from cue phrases.
+
+    Returns (urgency, confidence). The most severe level with a cue wins;
+    without any cue the petition is treated as a standard MEDIUM grievance.
+    A severe level is only confident (0.8+) with a strong cue or two
+    different weak ones, and never when the petition also reads as a
+    suggestion. Negated cues ("no fire", "not urgent") are ignored.
+    """
+    text = _normalize(f"{title} {description}")
+    hits = {level: (_cue_hits(strong, text), _cue_hits(weak, text)) for level, strong, weak in _URGENCY_INDEX}
+    low_strong, low_weak = hits['LOW']
+    for level, _, _ in _URGENCY_INDEX:
+        strong, weak = hits[level]
+        count = len(strong) + len(weak)
+        if not count:
+            continue
+        if level in SEVERE_LEVELS:
+            if low_strong and not strong and len(weak) == 1:
+                # "Fire safety suggestion": the severe word is the topic, not an incident
+                return 'LOW', 0.5
+            if strong or len(weak) >= 2:
+                confidence = min(1.0, 0.8 + 0.1 * (count - 1))
+            else:
+                confidence = 0.6
+            if low_strong or low_weak:
+                confidence = min(confidence, 0.5)
+        else:
+            confidence = min(0.7, 0.5 + 0.1 * (count - 1))
+        return level, round(confidence, 3)
+    return DEFAULT_URGENCY, 0.0
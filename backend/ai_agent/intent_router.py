@@ -0,0 +1,184 @@
+"""
+Chatbot Intent Router
+
+Answers common questions locally before falling back to the LLM:
+1. "What is the status of my petition #N" is answered from the database
+2. FAQ questions are matched with keyword + character n-gram similarity
+   against an FAQ bank vectorized once at import time
+3. Anything below the confidence threshold goes to Gemini
+"""
+
+from collections import Counter
+from dataclasses import dataclass
+from typing import Optional
+import math
+import re
+from django.conf import settings
+from ai_agent.chatbot import get_petition_help
+
+NGRAM_SIZE = 3
+DEFAULT_CONFIDENCE_THRESHOLD = 0.5
+KEYWORD_WEIGHT = 0.3
+
+FAQ_BANK = [
+    {
+        'topic': 'general',
+        'keywords': {'help', 'menu', 'options', 'assist'},
+        'questions': [
+            'help',
+            'what can you do',
+            'how can you help me',
+            'show me the options',
+        ],
+    },
+    {
+        'topic': 'submit',
+        'keywords': {'submit', 'file', 'lodge', 'raise', 'create', 'new'},
+        'questions': [
+            'how do i submit a petition',
+            'how to file a complaint',
+            'how can i raise a grievance',
+            'where do i create a new petition',
+            'how to lodge a petition',
+        ],
+    },
+    {
+        'topic': 'status',
+        'keywords': {'status', 'statuses', 'meaning', 'mean', 'stage'},
+        'questions': [
+            'what do the petition statuses mean',
+            'what does under review mean',
+            'explain the petition status',
+            'what does in progress mean',
+            'what are the stages of a petition',
+        ],
+    },
+    {
+        'topic': 'urgency',
+        'keywords': {'urgency', 'priority', 'urgent', 'critical'},
+        'questions': [
+            'how is urgency determined',
+            'what are the urgency levels',
+            'how is priority decided',
+            'what does critical urgency mean',
+        ],
+    },
+    {
+        'topic': 'departments',
+        'keywords': {'department', 'departments', 'routed', 'route'},
+        'questions': [
+            'what departments are available',
+            'which department handles my complaint',
+            'list the departments',
+            'how are petitions routed to departments',
+        ],
+    },
+]
+
+PETITION_STATUS_PATTERN = re.compile(
+    r'\b(?:status|update|progress)\b.*?\b(?:petition|complaint|grievance)\s*(?:#|no\.?|number|id)?\s*(\d+)'
+    r'|\b(?:petition|complaint|grievance)\s*(?:#|no\.?|number|id)?\s*(\d+)\b.*?\b(?:status|update|progress)\b',
+    re.IGNORECASE
+)
+
+@dataclass
+class RouteResult:
+    route: str
+    response: Optional[str]
+    confidence: float
+    topic: Optional[str] = None
+
+def normalize(text):
+    return " ".join(re.findall(r'[a-z0-9#]+', text.lower()))
+
+def _ngrams(text):
+    padded = f" {text} "
+    return Counter(padded[i:i + NGRAM_SIZE] for i in range(len(padded) - NGRAM_SIZE + 1))
+
+def _vectorize(text):
+    grams = _ngrams(text)
+    return grams, math.sqrt(sum(v * v for v in grams.values()))
+
+def _cosine(a, b):
+    grams_a, norm_a = a
+    grams_b, norm_b = b
+    if not norm_a or not norm_b:
+        return 0.0
+    if len(grams_a) > len(grams_b):
+        grams_a, grams_b = grams_b, grams_a
+    return sum(count * grams_b.get(gram, 0) for gram, count in grams_a.items()) / (norm_a * norm_b)
+
+# Vectorize the FAQ bank once at import (startup)
+_FAQ_INDEX = [
+    {
+        'topic': entry['topic'],
+        'keywords': entry['keywords'],
+        'vectors': [_vectorize(normalize(q)) for q in entry['questions']],
+        'answer': get_petition_help(entry['topic']),
+    }
+    for entry in FAQ_BANK
+]
+
+def match_faq(message):
+    """Return (topic, answer, confidence) of the best FAQ match."""
+    text = normalize(message)
+    if text == 'help':
+        return 'general', get_petition_help('general'), 1.0
+
+    vector = _vectorize(text)
+    tokens = set(text.split())
+    best = (None, None, 0.0)
+
+    for entry in _FAQ_INDEX:
+        similarity = max(_cosine(vector, v) for v in entry['vectors'])
+        keyword_score = min(1.0, len(tokens & entry['keywords']) / 2)
+        score = (1 - KEYWORD_WEIGHT) * similarity + KEYWORD_WEIGHT * keyword_score
+        if score > best[2]:
+            best = (entry['topic'], entry['answer'], score)
+
+    return best
+
+def lookup_petition_status(message, user):
+    """Answer "status of my petition #N" from the database, scoped to the user."""
+    match = PETITION_STATUS_PATTERN.search(message)
+    if not match:
+        return None
+
+    from petitions.models import Petition
+
+    petition_id = int(match.group(1) or match.group(2))
+    petitions = Petition.objects.select_related('department', 'assigned_officer')
+    if user.role == 'CITIZEN':
+        petitions = petitions.filter(citizen=user)
+
+    petition = petitions.filter(id=petition_id).first()
+    if petition is None:
+        return f"I couldn't find petition #{petition_id} on your account. Please check the number on your dashboard."
+
+    officer = petition.assigned_officer.username if petition.assigned_officer else 'Not yet assigned'
+    return (
+        f"Petition #{petition.id}: {petition.title}\n"
+        f"- Status: {petition.get_status_display()}\n"
+        f"- Department: {petition.department.name if petition.department else 'Pending'}\n"
+        f"- Urgency: {petition.get_urgency_display()}\n"
+        f"- Assigned officer: {officer}\n"
+        f"- Last updated: {petition.updated_at:%Y-%m-%d %H:%M} UTC"
+    )
+
+def route_message(message, user):
+    """
+    Decide how to answer a chatbot message.
+
+    Returns a RouteResult whose `route` is 'petition_status', 'faq' or 'llm'.
+    For 'llm' the response is None and the caller should query the model.
+    """
+    status_answer = lookup_petition_status(message, user)
+    if status_answer is not None:
+        return RouteResult('petition_status', status_answer, 1.0)
+
+    threshold = getattr(settings, 'CHATBOT_INTENT_THRESHOLD', DEFAULT_CONFIDENCE_THRESHOLD)
+    topic, answer, confidence = match_faq(message)
+    if confidence >= threshold:
+        return RouteResult('faq', answer, confidence, topic)
+
+    return RouteResult('llm', None, confidence, topic)
@@ -0,0 +1,110 @@
+"""
+AI Cost Report
+
+Aggregates the daily ModelUsage rows recorded by ai_agent.usage into a
+per-feature, per-model report of calls, errors, tokens, average latency and
+estimated cost (prices from settings.AI_MODEL_PRICING, USD per 1M tokens).
+
+Usage:
+    python manage.py ai_cost_report                  # today
+    python manage.py ai_cost_report --days 7
+    python manage.py ai_cost_report --date 2026-10-01 --json
+"""
+
+from collections import defaultdict
+from datetime import date, timedelta
+import json
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Sum
+from django.utils import timezone
+from ai_agent.models import ModelUsage
+
+def estimate_cost(model, prompt_tokens, output_tokens):
+    """Estimated USD cost, or None if the model has no configured price."""
+    price = getattr(settings, 'AI_MODEL_PRICING', {}).get(model)
+    if price is None:
+        return None
+    return (prompt_tokens * price.get('input', 0.0) + output_tokens * price.get('output', 0.0)) / 1_000_000
+
+class Command(BaseCommand):
+    help = "Report AI calls, token usage, latency and estimated cost per day, feature and model"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help="Last day of the report (YYYY-MM-DD, default: today)")
+        parser.add_argument('--days', type=int, default=1, help="Number of days ending at --date (default: 1)")
+        parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+
+    def handle(self, *args, **options):
+        try:
+            end = date.fromisoformat(options['date']) if options['date'] else timezone.localdate()
+        except ValueError:
+            raise CommandError("--date must be YYYY-MM-DD")
+        if options['days'] < 1:
+            raise CommandError("--days must be positive")
+        start = end - timedelta(days=options['days'] - 1)
+
+        rows = (
+            ModelUsage.objects
+            .filter(date__range=(start, end))
+            .values('date', 'feature', 'model')
+            .annotate(
+                calls=Sum('calls'),
+                errors=Sum('errors'),
+                prompt_tokens=Sum('prompt_tokens'),
+                output_tokens=Sum('output_tokens'),
+                total_latency_ms=Sum('total_latency_ms'),
+            )
+            .order_by('date', 'feature', 'model')
+        )
+
+        report = []
+        for row in rows:
+            report.append({
+                'date': row['date'].isoformat(),
+                'feature': row['feature'],
+                'model': row['model'],
+                'calls': row['calls'],
+                'errors': row['errors'],
+                'prompt_tokens': row['prompt_tokens'],
+                'output_tokens': row['output_tokens'],
+                'avg_latency_ms': round(row['total_latency_ms'] / row['calls'], 1) if row['calls'] else 0.0,
+                'cost_usd': estimate_cost(row['model'], row['prompt_tokens'], row['output_tokens']),
+            })
+
+        if options['json']:
+            self.stdout.write(json.dumps({'start': start.isoformat(), 'end': end.isoformat(), 'rows': report}, indent=2))
+            return
+
+        self._print_table(report, start, end)
+
+    def _print_table(self, report, start, end):
+        self.stdout.write(f"AI usage {start} .. {end}")
+        if not report:
+            self.stdout.write("  No model calls recorded.")
+            return
+
+        header = f"{'Date':<11}{'Feature':<22}{'Model':<20}{'Calls':>7}{'Errors':>7}{'Prompt tok':>12}{'Output tok':>12}{'Avg ms':>9}{'Cost $':>10}"
+        self.stdout.write(header)
+        self.stdout.write("-" * len(header))
+
+        daily_cost = defaultdict(float)
+        unpriced = set()
+        for row in report:
+            cost = row['cost_usd']
+            if cost is None:
+                unpriced.add(row['model'])
+            else:
+                daily_cost[row['date']] += cost
+            self.stdout.write(
+                f"{row['date']:<11}{row['feature']:<22}{row['model']:<20}{row['calls']:>7}{row['errors']:>7}"
+                f"{row['prompt_tokens']:>12}{row['output_tokens']:>12}{row['avg_latency_ms']:>9.1f}"
+                f"{(f'{cost:.4f}' if cost is not None else 'n/a'):>10}"
+            )
+
+        self.stdout.write("")
+        for day, cost in sorted(daily_cost.items()):
+            self.stdout.write(f"  {day}: ${cost:.4f}")
+        self.stdout.write(self.style.SUCCESS(f"Total estimated cost: ${sum(daily_cost.values()):.4f}"))
+        if unpriced:
+            self.stdout.write(self.style.WARNING(f"No price configured in AI_MODEL_PRICING for: {', '.join(sorted(unpriced))}"))
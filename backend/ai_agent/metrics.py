@@ -0,0 +1,106 @@
+"""
+In-process AI Metrics
+
+Thread-safe counters and timing summaries for AI features
+(chatbot latency, routing hit rates, fallbacks, model calls and tokens).
+Exposed in the Prometheus text format on /metrics.
+"""
+
+from collections import defaultdict
+import threading
+
+def _key(name, labels):
+    return (name, tuple(sorted(labels.items())))
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _number(value):
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+def _series(name, labels):
+    if not labels:
+        return name
+    return name + '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in labels) + '}'
+
+class MetricsRegistry:
+    """Counters and count/sum/max summaries keyed by name + labels."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = defaultdict(float)
+        self._summaries = {}
+
+    def increment(self, name, value=1, **labels):
+        """Increase a counter."""
+        with self._lock:
+            self._counters[_key(name, labels)] += value
+
+    def observe(self, name, value, **labels):
+        """Record an observation (e.g. a latency in ms) into a summary."""
+        with self._lock:
+            summary = self._summaries.setdefault(_key(name, labels), {'count': 0, 'sum': 0.0, 'max': 0.0})
+            summary['count'] += 1
+            summary['sum'] += value
+            summary['max'] = max(summary['max'], value)
+
+    def snapshot(self):
+        """Return a JSON-friendly copy of all counters and summaries."""
+        with self._lock:
+            counters = [
+                {'name': name, 'labels': dict(labels), 'value': value}
+                for (name, labels), value in self._counters.items()
+            ]
+            summaries = [
+                {
+                    'name': name,
+                    'labels': dict(labels),
+                    **summary,
+                    'avg': summary['sum'] / summary['count'] if summary['count'] else 0.0,
+                }
+                for (name, labels), summary in self._summaries.items()
+            ]
+        return {'counters': counters, 'summaries': summaries}
+
+    def to_prometheus(self):
+        """
+        Render all metrics in the Prometheus text exposition format.
+
+        Counters are exported as `<name>_total`; summaries as
+        `<name>_count` / `<name>_sum` plus a `<name>_max` gauge.
+        """
+        with self._lock:
+            counters = sorted(self._counters.items())
+            summaries = sorted((key, dict(summary)) for key, summary in self._summaries.items())
+
+        lines = []
+        declared = set()
+        for (name, labels), value in counters:
+            if name not in declared:
+                declared.add(name)
+                lines.append(f"# TYPE {name}_total counter")
+            lines.append(f"{_series(name + '_total', labels)} {_number(value)}")
+
+        for (name, labels), summary in summaries:
+            if name not in declared:
+                declared.add(name)
+                lines.append(f"# TYPE {name} summary")
+            lines.append(f"{_series(name + '_count', labels)} {summary['count']}")
+            lines.append(f"{_series(name + '_sum', labels)} {_number(summary['sum'])}")
+
+        for (name, labels), summary in summaries:
+            if name + '_max' not in declared:
+                declared.add(name + '_max')
+                lines.append(f"# TYPE {name}_max gauge")
+            lines.append(f"{_series(name + '_max', labels)} {_number(summary['max'])}")
+
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._summaries.clear()
+
+# Global registry
+metrics = MetricsRegistry()
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-19 23:00
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_agent', '0003_chatsession_recent_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='chatsession',
+            name='chat_session_user_recent',
+        ),
+    ]
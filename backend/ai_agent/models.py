@@ -1,3 +1,33 @@
+import uuid
 from django.db import models
+from django.conf import settings
 
-# Create your models here.
+class ChatSession(models.Model):
+    """Server-held chatbot conversation with bounded rolling context."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='chat_sessions')
+    summary = models.TextField(blank=True, help_text="Compact summary of turns evicted from the message buffer")
+    messages = models.JSONField(default=list, help_text="Recent messages [{'role': ..., 'content': ...}]")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    def __str__(self):
+        return f"Chat session {self.id} ({self.user})"
+
+class ModelUsage(models.Model):
+    """Daily per-feature, per-model AI usage totals."""
+    date = models.DateField()
+    feature = models.CharField(max_length=50)
+    model = models.CharField(max_length=100)
+    calls = models.PositiveIntegerField(default=0)
+    errors = models.PositiveIntegerField(default=0)
+    prompt_tokens = models.PositiveBigIntegerField(default=0)
+    output_tokens = models.PositiveBigIntegerField(default=0)
+    total_latency_ms = models.FloatField(default=0.0)
+
+    class Meta:
+        unique_together = ('date', 'feature', 'model')
+        ordering = ['-date', 'feature', 'model']
+
+    def __str__(self):
+        return f"{self.date} {self.feature} ({self.model}): {self.calls} calls"
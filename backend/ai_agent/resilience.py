@@ -0,0 +1,257 @@
+"""
+Resilience Layer for Gemini Calls
+
+Every outbound model call goes through `call_model`, which adds:
+- a per-call deadline (passed to the client as the request timeout)
+- bounded retries with full-jitter exponential backoff for retryable errors
+- a circuit breaker per upstream service that skips the model for a
+  cool-down when the recent error rate spikes
+- a slot from the global model call limiter (see ai_agent.concurrency)
+- usage accounting of every attempt (see ai_agent.usage)
+
+Callers catch ModelUnavailableError and fall back, reporting it with
+`record_fallback` so degraded triage shows up in the metrics registry.
+"""
+
+from collections import deque
+import logging
+import random
+import threading
+import time
+import requests
+from google.api_core import exceptions as google_exceptions
+from django.conf import settings
+from ai_agent.concurrency import model_call_slot, ModelBusyError
+from ai_agent.metrics import metrics
+from ai_agent.usage import model_label, usage_from_response, embedding_tokens, record_model_call
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RESILIENCE_SETTINGS = {
+    'deadline_seconds': 15.0,
+    'deadlines': {},             # per-feature overrides
+    'max_attempts': 3,
+    'backoff_base': 0.5,
+    'backoff_max': 4.0,
+    'breaker_window': 20,        # recent calls considered
+    'breaker_min_calls': 5,      # calls needed before the breaker can trip
+    'breaker_failure_rate': 0.5,
+    'breaker_cooldown': 30.0,
+}
+
+RETRYABLE_ERRORS = (
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.TooManyRequests,
+    google_exceptions.ResourceExhausted,
+    google_exceptions.DeadlineExceeded,
+    google_exceptions.InternalServerError,
+    google_exceptions.GatewayTimeout,
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    ConnectionError,
+    TimeoutError,
+)
+
+# Errors that say the upstream is unhealthy; client errors (InvalidArgument,
+# PermissionDenied, ...) are the request's fault and don't count
+BREAKER_ERRORS = RETRYABLE_ERRORS + (google_exceptions.ServerError,)
+
+TIMEOUT_ERRORS = (
+    google_exceptions.DeadlineExceeded,
+    google_exceptions.GatewayTimeout,
+    requests.exceptions.Timeout,
+    TimeoutError,
+)
+
+def resilience_settings():
+    return {**DEFAULT_RESILIENCE_SETTINGS, **getattr(settings, 'AI_RESILIENCE', {})}
+
+class ModelUnavailableError(Exception):
+    """The model call failed or was skipped; `reason` says why."""
+
+    def __init__(self, reason, cause=None):
+        super().__init__(f"Model unavailable ({reason}): {cause}" if cause else f"Model unavailable ({reason})")
+        self.reason = reason
+        self.cause = cause
+
+class CircuitBreaker:
+    """
+    Error-rate circuit breaker.
+
+    Opens when the failure rate over the last `window` calls reaches
+    `failure_rate`. After `cooldown` seconds it lets a single probe call
+    through (half-open) while other callers keep failing fast; the probe's
+    failure re-opens it, its success closes it. A probe that never reports
+    back is replaced after another `cooldown`.
+    """
+
+    def __init__(self, name, window, min_calls, failure_rate, cooldown):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.cooldown = cooldown
+        self._outcomes = deque(maxlen=window)
+        self._opened_at = None
+        self._half_open = False
+        self._probe_started = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            now = time.monotonic()
+            if now - self._opened_at < self.cooldown:
+                return False
+            if self._probe_started is not None and now - self._probe_started < self.cooldown:
+                return False
+            self._half_open = True
+            self._probe_started = now
+            return True
+
+    def release(self):
+        """End a call that proved nothing either way, freeing the half-open probe."""
+        with self._lock:
+            if self._half_open:
+                self._probe_started = None
+
+    def record_success(self):
+        with self._lock:
+            if self._half_open:
+                self._outcomes.clear()
+                self._opened_at = None
+                self._half_open = False
+                self._probe_started = None
+                logger.info(f"AI circuit '{self.name}' closed")
+            self._outcomes.append(True)
+
+    def record_failure(self):
+        with self._lock:
+            self._outcomes.append(False)
+            failures = self._outcomes.count(False)
+            tripped = (
+                len(self._outcomes) >= self.min_calls
+                and failures / len(self._outcomes) >= self.failure_rate
+            )
+            if self._half_open or (self._opened_at is None and tripped):
+                self._opened_at = time.monotonic()
+                self._half_open = False
+                self._probe_started = None
+                metrics.increment('ai_circuit_opened', service=self.name)
+                logger.warning(f"AI circuit '{self.name}' open for {self.cooldown}s ({failures}/{len(self._outcomes)} recent calls failed)")
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            return 'half_open' if self._half_open else 'open'
+
+_config = resilience_settings()
+_breakers = {
+    service: CircuitBreaker(
+        service,
+        window=_config['breaker_window'],
+        min_calls=_config['breaker_min_calls'],
+        failure_rate=_config['breaker_failure_rate'],
+        cooldown=_config['breaker_cooldown'],
+    )
+    for service in ('generate', 'embed')
+}
+
+def get_breaker(service):
+    return _breakers[service]
+
+def _backoff(attempt):
+    """Full-jitter exponential backoff for retry number `attempt` (1-based)."""
+    return random.uniform(0, min(_config['backoff_max'], _config['backoff_base'] * 2 ** (attempt - 1)))
+
+def _model_name(fn, kwargs):
+    # generate_content is bound to a GenerativeModel; embed_content takes model=
+    return model_label(kwargs.get('model') or getattr(getattr(fn, '__self__', None), 'model_name', None))
+
+def _call_tokens(service, result, args, kwargs):
+    if kwargs.get('stream'):
+        # Usage is only known once the stream is consumed; the caller records it
+        return 0, 0
+    if service == 'embed':
+        return embedding_tokens(kwargs.get('content', args[0] if args else '')), 0
+    return usage_from_response(result)
+
+def call_model(feature, service, fn, *args, use_slot=True, **kwargs):
+    """
+    Call `fn(*args, request_options={'timeout': ...}, **kwargs)` resiliently.
+
+    Args:
+        feature: Feature name for metrics (e.g. 'classify_department')
+        service: Upstream service breaker to use ('generate' or 'embed')
+        fn: Gemini client function (generate_content, embed_content)
+        use_slot: Acquire a model call slot (False if the caller holds one)
+
+    Raises:
+        ModelBusyError: no model call slot was free
+        ModelUnavailableError: circuit open, deadline passed or retries exhausted
+    """
+    breaker = _breakers[service]
+    model = _model_name(fn, kwargs)
+    if not breaker.allow():
+        raise ModelUnavailableError('circuit_open')
+
+    deadline = time.monotonic() + _config['deadlines'].get(feature, _config['deadline_seconds'])
+    reason, last_error = 'timeout', None
+
+    for attempt in range(1, _config['max_attempts'] + 1):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            reason = 'timeout'
+            break
+
+        attempt_started = time.perf_counter()
+        try:
+            if use_slot:
+                with model_call_slot(feature):
+                    result = fn(*args, request_options={'timeout': remaining}, **kwargs)
+            else:
+                result = fn(*args, request_options={'timeout': remaining}, **kwargs)
+            breaker.record_success()
+            record_model_call(
+                feature, model, (time.perf_counter() - attempt_started) * 1000, 'ok',
+                *_call_tokens(service, result, args, kwargs)
+            )
+            return result
+        except ModelBusyError:
+            breaker.release()
+            raise
+        except Exception as e:
+            last_error = e
+            if isinstance(e, BREAKER_ERRORS):
+                breaker.record_failure()
+            timed_out = isinstance(e, TIMEOUT_ERRORS)
+            record_model_call(feature, model, (time.perf_counter() - attempt_started) * 1000, 'timeout' if timed_out else 'error')
+            retryable = isinstance(e, RETRYABLE_ERRORS)
+            reason = 'timeout' if timed_out else ('retries_exhausted' if retryable else 'error')
+            if not retryable or attempt == _config['max_attempts'] or not breaker.allow():
+                break
+
+            metrics.increment('ai_model_retries', feature=feature)
+            time.sleep(min(max(0.0, deadline - time.monotonic()), _backoff(attempt)))
+
+    # A client error (or no attempt at all) leaves a half-open probe unresolved
+    breaker.release()
+    raise ModelUnavailableError(reason, last_error)
+
+def fallback_reason(error):
+    """Short reason label for an exception raised around a model call."""
+    if isinstance(error, ModelUnavailableError):
+        return error.reason
+    if isinstance(error, ModelBusyError):
+        return 'busy'
+    return 'error'
+
+def record_fallback(feature, reason, error=None):
+    """Count and log a degraded (fallback) AI result."""
+    metrics.increment('ai_fallbacks', feature=feature, reason=reason)
+    if error is not None:
+        logger.warning(f"AI fallback for {feature} ({reason}): {error}")
+    else:
+        logger.warning(f"AI fallback for {feature} ({reason})")
@@ -0,0 +1,177 @@
+"""
+Semantic Response Cache for the Chatbot
+
+Serves previous Gemini answers for questions that mean the same thing.
+Only context-free turns are cached (no prior messages or summary in the
+session), and
+questions that mention personal petition data bypass the cache entirely.
+
+Lookup order:
+1. Exact match on the normalized question (no embedding call)
+2. Cosine similarity of question embeddings above the configured threshold
+
+Entries are evicted least-recently-used once `max_entries` is reached and
+expire after `ttl_seconds`.
+"""
+
+from collections import OrderedDict
+import os
+import re
+import threading
+import time
+import numpy as np
+import google.generativeai as genai
+from django.conf import settings
+from ai_agent.chatbot import FALLBACK_MESSAGES
+from ai_agent.metrics import metrics
+from ai_agent.resilience import call_model, record_fallback, fallback_reason
+
+DEFAULT_CACHE_SETTINGS = {
+    'enabled': True,
+    'similarity_threshold': 0.92,
+    'max_entries': 1000,
+    'ttl_seconds': 24 * 3600,
+    'bypass_patterns': [
+        r'\bmy (?:petition|complaint|grievance|application|case)s?\b',
+        r'#\s*\d+',
+        r'\b(?:petition|complaint|grievance)\s*(?:no\.?|number|id)?\s*\d+',
+    ],
+}
+
+def _cache_settings():
+    return {**DEFAULT_CACHE_SETTINGS, **getattr(settings, 'CHATBOT_SEMANTIC_CACHE', {})}
+
+def normalize_question(text):
+    """Lowercase, strip punctuation and collapse whitespace."""
+    return " ".join(re.findall(r'[a-z0-9]+', text.lower()))
+
+def embed_question(text):
+    """Unit-length question embedding from Gemini, or None if unavailable."""
+    api_key = os.environ.get("GOOGLE_API_KEY")
+    if not api_key:
+        return None
+
+    try:
+        genai.configure(api_key=api_key, transport='rest')
+        result = call_model(
+            'question_embedding', 'embed', genai.embed_content,
+            model="models/embedding-001",
+            content=text,
+            task_type="semantic_similarity"
+        )
+    except Exception as e:
+        record_fallback('question_embedding', fallback_reason(e), e)
+        return None
+
+    vector = np.asarray(result['embedding'], dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else None
+
+class SemanticCache:
+    """Thread-safe LRU + TTL cache keyed by normalized question."""
+
+    def __init__(self, max_entries, ttl_seconds, similarity_threshold, embed=embed_question):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self._embed = embed
+        self._lock = threading.Lock()
+        # normalized question -> (answer, embedding or None, stored_at)
+        self._entries = OrderedDict()
+
+    def _expire(self, now):
+        expired = [key for key, (_, _, stored_at) in self._entries.items() if now - stored_at > self.ttl_seconds]
+        for key in expired:
+            del self._entries[key]
+
+    def get(self, question):
+        """
+        Return (answer, embedding) for a cached match.
+
+        `answer` is None on a miss; the computed embedding is returned so a
+        following `put` does not embed the same question twice.
+        """
+        key = normalize_question(question)
+        now = time.monotonic()
+
+        with self._lock:
+            self._expire(now)
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key][0], self._entries[key][1]
+            if not self._entries:
+                return None, None
+
+        embedding = self._embed(key)
+        if embedding is None:
+            return None, None
+
+        with self._lock:
+            candidates = [(k, e) for k, (_, e, _) in self._entries.items() if e is not None]
+            if not candidates:
+                return None, embedding
+
+            similarities = np.stack([e for _, e in candidates]) @ embedding
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.similarity_threshold:
+                return None, embedding
+
+            best_key = candidates[best][0]
+            if best_key not in self._entries:
+                return None, embedding
+            self._entries.move_to_end(best_key)
+            return self._entries[best_key][0], embedding
+
+    def put(self, question, answer, embedding=None):
+        """Store an answer, evicting the least-recently-used entry when full."""
+        key = normalize_question(question)
+        if embedding is None:
+            embedding = self._embed(key)
+
+        with self._lock:
+            self._entries[key] = (answer, embedding, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+_config = _cache_settings()
+response_cache = SemanticCache(
+    max_entries=_config['max_entries'],
+    ttl_seconds=_config['ttl_seconds'],
+    similarity_threshold=_config['similarity_threshold'],
+)
+_bypass_patterns = [re.compile(p, re.IGNORECASE) for p in _config['bypass_patterns']]
+
+def is_cacheable(question, conversation_history, summary=''):
+    """Only context-free questions without personal petition references are cached."""
+    # A session whose messages were all evicted still carries its summary
+    if not _config['enabled'] or conversation_history or summary:
+        return False
+    return not any(pattern.search(question) for pattern in _bypass_patterns)
+
+def get_cached_response(question, conversation_history, summary=''):
+    """
+    Look up a cached answer.
+
+    Returns (answer, embedding); answer is None on a miss or bypass.
+    """
+    if not is_cacheable(question, conversation_history, summary):
+        metrics.increment('chatbot_cache_requests', result='bypass')
+        return None, None
+
+    answer, embedding = response_cache.get(question)
+    metrics.increment('chatbot_cache_requests', result='hit' if answer is not None else 'miss')
+    return answer, embedding
+
+def store_response(question, conversation_history, answer, embedding=None, summary=''):
+    """Cache a successful model answer for a context-free question."""
+    if answer in FALLBACK_MESSAGES or not answer or not is_cacheable(question, conversation_history, summary):
+        return
+    response_cache.put(question, answer, embedding)
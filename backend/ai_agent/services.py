@@ -1,5 +1,13 @@
 import os
+import logging
 import google.generativeai as genai
+from django.conf import settings
+from ai_agent.heuristics import classify_department_local, predict_urgency_local, DEFAULT_PREFILTER_CONFIDENCE
+from ai_agent.metrics import metrics
+from ai_agent.resilience import call_model, record_fallback, fallback_reason
+from petitions.taxonomy import canonical_department_names, normalize_department_name
+
+logger = logging.getLogger(__name__)
 
 # Ensure GOOGLE_API_KEY is set in environment
 # os.environ["GOOGLE_API_KEY"] = "..."
@@ -14,15 +22,40 @@ def get_model():
     genai.configure(api_key=api_key, transport='rest')
     return genai.GenerativeModel('gemini-2.0-flash')
 
-def classify_department(title, description):
+def _prefilter_confidence(feature):
+    overrides = getattr(settings, 'AI_TRIAGE_HEURISTICS', {})
+    return overrides.get(f'{feature}_confidence', DEFAULT_PREFILTER_CONFIDENCE[feature])
+
+def _triage_result(feature, label, source):
+    metrics.increment('ai_triage_source', feature=feature, source=source)
+    return label, source
+
+def classify_department(title, description, with_source=False):
+    """
+    Department name for a petition.
+    
+    With `with_source`, returns (department, source) where source is
+    'heuristic' (confident local result), 'model' or 'fallback' (local
+    result used because the model was unavailable or failed).
+    """
+    label, source = _classify_department(title, description)
+    return (label, source) if with_source else label
+
+def _classify_department(title, description):
+    # Confident local classification skips the model call
+    local_department, confidence = classify_department_local(title, description)
+    if confidence >= _prefilter_confidence('department'):
+        return _triage_result('classify_department', local_department, 'heuristic')
+
     model = get_model()
     if not model:
-        return "General"
+        record_fallback('classify_department', 'no_api_key')
+        return _triage_result('classify_department', local_department, 'fallback')
     
     prompt = f"""
     You are an AI assistant for a government grievance system.
     Classify the following petition into one of these departments:
-    [Roads & Transport, Electricity, Water Supply, Sanitation, Police, Health, Education, General]
+    [{', '.join(canonical_department_names())}]
     
     Petition Title: {title}
     Petition Description: {description}
@@ -31,16 +64,28 @@ def classify_department(title, description):
     """
     
     try:
-        response = model.generate_content(prompt)
-        return response.text.strip()
+        response = call_model('classify_department', 'generate', model.generate_content, prompt)
+        # Map model output variants ("Roads and Transport", "Water Supply.") onto the taxonomy
+        return _triage_result('classify_department', normalize_department_name(response.text), 'model')
     except Exception as e:
-        print(f"AI Classification failed: {e}")
-        return "General"
+        record_fallback('classify_department', fallback_reason(e), e)
+        return _triage_result('classify_department', local_department, 'fallback')
+
+def predict_urgency(title, description, with_source=False):
+    """Urgency level for a petition; `with_source` as in classify_department."""
+    label, source = _predict_urgency(title, description)
+    return (label, source) if with_source else label
+
+def _predict_urgency(title, description):
+    # Severe cues (fire, gas leak, no water for days) skip the model call
+    local_urgency, confidence = predict_urgency_local(title, description)
+    if confidence >= _prefilter_confidence('urgency'):
+        return _triage_result('predict_urgency', local_urgency, 'heuristic')
 
-def predict_urgency(title, description):
     model = get_model()
     if not model:
-        return "LOW"
+        record_fallback('predict_urgency', 'no_api_key')
+        return _triage_result('predict_urgency', local_urgency, 'fallback')
     
     prompt = f"""
     You are an AI assistant. Analyze the urgency of this petition.
@@ -59,11 +104,12 @@ def predict_urgency(title, description):
     """
     
     try:
-        response = model.generate_content(prompt)
+        response = call_model('predict_urgency', 'generate', model.generate_content, prompt)
         urgency = response.text.strip().upper()
         if urgency not in ['LOW', 'MEDIUM', 'HIGH', 'CRITICAL']:
-            return 'LOW'
-        return urgency
+            record_fallback('predict_urgency', 'invalid_output')
+            return _triage_result('predict_urgency', local_urgency, 'fallback')
+        return _triage_result('predict_urgency', urgency, 'model')
     except Exception as e:
-        print(f"AI Urgency Prediction failed: {e}")
-        return "LOW"
+        record_fallback('predict_urgency', fallback_reason(e), e)
+        return _triage_result('predict_urgency', local_urgency, 'fallback')
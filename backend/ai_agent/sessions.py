@@ -0,0 +1,104 @@
+"""
+Chatbot Session Management
+
+Keeps conversation context on the server so clients only send the new
+message. Each session holds a bounded buffer of recent messages within a
+token budget; older turns are folded into a compact extractive summary so
+the prompt size stays bounded regardless of conversation length.
+
+Requests without a (valid) session id start a new conversation. Its row
+is only written when the first turn is recorded, so requests that end in
+a fallback leave nothing behind; purge_sessions() deletes sessions idle for
+longer than `retention_days`.
+"""
+
+from datetime import timedelta
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+from ai_agent.models import ChatSession
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SESSION_SETTINGS = {
+    'max_messages': 10,
+    'history_token_budget': 1000,
+    'summary_token_budget': 250,
+    'summary_line_chars': 120,
+    'retention_days': 30,
+}
+
+def _session_settings():
+    return {**DEFAULT_SESSION_SETTINGS, **getattr(settings, 'CHATBOT_SESSION', {})}
+
+def estimate_tokens(text):
+    """Rough token estimate (~4 characters per token)."""
+    return len(text) // 4 + 1
+
+def get_chat_session(user, session_id=None):
+    """
+    Get the user's session by id, else a new, not yet saved session.
+
+    The new session already has its id (returned to the client); record_turn
+    creates the row.
+    """
+    if session_id:
+        try:
+            return ChatSession.objects.get(id=session_id, user=user)
+        except (ChatSession.DoesNotExist, ValidationError, ValueError):
+            logger.info(f"Chat session {session_id} not found for {user.username}")
+    return ChatSession(user=user)
+
+def purge_sessions():
+    """Delete sessions idle for longer than `retention_days`."""
+    cutoff = timezone.now() - timedelta(days=_session_settings()['retention_days'])
+    deleted, _ = ChatSession.objects.filter(updated_at__lt=cutoff).delete()
+    return deleted
+
+def _summarize_message(message, line_chars):
+    role = "User asked" if message['role'] == 'user' else "Assistant answered"
+    content = " ".join(message['content'].split())
+    if len(content) > line_chars:
+        content = content[:line_chars].rstrip() + "..."
+    return f"{role}: {content}"
+
+def compact_session(session):
+    """
+    Enforce the message count and token budgets.
+
+    Evicted messages become one-line summary entries; the summary itself is
+    trimmed from the oldest end to stay within its own budget.
+    """
+    config = _session_settings()
+    messages = list(session.messages)
+    summary_lines = session.summary.splitlines() if session.summary else []
+
+    history_tokens = sum(estimate_tokens(m['content']) for m in messages)
+    while messages and (len(messages) > config['max_messages'] or history_tokens > config['history_token_budget']):
+        evicted = messages.pop(0)
+        history_tokens -= estimate_tokens(evicted['content'])
+        summary_lines.append(_summarize_message(evicted, config['summary_line_chars']))
+
+    summary_tokens = sum(estimate_tokens(line) for line in summary_lines)
+    while summary_lines and summary_tokens > config['summary_token_budget']:
+        summary_tokens -= estimate_tokens(summary_lines.pop(0))
+
+    session.messages = messages
+    session.summary = "\n".join(summary_lines)
+
+def record_turn(session, user_message, assistant_message):
+    """Append a user/assistant exchange to the session (creating it) and compact it."""
+    with transaction.atomic():
+        if session._state.adding:
+            ChatSession.objects.get_or_create(pk=session.pk, defaults={'user': session.user})
+        # Re-read under lock so concurrent turns don't overwrite each other
+        locked = ChatSession.objects.select_for_update().get(pk=session.pk)
+        locked.messages = list(locked.messages) + [
+            {'role': 'user', 'content': user_message},
+            {'role': 'assistant', 'content': assistant_message},
+        ]
+        compact_session(locked)
+        locked.save(update_fields=['messages', 'summary', 'updated_at'])
+    return locked
@@ -0,0 +1,8 @@
+from celery import shared_task
+
+@shared_task
+def purge_chat_sessions():
+    """Delete chatbot sessions past their retention (see CHATBOT_SESSION)."""
+    from ai_agent.sessions import purge_sessions
+    deleted = purge_sessions()
+    return f"Purged {deleted} chat sessions"
@@ -1,3 +1,487 @@
-from django.test import TestCase
+import json
+import tempfile
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from google.api_core import exceptions as google_exceptions
+import numpy as np
+from rest_framework.test import APIClient
+from ai_agent import duplicate_detection
+from ai_agent import concurrency, resilience, services, usage
+from ai_agent.concurrency import ModelBusyError
+from ai_agent.intent_router import RouteResult, route_message
+from ai_agent.models import ChatSession, ModelUsage
+from ai_agent.semantic_cache import SemanticCache, is_cacheable, store_response
+from ai_agent.sessions import get_chat_session, purge_sessions, record_turn
+from ai_agent.heuristics import DEFAULT_PREFILTER_CONFIDENCE, classify_department_local, predict_urgency_local
+from ai_agent.throttling import UserEndpointTokenBucketThrottle
 
-# Create your tests here.
+
+class SharedVectorIndexTests(SimpleTestCase):
+    """Chunks written by one process must be visible to another."""
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.settings_override = override_settings(VECTOR_INDEX={'host': '', 'path': self.path})
+        self.settings_override.enable()
+        duplicate_detection._collection = None
+
+    def tearDown(self):
+        duplicate_detection._collection = None
+        self.settings_override.disable()
+
+    def test_chunks_survive_a_fresh_client(self):
+        with mock.patch.object(duplicate_detection, 'get_embeddings', side_effect=lambda texts: [[1.0, 0.0, 0.0]] * len(texts)):
+            indexed = duplicate_detection.add_document_chunks_to_index(7, 'Broken pipe', 'attachment', 3, ['first chunk', 'second chunk'])
+        self.assertEqual(indexed, 2)
+
+        # A web process opens its own client on the same store
+        duplicate_detection._collection = None
+        self.assertEqual(duplicate_detection.nearest_petitions([1.0, 0.0, 0.0], n_results=5)[0][0], 7)
+
+    def test_failed_embedding_batch_is_not_counted(self):
+        with mock.patch.object(duplicate_detection, 'get_embeddings', return_value=None):
+            indexed = duplicate_detection.add_document_chunks_to_index(7, 'Broken pipe', 'attachment', 3, ['chunk'])
+        self.assertEqual(indexed, 0)
+
+
+@override_settings(REST_FRAMEWORK={'DEFAULT_THROTTLE_RATES': {'ai_chat': '2/min', 'ai_chat_global': '3/min'}})
+class TokenBucketThrottleTests(SimpleTestCase):
+    view = SimpleNamespace(throttle_scope='ai_chat')
+
+    def setUp(self):
+        cache.clear()
+
+    def _request(self, user_id):
+        return SimpleNamespace(user=SimpleNamespace(pk=user_id, is_authenticated=True), META={})
+
+    def _allow(self, user_id):
+        return UserEndpointTokenBucketThrottle().allow_request(self._request(user_id), self.view)
+
+    def test_user_bucket_limits_one_user(self):
+        self.assertEqual([self._allow(1) for _ in range(3)], [True, True, False])
+
+    def test_rejected_requests_do_not_drain_the_global_bucket(self):
+        for _ in range(10):
+            self._allow(1)
+        # User 1 only got two requests through, so one global token is left
+        self.assertTrue(self._allow(2))
+        self.assertFalse(self._allow(3))
+
+    def test_global_rejection_does_not_charge_the_user(self):
+        self._allow(1)
+        self._allow(1)
+        self._allow(2)
+        self.assertFalse(self._allow(3))
+        # User 3's bucket was never charged
+        self.assertIsNone(cache.get('throttle_tb:ai_chat:user:3'))
+
+    def test_refused_request_reports_wait(self):
+        throttle = UserEndpointTokenBucketThrottle()
+        for _ in range(2):
+            throttle.allow_request(self._request(1), self.view)
+        self.assertFalse(throttle.allow_request(self._request(1), self.view))
+        self.assertAlmostEqual(throttle.wait(), 30, delta=1)
+
+
+class ModelCallSlotTests(SimpleTestCase):
+    def setUp(self):
+        for name, value in (
+            ('_semaphore', concurrency.threading.BoundedSemaphore(1)),
+            ('_config', {**concurrency.DEFAULT_CONCURRENCY_SETTINGS, 'acquire_timeout': 0.01, 'retry_after': 7}),
+        ):
+            patcher = mock.patch.object(concurrency, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_call_beyond_the_cap_is_refused_with_retry_after(self):
+        with concurrency.model_call_slot('chatbot'):
+            with self.assertRaises(ModelBusyError) as raised:
+                with concurrency.model_call_slot('chatbot'):
+                    pass
+        self.assertEqual(raised.exception.retry_after, 7)
+
+    def test_slot_is_released_when_the_call_fails(self):
+        with self.assertRaises(RuntimeError):
+            with concurrency.model_call_slot('chatbot'):
+                raise RuntimeError('model error')
+        with concurrency.model_call_slot('chatbot'):
+            pass
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch('ai_agent.resilience.time.monotonic', side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = resilience.CircuitBreaker('generate', window=4, min_calls=4, failure_rate=0.5, cooldown=30)
+
+    def _open(self):
+        for _ in range(2):
+            self.breaker.record_success()
+            self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, 'open')
+
+    def test_opens_once_the_failure_rate_is_reached(self):
+        for _ in range(3):
+            self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, 'closed')
+        self.breaker.record_failure()
+        self.assertFalse(self.breaker.allow())
+
+    def test_half_open_lets_a_single_probe_through(self):
+        self._open()
+        self.now += 31
+        self.assertTrue(self.breaker.allow())
+        self.assertEqual(self.breaker.state, 'half_open')
+        self.assertFalse(self.breaker.allow())
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, 'closed')
+        self.assertTrue(self.breaker.allow())
+
+    def test_failed_probe_reopens_for_another_cooldown(self):
+        self._open()
+        self.now += 31
+        self.breaker.allow()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, 'open')
+        self.now += 10
+        self.assertFalse(self.breaker.allow())
+
+    def test_released_probe_frees_the_slot(self):
+        self._open()
+        self.now += 31
+        self.breaker.allow()
+        self.breaker.release()
+        self.assertTrue(self.breaker.allow())
+
+
+class CallModelTests(SimpleTestCase):
+    def setUp(self):
+        self.breaker = resilience.CircuitBreaker('generate', window=10, min_calls=2, failure_rate=0.5, cooldown=30)
+        config = {**resilience.DEFAULT_RESILIENCE_SETTINGS, 'max_attempts': 3, 'backoff_base': 0.0}
+        for target, value in (
+            ('ai_agent.resilience._breakers', {'generate': self.breaker}),
+            ('ai_agent.resilience._config', config),
+            ('ai_agent.resilience.record_model_call', mock.Mock()),
+            ('ai_agent.resilience.time.sleep', mock.Mock()),
+        ):
+            patcher = mock.patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_retryable_error_is_retried_with_a_deadline(self):
+        fn = mock.Mock(side_effect=[google_exceptions.ServiceUnavailable('down'), 'answer'])
+        self.assertEqual(resilience.call_model('chatbot', 'generate', fn, 'prompt', use_slot=False), 'answer')
+        self.assertEqual(fn.call_count, 2)
+        self.assertLessEqual(fn.call_args.kwargs['request_options']['timeout'], 15.0)
+
+    def test_client_error_is_not_retried_and_does_not_trip_the_breaker(self):
+        fn = mock.Mock(side_effect=google_exceptions.InvalidArgument('bad prompt'))
+        for _ in range(3):
+            with self.assertRaises(resilience.ModelUnavailableError) as raised:
+                resilience.call_model('chatbot', 'generate', fn, 'prompt', use_slot=False)
+        self.assertEqual(raised.exception.reason, 'error')
+        self.assertEqual(fn.call_count, 3)
+        self.assertEqual(self.breaker.state, 'closed')
+
+    def test_open_circuit_fails_fast(self):
+        fn = mock.Mock(side_effect=google_exceptions.ServiceUnavailable('down'))
+        with self.assertRaises(resilience.ModelUnavailableError):
+            resilience.call_model('chatbot', 'generate', fn, 'prompt', use_slot=False)
+        calls = fn.call_count
+        with self.assertRaises(resilience.ModelUnavailableError) as raised:
+            resilience.call_model('chatbot', 'generate', fn, 'prompt', use_slot=False)
+        self.assertEqual(raised.exception.reason, 'circuit_open')
+        self.assertEqual(fn.call_count, calls)
+
+
+class UrgencyHeuristicTests(SimpleTestCase):
+    threshold = DEFAULT_PREFILTER_CONFIDENCE['urgency']
+
+    def test_duration_alone_is_not_confident(self):
+        _, confidence = predict_urgency_local('Streetlight not working', 'The streetlight has been off for two weeks.')
+        self.assertLess(confidence, self.threshold)
+
+    def test_service_loss_with_duration_is_confident_high(self):
+        level, confidence = predict_urgency_local('No water', 'There has been no water for three days in our street.')
+        self.assertEqual(level, 'HIGH')
+        self.assertGreaterEqual(confidence, self.threshold)
+
+    def test_single_weak_cue_is_not_confident(self):
+        _, confidence = predict_urgency_local('Emergency contact list', 'Please put up the emergency numbers.')
+        self.assertLess(confidence, self.threshold)
+
+    def test_suggestion_about_a_severe_topic_is_low(self):
+        self.assertEqual(predict_urgency_local('Fire safety suggestion', 'Install fire extinguishers.')[0], 'LOW')
+
+
+class LocalTriageTests(SimpleTestCase):
+    def test_clear_department_is_classified_without_the_model(self):
+        with mock.patch.object(services, 'get_model') as get_model:
+            label, source = services.classify_department('Huge pothole', 'The road near the bus stop has a pothole.', with_source=True)
+        self.assertEqual((label, source), ('Roads & Transport', 'heuristic'))
+        get_model.assert_not_called()
+
+    def test_local_results_are_deterministic(self):
+        results = {classify_department_local('Transformer sparks', 'Voltage drops every night') for _ in range(5)}
+        self.assertEqual(len(results), 1)
+
+    def test_missing_model_falls_back_to_the_local_label(self):
+        with mock.patch.object(services, 'get_model', return_value=None):
+            self.assertEqual(services.predict_urgency('Bench', 'Paint the park bench', with_source=True)[1], 'fallback')
+
+    def test_invalid_model_output_falls_back(self):
+        model = mock.Mock()
+        with mock.patch.object(services, 'get_model', return_value=model), \
+                mock.patch.object(services, 'call_model', return_value=SimpleNamespace(text='Somewhat urgent')):
+            label, source = services.predict_urgency('Bench', 'Paint the park bench', with_source=True)
+        self.assertEqual(source, 'fallback')
+        self.assertEqual(label, predict_urgency_local('Bench', 'Paint the park bench')[0])
+
+
+class ChatSessionTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user('asha', password='pass12345')
+        self.other = User.objects.create_user('bob', password='pass12345')
+
+    def test_request_without_id_starts_a_fresh_unsaved_session(self):
+        record_turn(get_chat_session(self.user), 'hi', 'hello')
+        session = get_chat_session(self.user)
+        self.assertEqual(session.messages, [])
+        self.assertFalse(ChatSession.objects.filter(pk=session.pk).exists())
+
+    def test_first_recorded_turn_creates_the_session(self):
+        session = get_chat_session(self.user)
+        record_turn(session, 'hi', 'hello')
+        resumed = get_chat_session(self.user, str(session.id))
+        self.assertEqual(resumed.pk, session.pk)
+        self.assertEqual(len(resumed.messages), 2)
+
+    def test_other_users_session_id_is_not_resumed(self):
+        session = get_chat_session(self.user)
+        record_turn(session, 'hi', 'hello')
+        self.assertNotEqual(get_chat_session(self.other, str(session.id)).pk, session.pk)
+
+    def test_evicted_turns_keep_the_session_out_of_the_cache(self):
+        session = get_chat_session(self.user)
+        with self.settings(CHATBOT_SESSION={'max_messages': 0}):
+            session = record_turn(session, 'What is my petition 12 status?', 'It is pending.')
+        self.assertEqual(session.messages, [])
+        self.assertTrue(session.summary)
+        self.assertTrue(is_cacheable('What are the office hours?', session.messages))
+        self.assertFalse(is_cacheable('What are the office hours?', session.messages, session.summary))
+
+    def test_purge_deletes_idle_sessions(self):
+        old = get_chat_session(self.user)
+        record_turn(old, 'hi', 'hello')
+        ChatSession.objects.filter(pk=old.pk).update(updated_at=timezone.now() - timedelta(days=31))
+        record_turn(get_chat_session(self.user), 'hi again', 'hello')
+        self.assertEqual(purge_sessions(), 1)
+        self.assertEqual(ChatSession.objects.count(), 1)
+
+
+class ChatbotStreamViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user('asha', password='pass12345')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        for name, value in (
+            ('route_message', RouteResult('llm', None, 0.0)),
+            ('get_cached_response', (None, [0.1])),
+        ):
+            patcher = mock.patch(f'ai_agent.views.{name}', return_value=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch('ai_agent.views.store_response')
+        self.store_response = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _stream(self, chunks, outcome='ok'):
+        def fake_stream(message, history, summary, result):
+            yield from chunks
+            result['outcome'] = outcome
+
+        with mock.patch('ai_agent.views.stream_chatbot_response', side_effect=fake_stream):
+            response = self.client.post('/api/ai/chat/stream/', {'message': 'How do I appeal?'}, format='json')
+            body = b''.join(response.streaming_content).decode() if response.status_code == 200 else ''
+        events = []
+        for block in filter(None, body.split('\n\n')):
+            event, data = block.split('\n')
+            events.append((event.removeprefix('event: '), json.loads(data.removeprefix('data: '))))
+        return response, events
+
+    def test_tokens_are_streamed_between_session_and_done(self):
+        response, events = self._stream(['Write to ', 'the officer.'])
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual([name for name, _ in events], ['session', 'token', 'token', 'done'])
+        self.assertEqual(events[1][1], {'text': 'Write to '})
+
+    def test_completed_answer_is_cached_and_recorded(self):
+        _, events = self._stream(['Write to ', 'the officer.'])
+        self.store_response.assert_called_once()
+        self.assertEqual(self.store_response.call_args.args[2], 'Write to the officer.')
+        session = ChatSession.objects.get(pk=events[0][1]['session_id'])
+        self.assertEqual(session.messages[-1]['content'], 'Write to the officer.')
+
+    def test_failed_stream_is_neither_cached_nor_recorded(self):
+        self._stream(['Write to', 'Sorry, something went wrong.'], outcome='error')
+        self.store_response.assert_not_called()
+        self.assertFalse(ChatSession.objects.exists())
+
+    def test_busy_model_is_reported_before_the_stream_starts(self):
+        def busy(*args):
+            raise ModelBusyError(retry_after=3)
+            yield
+
+        with mock.patch('ai_agent.views.stream_chatbot_response', side_effect=busy):
+            response = self.client.post('/api/ai/chat/stream/', {'message': 'How do I appeal?'}, format='json')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '3')
+
+
+class IntentRouterTests(TestCase):
+    def setUp(self):
+        from petitions.models import Petition
+        User = get_user_model()
+        self.citizen = User.objects.create_user('asha', password='pass12345', role='CITIZEN')
+        self.other = User.objects.create_user('bob', password='pass12345', role='CITIZEN')
+        self.petition = Petition.objects.create(title='Broken streetlight', description='Dark street', citizen=self.citizen)
+
+    def test_status_question_is_answered_from_the_database(self):
+        result = route_message(f'What is the status of my petition #{self.petition.id}?', self.citizen)
+        self.assertEqual(result.route, 'petition_status')
+        self.assertIn('Broken streetlight', result.response)
+
+    def test_status_lookup_is_scoped_to_the_citizen(self):
+        result = route_message(f'status of petition {self.petition.id}', self.other)
+        self.assertEqual(result.route, 'petition_status')
+        self.assertNotIn('Broken streetlight', result.response)
+
+    def test_paraphrased_faq_is_answered_locally(self):
+        result = route_message('How can I submit a new petition?', self.citizen)
+        self.assertEqual((result.route, result.topic), ('faq', 'submit'))
+        self.assertTrue(result.response)
+
+    def test_open_question_goes_to_the_model(self):
+        result = route_message('My neighbour keeps burning plastic at night, what can be done?', self.citizen)
+        self.assertEqual(result.route, 'llm')
+        self.assertIsNone(result.response)
+
+
+class SemanticCacheTests(SimpleTestCase):
+    vectors = {
+        'how do i submit a petition': [1.0, 0.0],
+        'how can i submit a petition': [0.99, 0.14],
+        'who is the mayor': [0.0, 1.0],
+    }
+
+    def _cache(self, **overrides):
+        options = {'max_entries': 10, 'ttl_seconds': 60, 'similarity_threshold': 0.9, **overrides}
+        self.embed = mock.Mock(side_effect=lambda key: np.asarray(self.vectors[key]) / np.linalg.norm(self.vectors[key]))
+        return SemanticCache(embed=self.embed, **options)
+
+    def test_exact_question_hits_without_embedding(self):
+        cache = self._cache()
+        cache.put('How do I submit a petition?', 'Use the form.', embedding=np.asarray([1.0, 0.0]))
+        self.assertEqual(cache.get('how do I submit a petition')[0], 'Use the form.')
+        self.embed.assert_not_called()
+
+    def test_paraphrase_hits_above_the_threshold_only(self):
+        cache = self._cache()
+        cache.put('How do I submit a petition?', 'Use the form.')
+        self.assertEqual(cache.get('How can I submit a petition?')[0], 'Use the form.')
+        answer, embedding = cache.get('Who is the mayor?')
+        self.assertIsNone(answer)
+        self.assertIsNotNone(embedding)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = self._cache(max_entries=2)
+        cache.put('how do i submit a petition', 'a')
+        cache.put('who is the mayor', 'b')
+        cache.get('how do i submit a petition')
+        cache.put('how can i submit a petition', 'c')
+        self.assertEqual(set(cache._entries), {'how do i submit a petition', 'how can i submit a petition'})
+
+    def test_expired_entries_are_dropped(self):
+        cache = self._cache(ttl_seconds=60)
+        with mock.patch('ai_agent.semantic_cache.time.monotonic', return_value=1000.0):
+            cache.put('who is the mayor', 'b')
+        with mock.patch('ai_agent.semantic_cache.time.monotonic', return_value=1061.0):
+            self.assertIsNone(cache.get('who is the mayor')[0])
+        self.assertEqual(len(cache), 0)
+
+    def test_personal_questions_and_fallbacks_are_not_stored(self):
+        self.assertFalse(is_cacheable('What is the status of my petition?', []))
+        self.assertFalse(is_cacheable('Any news on #42?', []))
+        with mock.patch('ai_agent.semantic_cache.response_cache') as response_cache:
+            store_response('Who is the mayor?', [], '')
+            store_response('Who is the mayor?', [{'role': 'user', 'content': 'hi'}], 'The mayor.')
+        response_cache.put.assert_not_called()
+
+
+class UsageAccountingTests(TestCase):
+    def setUp(self):
+        for name, value in (('_buffer', {}), ('_ensure_flusher', mock.Mock())):
+            patcher = mock.patch.object(usage, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_calls_are_buffered_and_flushed_as_one_row(self):
+        usage.record_model_call('chatbot', 'gemini-2.0-flash', 120.0, 'ok', 40, 10)
+        usage.record_model_call('chatbot', 'gemini-2.0-flash', 80.0, 'error')
+        self.assertFalse(ModelUsage.objects.exists())
+        self.assertEqual(usage.flush_usage(), 1)
+        row = ModelUsage.objects.get(feature='chatbot')
+        self.assertEqual((row.calls, row.errors, row.prompt_tokens, row.output_tokens), (2, 1, 40, 10))
+        self.assertEqual(row.total_latency_ms, 200.0)
+
+    def test_later_flushes_add_to_the_daily_row(self):
+        usage.record_tokens('chatbot_stream', 'gemini-2.0-flash', 30, 5)
+        usage.flush_usage()
+        usage.record_tokens('chatbot_stream', 'gemini-2.0-flash', 20, 5)
+        usage.flush_usage()
+        row = ModelUsage.objects.get()
+        self.assertEqual((row.prompt_tokens, row.output_tokens), (50, 10))
+
+    def test_failed_flush_keeps_the_increments(self):
+        usage.record_tokens('chatbot', 'gemini-2.0-flash', 30, 5)
+        with mock.patch.object(ModelUsage.objects, 'filter', side_effect=DatabaseError('locked')):
+            self.assertEqual(usage.flush_usage(), 0)
+        self.assertEqual(usage.flush_usage(), 1)
+        self.assertEqual(ModelUsage.objects.get().prompt_tokens, 30)
+
+
+@override_settings(METRICS_ALLOWED_IPS=['127.0.0.1'], METRICS_AUTH_TOKEN='')
+class MetricsEndpointTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch('config.mongodb.mongo_metrics_prometheus', return_value='')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_local_scraper_reads_prometheus_text(self):
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+
+    def test_remote_anonymous_client_is_refused(self):
+        self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='203.0.113.5').status_code, 403)
+
+    def test_remote_admin_is_allowed(self):
+        admin = get_user_model().objects.create_user('root', password='pass12345', is_staff=True)
+        self.client.force_login(admin)
+        self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='203.0.113.5').status_code, 200)
+
+    def test_configured_token_is_required(self):
+        with self.settings(METRICS_AUTH_TOKEN='scrape-secret'):
+            self.assertEqual(self.client.get('/metrics').status_code, 401)
+            response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertEqual(response.status_code, 200)
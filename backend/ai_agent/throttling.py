@@ -0,0 +1,173 @@
+"""
+Token Bucket Throttles for AI Endpoints
+
+Buckets live in the Django cache, so with a shared backend (Redis) the
+limits hold across all server processes. Rates use DRF's "N/period" format
+from REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']: N is the bucket capacity
+(burst) and tokens refill continuously at N per period.
+
+A throttle may check several buckets (per user, then endpoint-wide). They
+are checked in order and a request takes a token from every bucket or from
+none, so a user whose own bucket is empty cannot drain the shared one.
+Updates are atomic: a Lua script on Redis, otherwise a short `cache.add`
+lock around the read-modify-write.
+"""
+
+import math
+import time
+from django.core.cache import caches
+from django.core.cache.backends.redis import RedisCache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+LOCK_TIMEOUT = 1          # seconds a crashed holder can block a bucket
+LOCK_WAIT = 0.2           # give up (and throttle) after waiting this long
+LOCK_POLL = 0.005
+
+# KEYS: bucket keys in check order; ARGV: now, then capacity/refill per key.
+# Returns '' when admitted, else the seconds until the first empty bucket refills.
+TAKE_TOKENS_LUA = """
+local now = tonumber(ARGV[1])
+local tokens = {}
+for i = 1, #KEYS do
+    local capacity = tonumber(ARGV[2 * i])
+    local refill = tonumber(ARGV[2 * i + 1])
+    local bucket = redis.call('HMGET', KEYS[i], 'tokens', 'updated')
+    local available = tonumber(bucket[1]) or capacity
+    local updated = tonumber(bucket[2]) or now
+    available = math.min(capacity, available + math.max(0, now - updated) * refill)
+    if available < 1 then
+        return tostring((1 - available) / refill)
+    end
+    tokens[i] = available
+end
+for i = 1, #KEYS do
+    local capacity = tonumber(ARGV[2 * i])
+    local refill = tonumber(ARGV[2 * i + 1])
+    redis.call('HSET', KEYS[i], 'tokens', tostring(tokens[i] - 1), 'updated', ARGV[1])
+    redis.call('EXPIRE', KEYS[i], math.ceil(capacity / refill))
+end
+return ''
+"""
+
+class TokenBucketThrottle(BaseThrottle):
+    """Base token bucket throttle; subclasses list the buckets to charge."""
+    cache_alias = 'default'
+
+    def __init__(self):
+        self._wait = None
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    @staticmethod
+    def parse_rate(rate):
+        """'20/min' -> (capacity 20, refill 20/60 tokens per second)."""
+        num, period = rate.split('/')
+        capacity = int(num)
+        return capacity, capacity / PERIODS[period[0]]
+
+    @staticmethod
+    def scope_rate(view, suffix=''):
+        scope = getattr(view, 'throttle_scope', None)
+        if not scope:
+            return None
+        return api_settings.DEFAULT_THROTTLE_RATES.get(f"{scope}{suffix}")
+
+    def get_buckets(self, request, view):
+        """(cache key, rate) pairs, checked in order."""
+        raise NotImplementedError('.get_buckets() must be overridden')
+
+    def allow_request(self, request, view):
+        buckets = [
+            (key, self.parse_rate(rate))
+            for key, rate in self.get_buckets(request, view)
+            if key is not None and rate is not None
+        ]
+        if not buckets:
+            return True
+
+        self._wait = self._take(buckets, time.time())
+        return self._wait is None
+
+    def _take(self, buckets, now):
+        """Take one token from every bucket, or none; returns the wait if refused."""
+        client = self._redis_client()
+        if client is not None:
+            args = [repr(now)]
+            for _, (capacity, refill) in buckets:
+                args += [capacity, repr(refill)]
+            wait = client.eval(TAKE_TOKENS_LUA, len(buckets), *[self.cache.make_key(key) for key, _ in buckets], *args)
+            wait = wait.decode() if isinstance(wait, bytes) else wait
+            return float(wait) if wait else None
+
+        locks = [f"{key}:lock" for key, _ in buckets]
+        acquired = []
+        try:
+            for lock in locks:
+                if not self._lock(lock):
+                    return LOCK_WAIT
+                acquired.append(lock)
+            return self._take_locked(buckets, now)
+        finally:
+            for lock in acquired:
+                self.cache.delete(lock)
+
+    def _lock(self, lock):
+        deadline = time.monotonic() + LOCK_WAIT
+        while not self.cache.add(lock, 1, LOCK_TIMEOUT):
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(LOCK_POLL)
+        return True
+
+    def _take_locked(self, buckets, now):
+        states = []
+        for key, (capacity, refill) in buckets:
+            tokens, updated = self.cache.get(key, (capacity, now))
+            tokens = min(capacity, tokens + max(0.0, now - updated) * refill)
+            if tokens < 1:
+                return (1 - tokens) / refill
+            states.append(tokens)
+        for (key, (capacity, refill)), tokens in zip(buckets, states):
+            self.cache.set(key, (tokens - 1, now), math.ceil(capacity / refill))
+        return None
+
+    def _redis_client(self):
+        """Raw client of Django's RedisCache backend, None for other backends."""
+        cache = self.cache
+        if not isinstance(cache, RedisCache):
+            return None
+        return cache._cache.get_client(write=True)
+
+    def wait(self):
+        return self._wait
+
+class UserTokenBucketThrottle(TokenBucketThrottle):
+    """Per-user bucket for each throttled endpoint (`throttle_scope`)."""
+
+    def user_bucket(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+        return f"throttle_tb:{getattr(view, 'throttle_scope', None)}:user:{ident}", self.scope_rate(view)
+
+    def get_buckets(self, request, view):
+        return [self.user_bucket(request, view)]
+
+class UserEndpointTokenBucketThrottle(UserTokenBucketThrottle):
+    """
+    Per-user bucket, then one bucket shared by all users of the endpoint
+    (rate key `<scope>_global`). The shared bucket is only charged for
+    requests the user's own bucket admits.
+    """
+
+    def get_buckets(self, request, view):
+        return [
+            self.user_bucket(request, view),
+            (f"throttle_tb:{getattr(view, 'throttle_scope', None)}:global", self.scope_rate(view, '_global')),
+        ]
@@ -1,7 +1,8 @@
 from django.urls import path
-from .views import ChatbotView, ChatbotHelpView
+from .views import ChatbotView, ChatbotStreamView, ChatbotHelpView
 
 urlpatterns = [
     path('chat/', ChatbotView.as_view(), name='chatbot'),
+    path('chat/stream/', ChatbotStreamView.as_view(), name='chatbot-stream'),
     path('chat/help/', ChatbotHelpView.as_view(), name='chatbot-help'),
 ]
@@ -0,0 +1,148 @@
+"""
+AI Usage Accounting
+
+Records every model call (feature, model, latency, outcome, prompt/output
+tokens) into the in-process metrics registry, exposed on /metrics in the
+Prometheus text format, and into daily ModelUsage rows that back the
+`ai_cost_report` management command.
+
+ModelUsage writes are kept off the request path: increments accumulate in
+a per-process buffer that a background thread flushes every
+AI_USAGE['flush_interval'] seconds (and at exit), one UPDATE per
+(date, feature, model) instead of one per call.
+"""
+
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from ai_agent.metrics import metrics
+from ai_agent.sessions import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+def model_label(name):
+    """'models/gemini-2.0-flash' -> 'gemini-2.0-flash'."""
+    return (name or 'unknown').split('/')[-1]
+
+def usage_from_response(response):
+    """(prompt_tokens, output_tokens) from a Gemini response's usage metadata."""
+    usage = getattr(response, 'usage_metadata', None)
+    if not usage:
+        return 0, 0
+    return (
+        getattr(usage, 'prompt_token_count', 0) or 0,
+        getattr(usage, 'candidates_token_count', 0) or 0,
+    )
+
+def embedding_tokens(content):
+    """Embedding responses carry no usage metadata; estimate from the input."""
+    if isinstance(content, (list, tuple)):
+        return sum(estimate_tokens(str(c)) for c in content)
+    return estimate_tokens(str(content or ''))
+
+def record_model_call(feature, model, latency_ms, outcome, prompt_tokens=0, output_tokens=0):
+    """Account one model call attempt."""
+    metrics.increment('ai_model_calls', feature=feature, model=model, outcome=outcome)
+    metrics.observe('ai_model_latency_ms', latency_ms, feature=feature, model=model)
+    record_tokens(feature, model, prompt_tokens, output_tokens, calls=1, errors=int(outcome != 'ok'), latency_ms=latency_ms)
+
+def record_tokens(feature, model, prompt_tokens, output_tokens, calls=0, errors=0, latency_ms=0.0):
+    """
+    Account token usage.
+
+    Called directly for streamed responses, whose usage is only known once
+    the stream has been consumed (the call itself is recorded up front).
+    """
+    if prompt_tokens:
+        metrics.increment('ai_prompt_tokens', prompt_tokens, feature=feature, model=model)
+    if output_tokens:
+        metrics.increment('ai_output_tokens', output_tokens, feature=feature, model=model)
+
+    _persist(
+        feature, model,
+        calls=calls,
+        errors=errors,
+        prompt_tokens=prompt_tokens,
+        output_tokens=output_tokens,
+        total_latency_ms=latency_ms,
+    )
+
+DEFAULT_AI_USAGE = {
+    'persist': True,
+    'flush_interval': 30,   # seconds between ModelUsage flushes
+}
+
+def usage_settings():
+    return {**DEFAULT_AI_USAGE, **getattr(settings, 'AI_USAGE', {})}
+
+_buffer = {}
+_buffer_lock = threading.Lock()
+_flusher = None
+
+def _persist(feature, model, **increments):
+    """Buffer increments for today's ModelUsage row."""
+    if not usage_settings()['persist']:
+        return
+
+    key = (timezone.localdate(), feature, model)
+    with _buffer_lock:
+        _buffer.setdefault(key, Counter()).update(increments)
+    _ensure_flusher()
+
+def _ensure_flusher():
+    global _flusher
+    if _flusher is not None and _flusher.is_alive():
+        return
+    with _buffer_lock:
+        if _flusher is None or not _flusher.is_alive():
+            _flusher = threading.Thread(target=_flush_periodically, name='ai-usage-flush', daemon=True)
+            _flusher.start()
+
+def _flush_periodically():
+    while True:
+        time.sleep(usage_settings()['flush_interval'])
+        flush_usage()
+
+def flush_usage():
+    """Write buffered usage to ModelUsage; failed rows go back into the buffer."""
+    global _buffer
+    with _buffer_lock:
+        pending, _buffer = _buffer, {}
+    if not pending:
+        return 0
+
+    from django.db import connection
+    from ai_agent.models import ModelUsage
+
+    written = 0
+    try:
+        for (date, feature, model), increments in pending.items():
+            lookup = {'date': date, 'feature': feature, 'model': model}
+            updates = {field: F(field) + value for field, value in increments.items()}
+            try:
+                with transaction.atomic():
+                    if not ModelUsage.objects.filter(**lookup).update(**updates):
+                        try:
+                            with transaction.atomic():
+                                ModelUsage.objects.create(**lookup, **increments)
+                        except IntegrityError:
+                            # Another process created the row first
+                            ModelUsage.objects.filter(**lookup).update(**updates)
+                written += 1
+            except Exception as e:
+                logger.warning(f"⚠️ Failed to record AI usage for {feature}: {e}")
+                with _buffer_lock:
+                    _buffer.setdefault((date, feature, model), Counter()).update(increments)
+    finally:
+        if threading.current_thread() is _flusher:
+            # The flusher thread's own connection; request threads manage theirs
+            connection.close()
+    return written
+
+atexit.register(flush_usage)
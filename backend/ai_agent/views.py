@@ -2,13 +2,41 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
-from ai_agent.chatbot import get_chatbot_response, get_petition_help
+from rest_framework.exceptions import Throttled
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from ai_agent.chatbot import get_chatbot_response, get_petition_help, stream_chatbot_response, FALLBACK_MESSAGES
+from ai_agent.sessions import get_chat_session, record_turn
+from ai_agent.intent_router import route_message
+from ai_agent.semantic_cache import get_cached_response, store_response
+from ai_agent.metrics import metrics
+from ai_agent.concurrency import ModelBusyError
+from ai_agent.throttling import UserEndpointTokenBucketThrottle
+import hmac
+import itertools
+import json
+import time
+
+def _record_route(route, started):
+    """Count the route taken and its end-to-end latency."""
+    metrics.increment('chatbot_route_requests', route=route)
+    metrics.observe('chatbot_route_latency_ms', (time.perf_counter() - started) * 1000, route=route)
+
+def _model_busy(exc):
+    """429 with Retry-After when all model call slots are taken."""
+    return Throttled(wait=exc.retry_after, detail="The AI assistant is busy. Please try again shortly.")
+
+def _sse_event(event, data):
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
 class ChatbotView(APIView):
     """
     API endpoint for chatbot interactions.
     """
     permission_classes = [IsAuthenticated]
+    throttle_classes = [UserEndpointTokenBucketThrottle]
+    throttle_scope = 'ai_chat'
     
     def post(self, request):
         """
@@ -17,14 +45,12 @@ class ChatbotView(APIView):
         Request body:
         {
             "message": "user message",
-            "conversation_history": [
-                {"role": "user", "content": "previous message"},
-                {"role": "assistant", "content": "previous response"}
-            ]
+            "session_id": "uuid returned by a previous response (optional)"
         }
+        
+        Conversation context is kept server-side in the chat session.
         """
         user_message = request.data.get('message', '').strip()
-        conversation_history = request.data.get('conversation_history', [])
         
         if not user_message:
             return Response(
@@ -32,26 +58,102 @@ class ChatbotView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Check for quick help commands
-        if user_message.lower() in ['help', '/help']:
-            response_text = get_petition_help('general')
-        elif 'submit' in user_message.lower() and 'how' in user_message.lower():
-            response_text = get_petition_help('submit')
-        elif 'status' in user_message.lower():
-            response_text = get_petition_help('status')
-        elif 'urgency' in user_message.lower() or 'priority' in user_message.lower():
-            response_text = get_petition_help('urgency')
-        elif 'department' in user_message.lower():
-            response_text = get_petition_help('departments')
-        else:
-            # Get AI response
-            response_text = get_chatbot_response(user_message, conversation_history)
+        started = time.perf_counter()
+        session = get_chat_session(request.user, request.data.get('session_id'))
+        
+        # Answer locally (petition lookup / FAQ) when confident, else ask the model
+        route = route_message(user_message, request.user)
+        route_name = route.route
+        response_text = route.response
+        if response_text is None:
+            # Reuse an answer to a semantically equivalent question if we have one
+            response_text, embedding = get_cached_response(user_message, session.messages, session.summary)
+            if response_text is not None:
+                route_name = 'cache'
+            else:
+                try:
+                    response_text = get_chatbot_response(user_message, session.messages, session.summary)
+                except ModelBusyError as e:
+                    raise _model_busy(e)
+                store_response(user_message, session.messages, response_text, embedding, session.summary)
+        
+        if response_text not in FALLBACK_MESSAGES:
+            record_turn(session, user_message, response_text)
+        _record_route(route_name, started)
         
         return Response({
             "response": response_text,
+            "route": route_name,
+            "session_id": str(session.id),
             "timestamp": request.data.get('timestamp')
         })
 
+class ChatbotStreamView(APIView):
+    """
+    Streaming chatbot endpoint (Server-Sent Events).
+    
+    Same request body as ChatbotView. Emits a `session` event, `token` events
+    as text is generated and a final `done` event; generation stops if the
+    client disconnects.
+    """
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [UserEndpointTokenBucketThrottle]
+    throttle_scope = 'ai_chat'
+    
+    def post(self, request):
+        user_message = request.data.get('message', '').strip()
+        
+        if not user_message:
+            return Response(
+                {"error": "Message is required"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        started = time.perf_counter()
+        session = get_chat_session(request.user, request.data.get('session_id'))
+        route = route_message(user_message, request.user)
+        route_name = route.route
+        answer, embedding = route.response, None
+        if answer is None:
+            answer, embedding = get_cached_response(user_message, session.messages, session.summary)
+            if answer is not None:
+                route_name = 'cache'
+        
+        stream_result = {}
+        if answer is not None:
+            chunks = [answer]
+            stream_result['outcome'] = 'ok'
+        else:
+            # Start the stream here so a busy model is reported as 429, not mid-stream
+            stream = stream_chatbot_response(user_message, session.messages, session.summary, stream_result)
+            try:
+                chunks = itertools.chain([next(stream)], stream)
+            except ModelBusyError as e:
+                raise _model_busy(e)
+        
+        def event_stream():
+            yield _sse_event('session', {"session_id": str(session.id), "route": route_name})
+            
+            parts = []
+            for text in chunks:
+                parts.append(text)
+                yield _sse_event('token', {"text": text})
+            
+            # Only completed answers are cached or become session context; a
+            # failed stream ends in an error message, possibly after partial text
+            response_text = "".join(parts).strip()
+            if stream_result.get('outcome') == 'ok':
+                if route_name == 'llm':
+                    store_response(user_message, session.messages, response_text, embedding, session.summary)
+                record_turn(session, user_message, response_text)
+            _record_route(route_name, started)
+            yield _sse_event('done', {"timestamp": request.data.get('timestamp')})
+        
+        response = StreamingHttpResponse(event_stream(), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
 class ChatbotHelpView(APIView):
     """
     Get help information for specific topics.
@@ -67,3 +169,31 @@ class ChatbotHelpView(APIView):
             "topic": topic,
             "help": help_text
         })
+
+def _metrics_access_allowed(request):
+    if request.META.get('REMOTE_ADDR') in getattr(settings, 'METRICS_ALLOWED_IPS', ['127.0.0.1', '::1']):
+        return True
+    user = getattr(request, 'user', None)
+    return bool(user and user.is_authenticated and (user.is_staff or getattr(user, 'role', '') == 'ADMIN'))
+
+def prometheus_metrics(request):
+    """
+    AI metrics in the Prometheus text format (model calls, tokens, latency,
+    fallbacks, cache and routing counters) and MongoDB pool / circuit
+    breaker metrics for this process.
+
+    If METRICS_AUTH_TOKEN is set, scrapers must send it as a Bearer token.
+    Otherwise only METRICS_ALLOWED_IPS (default: localhost) and logged-in
+    admins may read it.
+    """
+    token = getattr(settings, 'METRICS_AUTH_TOKEN', '')
+    if token:
+        provided = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+        if not hmac.compare_digest(provided, token):
+            return HttpResponse("Unauthorized\n", status=401, content_type='text/plain')
+    elif not _metrics_access_allowed(request):
+        return HttpResponse("Forbidden\n", status=403, content_type='text/plain')
+
+    from config.mongodb import mongo_metrics_prometheus
+    body = metrics.to_prometheus() + mongo_metrics_prometheus()
+    return HttpResponse(body, content_type='text/plain; version=0.0.4; charset=utf-8')
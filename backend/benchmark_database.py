@@ -0,0 +1,128 @@
+"""
+Database Concurrency Benchmark
+
+Measures petition submissions/sec under concurrent writer threads (like
+Waitress worker threads) for the configured database backend. Each
+submission performs the ORM writes of PetitionViewSet.perform_create:
+petition, attachment, officer assignment and two audit rows.
+
+  per-row:  every write commits on its own (autocommit, the old behaviour)
+  atomic:   all writes of a submission in one transaction (current behaviour)
+
+AI calls, file storage and the MongoDB sync are excluded. Benchmark rows are
+deleted afterwards.
+
+Run once per backend, e.g.:
+    DB_ENGINE=sqlite python benchmark_database.py --threads 8
+    DB_ENGINE=postgresql DB_NAME=petitions python benchmark_database.py --threads 8
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+import django
+
+# Setup Django
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction, OperationalError
+from petitions.models import Petition, Attachment, Department
+from petitions.audit import log_petition_created, log_officer_assigned
+
+User = get_user_model()
+
+TITLE_PREFIX = 'bench-db-'
+
+def _setup():
+    department, _ = Department.objects.get_or_create(name='General')
+    citizen, _ = User.objects.get_or_create(username='bench_db_citizen', defaults={'role': 'CITIZEN'})
+    officer, _ = User.objects.get_or_create(
+        username='bench_db_officer',
+        defaults={'role': 'OFFICER', 'department': department, 'is_active_officer': True},
+    )
+    return department, citizen, officer
+
+def _submit(i, department, citizen, officer):
+    petition = Petition.objects.create(
+        title=f'{TITLE_PREFIX}{i}',
+        description='Benchmark petition',
+        citizen=citizen,
+        department=department,
+        urgency='MEDIUM',
+    )
+    Attachment.objects.create(petition=petition, file='attachments/bench.bin')
+    petition.assigned_officer = officer
+    petition.save(update_fields=['assigned_officer'])
+    log_officer_assigned(petition, citizen, officer)
+    log_petition_created(petition, citizen)
+
+def _worker(start, count, atomic, context, latencies, errors):
+    try:
+        for i in range(start, start + count):
+            began = time.perf_counter()
+            try:
+                if atomic:
+                    with transaction.atomic():
+                        _submit(i, *context)
+                else:
+                    _submit(i, *context)
+            except OperationalError:
+                # e.g. SQLite "database is locked" after the busy timeout
+                errors.append(i)
+                continue
+            latencies.append((time.perf_counter() - began) * 1000)
+    finally:
+        connection.close()
+
+def run(threads, per_thread, atomic, context):
+    latencies, errors = [], []
+    workers = [
+        threading.Thread(target=_worker, args=(t * per_thread, per_thread, atomic, context, latencies, errors))
+        for t in range(threads)
+    ]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    return latencies, errors, elapsed
+
+def _cleanup():
+    Petition.objects.filter(title__startswith=TITLE_PREFIX).delete()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--submissions', type=int, default=50, help="Submissions per thread")
+    args = parser.parse_args()
+
+    settings = connection.settings_dict
+    print("=" * 60)
+    print(f"DATABASE BENCHMARK: {connection.vendor} ({args.threads} threads x {args.submissions} submissions)")
+    print(f"CONN_MAX_AGE={settings.get('CONN_MAX_AGE')} OPTIONS={settings.get('OPTIONS', {})}")
+    print("=" * 60)
+
+    context = _setup()
+    try:
+        for label, atomic in (('per-row', False), ('atomic', True)):
+            latencies, errors, elapsed = run(args.threads, args.submissions, atomic, context)
+            _cleanup()
+            done = len(latencies)
+            p95 = statistics.quantiles(latencies, n=20)[-1] if len(latencies) > 1 else 0.0
+            print(
+                f"{label:8} {done / elapsed:8.1f} submissions/sec | "
+                f"p50 {statistics.median(latencies) if latencies else 0:7.1f} ms | "
+                f"p95 {p95:7.1f} ms | errors {len(errors)}"
+            )
+    finally:
+        _cleanup()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Registration CPU Benchmark
+
+Measures signups/sec per core for the registration path:
+  before: Django hash (serializer) + second make_password for the MongoDB record
+  after:  Django hash only, reused for the MongoDB record
+
+Users are created inside a rolled-back transaction and the MongoDB write itself
+is excluded, so the numbers reflect CPU cost on the request path.
+
+Usage:
+    python benchmark_registration.py --signups 20
+"""
+
+import argparse
+import os
+import sys
+import time
+import django
+
+# Setup Django
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from django.db import transaction
+from django.contrib.auth.hashers import make_password
+from users.serializers import UserSerializer
+from users.mongo_repository import UserRepository
+
+class _Rollback(Exception):
+    pass
+
+def run(signups, rehash):
+    """Return CPU seconds spent registering `signups` users."""
+    started = time.process_time()
+    try:
+        with transaction.atomic():
+            for i in range(signups):
+                data = {
+                    'username': f'bench_user_{i}',
+                    'email': f'bench_{i}@example.com',
+                    'password': 'bench-password-123',
+                }
+                serializer = UserSerializer(data=data)
+                serializer.is_valid(raise_exception=True)
+                user = serializer.save()
+
+                password_hash = make_password(data['password']) if rehash else user.password
+                UserRepository._build_user_doc(user.username, user.email, password_hash, user.role)
+            raise _Rollback()
+    except _Rollback:
+        pass
+    return time.process_time() - started
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--signups', type=int, default=20)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"REGISTRATION BENCHMARK ({args.signups} signups, single core)")
+    print("=" * 60)
+
+    before = run(args.signups, rehash=True)
+    after = run(args.signups, rehash=False)
+
+    print(f"Before (double hash): {args.signups / before:6.2f} signups/sec/core")
+    print(f"After  (single hash): {args.signups / after:6.2f} signups/sec/core")
+    print(f"Speedup: {before / after:.2f}x")
+
+if __name__ == '__main__':
+    main()
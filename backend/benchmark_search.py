@@ -0,0 +1,120 @@
+"""
+Petition Search Benchmark
+
+Loads synthetic petitions (built from ai_agent/triage_samples.json with
+random localities and reference numbers mixed in) and measures
+/api/petitions/search/ query latency via petitions.search.search_petitions,
+compared with the icontains scan officers would otherwise rely on.
+
+Run against a scratch database, e.g.:
+    DB_NAME=/tmp/search-bench.sqlite3 python manage.py migrate
+    DB_NAME=/tmp/search-bench.sqlite3 python benchmark_search.py --petitions 1000000 --keep
+
+    DB_ENGINE=postgresql DB_NAME=search_bench python manage.py migrate
+    DB_ENGINE=postgresql DB_NAME=search_bench python benchmark_search.py --petitions 1000000
+
+With --keep the generated petitions stay, so later runs skip loading.
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import django
+
+# Setup Django
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import Q
+from petitions.models import Petition, Department
+from petitions.search import search_petitions
+
+User = get_user_model()
+
+SAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ai_agent', 'triage_samples.json')
+BENCH_PREFIX = '[bench] '
+LOCALITIES = [
+    'Anna Nagar', 'Gandhi Road', 'Market Street', 'Ward 12', 'Lake View Colony', 'Station Road',
+    'Old Town', 'Sector 7', 'Temple Street', 'Riverside', 'Industrial Area', 'Bus Depot',
+]
+QUERIES = ['pothole', 'street light', 'water leak', 'garbage collection', 'transformer sparks', 'sewage overflow school']
+BATCH_SIZE = 5000
+
+def _load(count, seed=7):
+    with open(SAMPLES) as f:
+        samples = json.load(f)
+    rng = random.Random(seed)
+    citizen, _ = User.objects.get_or_create(username='bench_search_citizen', defaults={'role': 'CITIZEN'})
+    departments = {s['department']: Department.objects.get_or_create(name=s['department'])[0] for s in samples}
+    statuses = Petition.Status.values
+
+    existing = Petition.objects.filter(title__startswith=BENCH_PREFIX).count()
+    started = time.perf_counter()
+    for start in range(existing, count, BATCH_SIZE):
+        batch = []
+        for _ in range(min(BATCH_SIZE, count - start)):
+            sample = rng.choice(samples)
+            locality = rng.choice(LOCALITIES)
+            batch.append(Petition(
+                title=f"{BENCH_PREFIX}{sample['title']} - {locality}",
+                description=f"{sample['description']} Reported near {locality}, ref {rng.randint(10000, 99999)}.",
+                citizen=citizen,
+                department=departments[sample['department']],
+                urgency=sample['urgency'],
+                status=rng.choice(statuses),
+            ))
+        with transaction.atomic():
+            Petition.objects.bulk_create(batch)
+    loaded = count - existing
+    if loaded > 0:
+        print(f"Loaded {loaded} petitions in {time.perf_counter() - started:.1f}s")
+
+def _time(fn, repeat):
+    latencies = []
+    for _ in range(repeat):
+        began = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - began) * 1000)
+    return statistics.median(latencies), max(latencies)
+
+def _scan(query):
+    filters = Q()
+    for term in query.split():
+        filters &= Q(title__icontains=term) | Q(description__icontains=term)
+    return list(Petition.objects.filter(filters).order_by('-created_at')[:20])
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--petitions', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--scan-repeat', type=int, default=3, help="Repeats for the icontains baseline")
+    parser.add_argument('--keep', action='store_true', help="Keep generated petitions for later runs")
+    args = parser.parse_args()
+
+    print("=" * 72)
+    print(f"SEARCH BENCHMARK: {connection.vendor}, {args.petitions} petitions")
+    print("=" * 72)
+
+    _load(args.petitions)
+    officer = User(username='bench_search_officer', role='OFFICER')
+    try:
+        print(f"{'query':26} {'matches':>9} {'fts p50':>9} {'fts max':>9} {'+status':>9} {'scan p50':>9}")
+        for query in QUERIES:
+            count = search_petitions(officer, query)['count']
+            fts_p50, fts_max = _time(lambda: search_petitions(officer, query), args.repeat)
+            filtered, _ = _time(lambda: search_petitions(officer, query, {'status': ['SUBMITTED']}), args.repeat)
+            scan, _ = _time(lambda: _scan(query), args.scan_repeat)
+            print(f"{query:26} {count:9d} {fts_p50:8.1f}ms {fts_max:8.1f}ms {filtered:8.1f}ms {scan:8.1f}ms")
+    finally:
+        if not args.keep:
+            Petition.objects.filter(title__startswith=BENCH_PREFIX).delete()
+
+if __name__ == '__main__':
+    main()
@@ -7,18 +7,190 @@ Provides MongoDB client and database access for the application.
 from pymongo import MongoClient
 from pymongo.database import Database
 from pymongo.collection import Collection
+from pymongo.errors import BulkWriteError
+from pymongo import monitoring
 from django.conf import settings
-from typing import Optional
+from typing import Optional, List, Dict, Any
+import asyncio
+import threading
+import time
 import logging
 
 logger = logging.getLogger(__name__)
 
-class MongoDBConnection:
+DEFAULT_BULK_BATCH_SIZE = 1000
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    """Collects connection pool utilization and checkout wait times."""
+    
+    def __init__(self, max_pool_size: int = 0):
+        self._lock = threading.Lock()
+        self._checkout_started: Dict[tuple, float] = {}
+        # PoolCreatedEvent.options only lists non-default options, so the
+        # configured size is passed in rather than read from the event
+        self.max_pool_size = max_pool_size
+        self.open_connections = 0
+        self.checked_out = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self.pool_clears = 0
+    
+    def pool_created(self, event):
+        self.max_pool_size = event.options.get('maxPoolSize') or self.max_pool_size
+    
+    def pool_ready(self, event):
+        pass
+    
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pool_clears += 1
+    
+    def pool_closed(self, event):
+        pass
+    
+    def connection_created(self, event):
+        with self._lock:
+            self.open_connections += 1
+    
+    def connection_ready(self, event):
+        pass
+    
+    def connection_closed(self, event):
+        with self._lock:
+            self.open_connections = max(0, self.open_connections - 1)
+    
+    @staticmethod
+    def _checkout_key(event) -> tuple:
+        """
+        Identify one pending checkout. AsyncMongoClient runs every coroutine
+        on the event-loop thread, so the running task is part of the key.
+        """
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        return (event.address, threading.get_ident(), id(task) if task is not None else None)
+    
+    def connection_check_out_started(self, event):
+        with self._lock:
+            self._checkout_started[self._checkout_key(event)] = time.monotonic()
+    
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self._checkout_started.pop(self._checkout_key(event), None)
+            self.checkout_failures += 1
+    
+    def connection_checked_out(self, event):
+        with self._lock:
+            started = self._checkout_started.pop(self._checkout_key(event), None)
+            if started is not None:
+                wait_ms = (time.monotonic() - started) * 1000
+                self.total_wait_ms += wait_ms
+                self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+            self.checkouts += 1
+            self.checked_out += 1
+    
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out = max(0, self.checked_out - 1)
+    
+    def snapshot(self) -> Dict:
+        """Return a point-in-time copy of the pool metrics."""
+        with self._lock:
+            return {
+                'max_pool_size': self.max_pool_size,
+                'open_connections': self.open_connections,
+                'checked_out': self.checked_out,
+                'utilization': (self.checked_out / self.max_pool_size) if self.max_pool_size else 0.0,
+                'checkouts': self.checkouts,
+                'checkout_failures': self.checkout_failures,
+                'avg_wait_ms': (self.total_wait_ms / self.checkouts) if self.checkouts else 0.0,
+                'max_wait_ms': self.max_wait_ms,
+                'pool_clears': self.pool_clears,
+            }
+
+class CircuitBreakerMixin:
+    """
+    Suspends MongoDB access for a cool-down window after failures.
+    
+    Failed connects open the circuit, and so does losing the writable server
+    on an established client (seen by TopologyAvailabilityListener from
+    pymongo's background monitoring). While open, `db` / `get_collection`
+    return None at once instead of every operation blocking for
+    serverSelectionTimeoutMS.
+    """
+    
+    _failures: int = 0
+    _circuit_open_until: float = 0.0
+    
+    def _circuit_open(self) -> bool:
+        """True while MongoDB access is suspended after repeated failures."""
+        return time.monotonic() < self._circuit_open_until
+    
+    def _record_success(self):
+        if self._failures:
+            logger.info("✅ MongoDB available again, circuit closed")
+        self._failures = 0
+        self._circuit_open_until = 0.0
+    
+    def _record_failure(self, mongo_settings: Dict):
+        """Count a failure and open the circuit once the threshold is hit."""
+        self._failures += 1
+        threshold = mongo_settings.get('circuit_breaker_threshold', 1)
+        if self._failures >= threshold:
+            cooldown = mongo_settings.get('circuit_breaker_cooldown', 30)
+            self._circuit_open_until = time.monotonic() + cooldown
+            logger.warning(f"⚠️ MongoDB circuit open for {cooldown}s after {self._failures} failures")
+
+class TopologyAvailabilityListener(monitoring.TopologyListener, monitoring.ServerHeartbeatListener):
+    """
+    Feeds server availability from pymongo's monitors into a circuit breaker.
+    
+    Losing the last writable server records a failure; each failed heartbeat
+    during the outage records another (keeping the circuit open); a writable
+    server coming back closes the circuit.
+    """
+    
+    def __init__(self, breaker: CircuitBreakerMixin):
+        self._breaker = breaker
+    
+    def opened(self, event):
+        pass
+    
+    def closed(self, event):
+        pass
+    
+    def description_changed(self, event):
+        had_writable = event.previous_description.has_writable_server()
+        has_writable = event.new_description.has_writable_server()
+        if has_writable:
+            self._breaker._record_success()
+        elif had_writable:
+            self._breaker._record_failure(settings.MONGODB_SETTINGS)
+    
+    def started(self, event):
+        pass
+    
+    def succeeded(self, event):
+        pass
+    
+    def failed(self, event):
+        if self._breaker._failures:
+            self._breaker._record_failure(settings.MONGODB_SETTINGS)
+
+def _connection_string(mongo_settings: Dict) -> str:
+    return mongo_settings.get('uri') or f"mongodb://{mongo_settings['host']}:{mongo_settings['port']}"
+
+class MongoDBConnection(CircuitBreakerMixin):
     """Singleton MongoDB connection manager."""
     
     _instance: Optional['MongoDBConnection'] = None
     _client: Optional[MongoClient] = None
     _db: Optional[Database] = None
+    _pool_metrics: Optional[PoolMetricsListener] = None
+    _connect_lock = threading.Lock()
     
     def __new__(cls):
         if cls._instance is None:
@@ -29,34 +201,72 @@ class MongoDBConnection:
         if self._client is None:
             self._connect()
     
+    @staticmethod
+    def _client_options(mongo_settings: Dict) -> Dict:
+        """Build MongoClient keyword options from MONGODB_SETTINGS."""
+        options = {
+            'maxPoolSize': mongo_settings.get('max_pool_size', 100),
+            'minPoolSize': mongo_settings.get('min_pool_size', 0),
+            'maxIdleTimeMS': mongo_settings.get('max_idle_time_ms'),
+            'waitQueueTimeoutMS': mongo_settings.get('wait_queue_timeout_ms'),
+            'serverSelectionTimeoutMS': mongo_settings.get('server_selection_timeout_ms', 5000),
+            'connectTimeoutMS': mongo_settings.get('connect_timeout_ms', 5000),
+            'socketTimeoutMS': mongo_settings.get('socket_timeout_ms'),
+            'readPreference': mongo_settings.get('read_preference', 'primary'),
+        }
+        
+        write_concern = mongo_settings.get('write_concern') or {}
+        if 'w' in write_concern:
+            options['w'] = write_concern['w']
+        if 'wtimeout_ms' in write_concern:
+            options['wTimeoutMS'] = write_concern['wtimeout_ms']
+        if 'journal' in write_concern:
+            options['journal'] = write_concern['journal']
+        
+        return {k: v for k, v in options.items() if v is not None}
+    
     def _connect(self):
-        """Establish MongoDB connection."""
-        try:
-            mongo_settings = settings.MONGODB_SETTINGS
-            connection_string = f"mongodb://{mongo_settings['host']}:{mongo_settings['port']}"
+        """Establish MongoDB connection unless the circuit breaker is open."""
+        if self._circuit_open():
+            return
+        
+        with self._connect_lock:
+            # Another thread may have connected (or tripped the breaker) meanwhile
+            if self._db is not None or self._circuit_open():
+                return
             
-            self._client = MongoClient(
-                connection_string,
-                serverSelectionTimeoutMS=5000,
-                connectTimeoutMS=5000
-            )
-            
-            # Test connection
-            self._client.admin.command('ping')
-            
-            self._db = self._client[mongo_settings['database']]
-            logger.info(f"✅ MongoDB connected: {mongo_settings['database']}")
-            
-        except Exception as e:
-            logger.error(f"❌ MongoDB connection failed: {e}")
-            self._client = None
-            self._db = None
+            mongo_settings = settings.MONGODB_SETTINGS
+            try:
+                options = self._client_options(mongo_settings)
+                self._pool_metrics = PoolMetricsListener(options['maxPoolSize'])
+                self._client = MongoClient(
+                    _connection_string(mongo_settings),
+                    event_listeners=[self._pool_metrics, TopologyAvailabilityListener(self)],
+                    **options
+                )
+                
+                # Test connection
+                self._client.admin.command('ping')
+                
+                self._db = self._client[mongo_settings['database']]
+                self._record_success()
+                logger.info(f"✅ MongoDB connected: {mongo_settings['database']}")
+                
+            except Exception as e:
+                logger.error(f"❌ MongoDB connection failed: {e}")
+                if self._client is not None:
+                    self._client.close()
+                self._client = None
+                self._db = None
+                self._record_failure(mongo_settings)
     
     @property
     def db(self) -> Optional[Database]:
-        """Get database instance."""
+        """Get database instance (None while unavailable or the circuit is open)."""
         if self._db is None:
             self._connect()
+        elif self._circuit_open():
+            return None
         return self._db
     
     @property
@@ -72,6 +282,14 @@ class MongoDBConnection:
             return self.db[name]
         return None
     
+    def get_metrics(self) -> Dict:
+        """Get pool utilization, checkout wait times and circuit breaker state."""
+        metrics = self._pool_metrics.snapshot() if self._pool_metrics else {}
+        metrics['connected'] = self._db is not None
+        metrics['circuit_open'] = self._circuit_open()
+        metrics['consecutive_failures'] = self._failures
+        return metrics
+    
     def close(self):
         """Close MongoDB connection."""
         if self._client:
@@ -80,8 +298,112 @@ class MongoDBConnection:
             self._db = None
             logger.info("MongoDB connection closed")
 
+class AsyncMongoDBConnection(CircuitBreakerMixin):
+    """
+    Singleton async MongoDB connection manager for ASGI deployments.
+    
+    Uses pymongo's AsyncMongoClient. A client is bound to the event loop it
+    was created on, so a new one is opened if the running loop changes.
+    """
+    
+    _instance: Optional['AsyncMongoDBConnection'] = None
+    _client = None
+    _db = None
+    _loop = None
+    _connect_lock: Optional[asyncio.Lock] = None
+    _lock_loop = None
+    _pool_metrics: Optional[PoolMetricsListener] = None
+    
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+    
+    async def _connect(self):
+        """Establish async MongoDB connection unless the circuit breaker is open."""
+        if self._circuit_open():
+            return
+        
+        from pymongo import AsyncMongoClient
+        
+        mongo_settings = settings.MONGODB_SETTINGS
+        try:
+            options = MongoDBConnection._client_options(mongo_settings)
+            self._pool_metrics = PoolMetricsListener(options['maxPoolSize'])
+            self._client = AsyncMongoClient(
+                _connection_string(mongo_settings),
+                event_listeners=[self._pool_metrics, TopologyAvailabilityListener(self)],
+                **options
+            )
+            
+            # Test connection
+            await self._client.admin.command('ping')
+            
+            self._db = self._client[mongo_settings['database']]
+            self._loop = asyncio.get_running_loop()
+            self._record_success()
+            logger.info(f"✅ Async MongoDB connected: {mongo_settings['database']}")
+            
+        except Exception as e:
+            logger.error(f"❌ Async MongoDB connection failed: {e}")
+            self._client = None
+            self._db = None
+            self._loop = None
+            self._record_failure(mongo_settings)
+    
+    async def get_db(self):
+        """Get async database instance."""
+        loop = asyncio.get_running_loop()
+        if self._db is None or self._loop is not loop:
+            if self._lock_loop is not loop:
+                self._connect_lock = asyncio.Lock()
+                self._lock_loop = loop
+            async with self._connect_lock:
+                # Another coroutine may have connected while we waited
+                if self._db is None or self._loop is not loop:
+                    await self._close_stale_client()
+                    await self._connect()
+        elif self._circuit_open():
+            return None
+        return self._db
+    
+    async def _close_stale_client(self):
+        """Close a client left over from a previous event loop before replacing it."""
+        if self._client is None:
+            return
+        stale, self._client, self._db, self._loop = self._client, None, None, None
+        try:
+            await stale.close()
+        except Exception as e:
+            logger.warning(f"⚠️ Could not close async MongoDB client from a previous event loop: {e}")
+    
+    async def get_collection(self, name: str):
+        """Get an async collection by name."""
+        db = await self.get_db()
+        if db is not None:
+            return db[name]
+        return None
+    
+    def get_metrics(self) -> Dict:
+        """Get pool utilization, checkout wait times and circuit breaker state."""
+        metrics = self._pool_metrics.snapshot() if self._pool_metrics else {}
+        metrics['connected'] = self._db is not None
+        metrics['circuit_open'] = self._circuit_open()
+        metrics['consecutive_failures'] = self._failures
+        return metrics
+    
+    async def close(self):
+        """Close async MongoDB connection."""
+        if self._client:
+            await self._client.close()
+            self._client = None
+            self._db = None
+            self._loop = None
+            logger.info("Async MongoDB connection closed")
+
 # Global instance
 mongo_db = MongoDBConnection()
+async_mongo_db = AsyncMongoDBConnection()
 
 def get_mongo_db() -> Optional[Database]:
     """Get MongoDB database instance."""
@@ -90,3 +412,108 @@ def get_mongo_db() -> Optional[Database]:
 def get_collection(name: str) -> Optional[Collection]:
     """Get MongoDB collection."""
     return mongo_db.get_collection(name)
+
+async def get_async_collection(name: str):
+    """Get async MongoDB collection."""
+    return await async_mongo_db.get_collection(name)
+
+def get_mongo_metrics() -> Dict:
+    """Get MongoDB connection pool metrics for the sync and async clients."""
+    metrics = mongo_db.get_metrics()
+    metrics['async'] = async_mongo_db.get_metrics()
+    return metrics
+
+_PROMETHEUS_COUNTERS = ('checkouts', 'checkout_failures', 'pool_clears')
+_PROMETHEUS_GAUGES = (
+    'max_pool_size', 'open_connections', 'checked_out', 'utilization', 'avg_wait_ms', 'max_wait_ms',
+    'connected', 'circuit_open', 'consecutive_failures',
+)
+
+def mongo_metrics_prometheus() -> str:
+    """Pool and circuit breaker metrics in the Prometheus text format (appended to /metrics)."""
+    metrics = get_mongo_metrics()
+    by_client = {'sync': metrics, 'async': metrics.pop('async')}
+    lines = []
+    for key in _PROMETHEUS_COUNTERS + _PROMETHEUS_GAUGES:
+        name = f"mongodb_pool_{key}_total" if key in _PROMETHEUS_COUNTERS else f"mongodb_pool_{key}"
+        lines.append(f"# TYPE {name} {'counter' if key in _PROMETHEUS_COUNTERS else 'gauge'}")
+        for client, values in by_client.items():
+            lines.append(f'{name}{{client="{client}"}} {float(values.get(key, 0)):g}')
+    return "\n".join(lines) + "\n"
+
+def bulk_write_in_batches(collection: Optional[Collection], operations: List[Any],
+                          batch_size: Optional[int] = None) -> Dict:
+    """
+    Execute write operations with unordered ``bulk_write`` batches.
+
+    Args:
+        collection: Target collection
+        operations: pymongo write models (UpdateOne, InsertOne, ...)
+        batch_size: Operations per batch (defaults to MONGODB_SETTINGS['bulk_batch_size'])
+
+    Returns:
+        dict with aggregated counts and a per-batch 'errors' list
+    """
+    summary = {
+        'batches': 0,
+        'inserted': 0,
+        'matched': 0,
+        'modified': 0,
+        'upserted': 0,
+        'deleted': 0,
+        'errors': []
+    }
+
+    if collection is None:
+        logger.error("MongoDB collection not available")
+        summary['errors'].append({'batch': None, 'error': 'MongoDB collection not available'})
+        return summary
+
+    if batch_size is None:
+        batch_size = settings.MONGODB_SETTINGS.get('bulk_batch_size', DEFAULT_BULK_BATCH_SIZE)
+    batch_size = max(1, int(batch_size))
+
+    for start in range(0, len(operations), batch_size):
+        batch = operations[start:start + batch_size]
+        batch_index = summary['batches']
+        summary['batches'] += 1
+
+        try:
+            result = collection.bulk_write(batch, ordered=False)
+            summary['inserted'] += result.inserted_count
+            summary['matched'] += result.matched_count
+            summary['modified'] += result.modified_count
+            summary['upserted'] += result.upserted_count
+            summary['deleted'] += result.deleted_count
+        except BulkWriteError as e:
+            # Unordered batches keep going past failures; count what landed
+            details = e.details
+            summary['inserted'] += details.get('nInserted', 0)
+            summary['matched'] += details.get('nMatched', 0)
+            summary['modified'] += details.get('nModified', 0)
+            summary['upserted'] += details.get('nUpserted', 0)
+            summary['deleted'] += details.get('nRemoved', 0)
+            summary['errors'].append({
+                'batch': batch_index,
+                'offset': start,
+                'error': 'BulkWriteError',
+                'write_errors': [
+                    {
+                        'index': start + err.get('index', 0),
+                        'code': err.get('code'),
+                        'message': err.get('errmsg')
+                    }
+                    for err in details.get('writeErrors', [])
+                ]
+            })
+            logger.error(f"Bulk write batch {batch_index} had {len(details.get('writeErrors', []))} errors")
+        except Exception as e:
+            summary['errors'].append({
+                'batch': batch_index,
+                'offset': start,
+                'error': str(e),
+                'write_errors': []
+            })
+            logger.error(f"Bulk write batch {batch_index} failed: {e}")
+
+    return summary
@@ -73,21 +73,88 @@ TEMPLATES = [
 WSGI_APPLICATION = 'config.wsgi.application'
 
 # Database Configuration
-# Using SQLite for Django internals (sessions, admin, etc.)
-# MongoDB will be used directly via pymongo for application data
+# DB_ENGINE=sqlite (default, small installs) or postgresql (production).
+# MongoDB is used directly via pymongo for application data.
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite').lower()
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+if DB_ENGINE in ('postgres', 'postgresql'):
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'petitions'),
+            'USER': os.environ.get('DB_USER', 'postgres'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            # Persistent connections, re-validated before reuse after errors / restarts
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT', 5)),
+            },
+        }
+    }
+    if os.environ.get('DB_POOL', 'False') == 'True':
+        # In-process psycopg pool (needs psycopg[pool]); replaces persistent
+        # connections, so CONN_MAX_AGE must be 0. Size max_size >= server threads.
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+            'timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        }
+    if os.environ.get('DB_PGBOUNCER', 'False') == 'True':
+        # Transaction-pooling PgBouncer: server-side cursors do not survive
+        # across transactions, so iterator() must not use them
+        DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                # WAL lets readers proceed during a write; writers wait up to
+                # `timeout` seconds for the lock instead of failing with
+                # "database is locked"
+                'init_command': (
+                    'PRAGMA journal_mode=WAL;'
+                    'PRAGMA synchronous=NORMAL;'
+                    'PRAGMA cache_size=-20000;'
+                ),
+                'timeout': int(os.environ.get('DB_BUSY_TIMEOUT', 20)),
+                # Take the write lock at BEGIN, so concurrent transactions queue
+                # on the busy timeout instead of deadlocking on lock upgrade
+                'transaction_mode': 'IMMEDIATE',
+            },
+        }
     }
-}
 
 # MongoDB Configuration (accessed via pymongo directly)
 MONGODB_SETTINGS = {
-    'host': 'localhost',
-    'port': 27017,
-    'database': 'regiflow_db'
+    'uri': os.environ.get('MONGODB_URI'),
+    'host': os.environ.get('MONGODB_HOST', 'localhost'),
+    'port': int(os.environ.get('MONGODB_PORT', 27017)),
+    'database': os.environ.get('MONGODB_DATABASE', 'regiflow_db'),
+    'bulk_batch_size': int(os.environ.get('MONGODB_BULK_BATCH_SIZE', 1000)),
+    # Remarks kept inline on a petition; full history lives in `petition_remarks`
+    'inline_remarks_limit': int(os.environ.get('MONGODB_INLINE_REMARKS_LIMIT', 20)),
+    # Connection pool
+    'max_pool_size': int(os.environ.get('MONGODB_MAX_POOL_SIZE', 100)),
+    'min_pool_size': int(os.environ.get('MONGODB_MIN_POOL_SIZE', 0)),
+    'max_idle_time_ms': 60000,
+    'wait_queue_timeout_ms': 2000,
+    # Timeouts
+    'server_selection_timeout_ms': int(os.environ.get('MONGODB_SERVER_SELECTION_TIMEOUT_MS', 5000)),
+    'connect_timeout_ms': 5000,
+    'socket_timeout_ms': 10000,
+    # Read preference / write concern
+    'read_preference': os.environ.get('MONGODB_READ_PREFERENCE', 'primary'),
+    'write_concern': {'w': 1},
+    # Suspend MongoDB access for `circuit_breaker_cooldown` seconds after
+    # `circuit_breaker_threshold` consecutive failed connects, or once the
+    # server stops answering heartbeats on an open connection
+    'circuit_breaker_threshold': 1,
+    'circuit_breaker_cooldown': int(os.environ.get('MONGODB_CIRCUIT_COOLDOWN', 30)),
 }
 
 AUTH_USER_MODEL = 'users.User'
@@ -135,6 +202,43 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ],
+    # Token bucket rates for ai_agent.throttling: capacity / refill period
+    'DEFAULT_THROTTLE_RATES': {
+        'ai_chat': os.environ.get('AI_CHAT_RATE', '20/min'),          # per user
+        'ai_chat_global': os.environ.get('AI_CHAT_GLOBAL_RATE', '600/min'),  # all users
+    },
+}
+
+# Cache (throttle buckets etc.): set REDIS_CACHE_URL to share across processes
+if os.environ.get('REDIS_CACHE_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_CACHE_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# ChromaDB duplicate index shared by web, Celery and management commands.
+# Set CHROMA_HOST to use a Chroma server (needed with workers on several
+# hosts); otherwise every process on this host opens the same on-disk store.
+VECTOR_INDEX = {
+    'host': os.environ.get('CHROMA_HOST', ''),
+    'port': int(os.environ.get('CHROMA_PORT', 8000)),
+    'path': os.environ.get('CHROMA_PATH', str(BASE_DIR / 'chroma_data')),
+    'collection': 'petitions',
+}
+
+# Cap on concurrent outbound Gemini calls per process
+AI_CONCURRENCY = {
+    'max_concurrent_calls': int(os.environ.get('AI_MAX_CONCURRENT_CALLS', 8)),
+    'acquire_timeout': 2.0,  # seconds to wait for a free slot
+    'retry_after': 5,        # Retry-After seconds when no slot frees up
 }
 
 # JWT Configuration
@@ -157,8 +261,157 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'petitions.tasks.check_sla_violations',
         'schedule': 3600.0,  # Run every hour
     },
+    'cleanup-stale-uploads-hourly': {
+        'task': 'petitions.tasks.cleanup_stale_uploads',
+        'schedule': 3600.0,
+    },
+    'gc-content-storage-daily': {
+        'task': 'petitions.tasks.gc_content_storage',
+        'schedule': 86400.0,
+    },
+    'sequence-petition-events-every-minute': {
+        'task': 'petitions.tasks.sequence_petition_events',
+        'schedule': 60.0,
+    },
+    'purge-chat-sessions-daily': {
+        'task': 'ai_agent.tasks.purge_chat_sessions',
+        'schedule': 86400.0,
+    },
+    'purge-petition-events-daily': {
+        'task': 'petitions.tasks.purge_petition_events',
+        'schedule': 86400.0,
+    },
+}
+
+# Attachment image variants built by petitions.tasks.process_attachment
+ATTACHMENT_IMAGES = {
+    'variants': {
+        'thumbnail': {'max_size': (320, 320), 'quality': 70},
+        'web': {'max_size': (1600, 1600), 'quality': 80},
+    },
+    'format': 'WEBP',
+}
+
+# Document text extraction for duplicate detection (petitions.extraction).
+# Runs in its own queue: celery -A config worker -Q documents --concurrency 2
+DOCUMENT_EXTRACTION = {
+    'time_limit_seconds': int(os.environ.get('DOCUMENT_EXTRACTION_TIME_LIMIT', 30)),  # per document
+    'max_pages': 50,
+    'max_chars': 100_000,
+    'chunk_chars': 1000,
+    'chunk_overlap': 150,
+    'max_chunks': 40,
+}
+CELERY_TASK_ROUTES = {
+    'petitions.tasks.index_document_text': {'queue': 'documents'},
+}
+
+# Cached petition list / detail / audit-log payloads with ETag revalidation
+# (petitions.response_cache). Only active with a shared cache (REDIS_CACHE_URL):
+# Celery and management commands invalidate from other processes
+RESPONSE_CACHE = {
+    'enabled': os.environ.get('RESPONSE_CACHE_ENABLED', 'True') == 'True',
+    'timeout': int(os.environ.get('RESPONSE_CACHE_TIMEOUT', 600)),
 }
 
+# Petition change events: /api/petitions/changes/ catch-up feed and WebSocket
+# push (ws://<asgi host>/ws/petitions/). Set REDIS_PUBSUB_URL when the API and
+# the ASGI server run in separate processes.
+PETITION_EVENTS = {
+    'redis_url': os.environ.get('REDIS_PUBSUB_URL', os.environ.get('REDIS_CACHE_URL', '')),
+    'channel': 'petitions:events',
+    'retention_days': int(os.environ.get('PETITION_EVENTS_RETENTION_DAYS', 7)),
+}
+
+# Hybrid similar-petition search (petitions.similar): reciprocal rank fusion
+# of vector and keyword rankings within a latency budget
+SIMILAR_SEARCH = {
+    'rrf_k': 60,
+    'candidates': 100,
+    'latency_budget_ms': int(os.environ.get('SIMILAR_SEARCH_BUDGET_MS', 1500)),
+    'min_similarity': 0.5,
+}
+
+# Chunked uploads (petitions.uploads)
+UPLOADS = {
+    'staging_dir': os.path.join(MEDIA_ROOT, 'upload_staging'),
+    'max_chunk_size': int(os.environ.get('UPLOAD_MAX_CHUNK_SIZE', 5 * 1024 * 1024)),
+    'max_file_size': int(os.environ.get('UPLOAD_MAX_FILE_SIZE', 25 * 1024 * 1024)),
+    'max_files_per_petition': 10,
+    'max_total_size': int(os.environ.get('UPLOAD_MAX_TOTAL_SIZE', 50 * 1024 * 1024)),  # per petition
+    'max_pending_uploads': 10,                                                         # per user
+    'max_pending_bytes': int(os.environ.get('UPLOAD_MAX_PENDING_BYTES', 200 * 1024 * 1024)),
+    'session_ttl_hours': 24,
+    'unattached_blob_ttl_hours': 72,   # completed uploads never attached to anything
+}
+
+# Protected media (petitions.media_views): signed URL lifetime and web server offload.
+# With MEDIA_ACCEL=nginx, map an internal location onto MEDIA_ROOT:
+#   location /protected-media/ { internal; alias /path/to/backend/media/; }
+MEDIA_SERVING = {
+    'url_ttl_seconds': int(os.environ.get('MEDIA_URL_TTL_SECONDS', 3600)),
+    'accel': os.environ.get('MEDIA_ACCEL', ''),    # '', 'nginx' (X-Accel-Redirect) or 'apache' (X-Sendfile)
+    'accel_prefix': os.environ.get('MEDIA_ACCEL_PREFIX', '/protected-media/'),
+}
+
+# Chatbot sessions: bounded server-side context per conversation
+CHATBOT_SESSION = {
+    'max_messages': 10,            # ring buffer of recent messages
+    'history_token_budget': 1000,  # approx tokens of recent messages kept verbatim
+    'summary_token_budget': 250,   # approx tokens of summarized older turns
+    'summary_line_chars': 120,
+    'retention_days': int(os.environ.get('CHAT_SESSION_RETENTION_DAYS', 30)),
+}
+
+# Chatbot intent router: FAQ matches below this confidence go to the LLM
+CHATBOT_INTENT_THRESHOLD = 0.5
+
+# Chatbot semantic response cache (context-free questions only)
+CHATBOT_SEMANTIC_CACHE = {
+    'enabled': os.environ.get('CHATBOT_CACHE_ENABLED', 'True') == 'True',
+    'similarity_threshold': 0.92,
+    'max_entries': 1000,
+    'ttl_seconds': 24 * 3600,
+}
+
+# Deadlines, retries and circuit breaking for Gemini calls (ai_agent.resilience)
+AI_RESILIENCE = {
+    'deadline_seconds': 15.0,
+    'deadlines': {'chatbot': 30.0, 'chatbot_stream': 60.0},
+    'max_attempts': 3,
+    'backoff_base': 0.5,
+    'backoff_max': 4.0,
+    'breaker_window': 20,
+    'breaker_min_calls': 5,
+    'breaker_failure_rate': 0.5,
+    'breaker_cooldown': 30.0,
+}
+
+# Local keyword triage (ai_agent.heuristics): results at or above these
+# confidences are used without calling Gemini
+AI_TRIAGE_HEURISTICS = {
+    'department_confidence': 0.6,
+    'urgency_confidence': 0.8,
+}
+
+# AI usage accounting (ai_agent.usage): daily ModelUsage rows for cost reports,
+# buffered per process and flushed every `flush_interval` seconds
+AI_USAGE = {
+    'persist': os.environ.get('AI_USAGE_PERSIST', 'True') == 'True',
+    'flush_interval': int(os.environ.get('AI_USAGE_FLUSH_INTERVAL', 30)),
+}
+
+# USD per 1M tokens, used by `manage.py ai_cost_report`
+AI_MODEL_PRICING = {
+    'gemini-2.0-flash': {'input': 0.10, 'output': 0.40},
+    'embedding-001': {'input': 0.0, 'output': 0.0},
+}
+
+# /metrics access: scrapers send METRICS_AUTH_TOKEN as a Bearer token; without
+# a token only these addresses and logged-in admins may read it
+METRICS_AUTH_TOKEN = os.environ.get('METRICS_AUTH_TOKEN', '')
+METRICS_ALLOWED_IPS = [ip.strip() for ip in os.environ.get('METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',') if ip.strip()]
+
 # Email Configuration (Console backend for development)
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 DEFAULT_FROM_EMAIL = 'noreply@aipetition.gov'
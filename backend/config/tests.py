@@ -0,0 +1,155 @@
+import asyncio
+import os
+import runpy
+from types import SimpleNamespace
+from unittest import mock
+from django.test import SimpleTestCase, override_settings
+from config.mongodb import (
+    AsyncMongoDBConnection, CircuitBreakerMixin, MongoDBConnection, PoolMetricsListener,
+    TopologyAvailabilityListener,
+)
+
+
+class PoolMetricsListenerTests(SimpleTestCase):
+    event = SimpleNamespace(address=('localhost', 27017))
+
+    def test_concurrent_async_checkouts_keep_their_own_start_time(self):
+        listener = PoolMetricsListener(max_pool_size=1)
+
+        async def checkout(wait):
+            listener.connection_check_out_started(self.event)
+            await asyncio.sleep(wait)
+            listener.connection_checked_out(self.event)
+
+        async def run():
+            # Both tasks share the event-loop thread; the slow one starts first
+            await asyncio.gather(checkout(0.2), checkout(0.01))
+
+        asyncio.run(run())
+        snapshot = listener.snapshot()
+        self.assertEqual(snapshot['checkouts'], 2)
+        self.assertGreaterEqual(snapshot['max_wait_ms'], 190)
+        self.assertLess(snapshot['avg_wait_ms'], 150)
+
+    def test_failed_checkout_clears_pending_start(self):
+        listener = PoolMetricsListener(max_pool_size=1)
+        listener.connection_check_out_started(self.event)
+        listener.connection_check_out_failed(self.event)
+        self.assertEqual(listener._checkout_started, {})
+        self.assertEqual(listener.snapshot()['checkout_failures'], 1)
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    mongo_settings = {'circuit_breaker_threshold': 2, 'circuit_breaker_cooldown': 30}
+
+    def _topology_change(self, had_writable, has_writable):
+        return SimpleNamespace(
+            previous_description=mock.Mock(has_writable_server=mock.Mock(return_value=had_writable)),
+            new_description=mock.Mock(has_writable_server=mock.Mock(return_value=has_writable)),
+        )
+
+    def test_opens_at_threshold_and_closes_on_success(self):
+        breaker = CircuitBreakerMixin()
+        breaker._record_failure(self.mongo_settings)
+        self.assertFalse(breaker._circuit_open())
+        breaker._record_failure(self.mongo_settings)
+        self.assertTrue(breaker._circuit_open())
+        breaker._record_success()
+        self.assertFalse(breaker._circuit_open())
+
+    def test_losing_the_writable_server_opens_the_circuit(self):
+        breaker = CircuitBreakerMixin()
+        listener = TopologyAvailabilityListener(breaker)
+        with override_settings(MONGODB_SETTINGS={'circuit_breaker_threshold': 1}):
+            listener.description_changed(self._topology_change(True, False))
+            self.assertTrue(breaker._circuit_open())
+            listener.description_changed(self._topology_change(False, True))
+        self.assertFalse(breaker._circuit_open())
+
+    def test_heartbeats_only_count_during_an_outage(self):
+        breaker = CircuitBreakerMixin()
+        listener = TopologyAvailabilityListener(breaker)
+        with override_settings(MONGODB_SETTINGS=self.mongo_settings):
+            listener.failed(None)
+            self.assertEqual(breaker._failures, 0)
+            breaker._record_failure(self.mongo_settings)
+            listener.failed(None)
+        self.assertTrue(breaker._circuit_open())
+
+    def test_client_options_map_pool_and_write_concern_settings(self):
+        options = MongoDBConnection._client_options({
+            'max_pool_size': 20, 'wait_queue_timeout_ms': 500, 'write_concern': {'w': 'majority', 'wtimeout_ms': 1000},
+        })
+        self.assertEqual(options['maxPoolSize'], 20)
+        self.assertEqual(options['waitQueueTimeoutMS'], 500)
+        self.assertEqual((options['w'], options['wTimeoutMS']), ('majority', 1000))
+        self.assertNotIn('socketTimeoutMS', options)
+
+
+class AsyncMongoDBConnectionTests(SimpleTestCase):
+    def setUp(self):
+        # A fresh singleton whose class state does not leak into other tests
+        class Connection(AsyncMongoDBConnection):
+            _instance = None
+        self.connection = Connection()
+        self.clients = []
+
+        async def connect():
+            client = mock.MagicMock(close=mock.AsyncMock())
+            self.clients.append(client)
+            self.connection._client = client
+            self.connection._db = client.db
+            self.connection._loop = asyncio.get_running_loop()
+
+        patcher = mock.patch.object(self.connection, '_connect', side_effect=connect)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_client_is_reused_within_a_loop(self):
+        async def run():
+            return await self.connection.get_db(), await self.connection.get_db()
+
+        first, second = asyncio.run(run())
+        self.assertIs(first, second)
+        self.assertEqual(len(self.clients), 1)
+
+    def test_new_loop_closes_the_stale_client(self):
+        first = asyncio.run(self.connection.get_db())
+        second = asyncio.run(self.connection.get_db())
+        self.assertIsNot(first, second)
+        self.clients[0].close.assert_awaited_once()
+        self.clients[1].close.assert_not_awaited()
+
+    def test_concurrent_callers_share_one_connect(self):
+        async def run():
+            return await asyncio.gather(*[self.connection.get_db() for _ in range(5)])
+
+        self.assertEqual(len(set(map(id, asyncio.run(run())))), 1)
+        self.assertEqual(len(self.clients), 1)
+
+
+class DatabaseSettingsTests(SimpleTestCase):
+    settings_path = os.path.join(os.path.dirname(__file__), 'settings.py')
+
+    def _databases(self, **env):
+        with mock.patch.dict(os.environ, env), mock.patch('dotenv.load_dotenv'):
+            return runpy.run_path(self.settings_path)['DATABASES']['default']
+
+    def test_sqlite_uses_wal_and_immediate_transactions(self):
+        database = self._databases(DB_ENGINE='sqlite', DB_BUSY_TIMEOUT='7')
+        self.assertIn('PRAGMA journal_mode=WAL;', database['OPTIONS']['init_command'])
+        self.assertEqual(database['OPTIONS']['transaction_mode'], 'IMMEDIATE')
+        self.assertEqual(database['OPTIONS']['timeout'], 7)
+
+    def test_postgresql_keeps_persistent_checked_connections(self):
+        database = self._databases(DB_ENGINE='postgresql', DB_NAME='grievances', DB_CONN_MAX_AGE='120', DB_POOL='False')
+        self.assertEqual(database['ENGINE'], 'django.db.backends.postgresql')
+        self.assertEqual((database['NAME'], database['CONN_MAX_AGE']), ('grievances', 120))
+        self.assertTrue(database['CONN_HEALTH_CHECKS'])
+        self.assertNotIn('pool', database['OPTIONS'])
+
+    def test_postgresql_pool_replaces_persistent_connections(self):
+        database = self._databases(DB_ENGINE='postgres', DB_POOL='True', DB_POOL_MAX_SIZE='20', DB_PGBOUNCER='True')
+        self.assertEqual(database['CONN_MAX_AGE'], 0)
+        self.assertEqual(database['OPTIONS']['pool']['max_size'], 20)
+        self.assertTrue(database['DISABLE_SERVER_SIDE_CURSORS'])
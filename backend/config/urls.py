@@ -15,17 +15,16 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
+from ai_agent.views import prometheus_metrics
+from petitions.media_views import serve_media
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', prometheus_metrics, name='prometheus-metrics'),
     path('api/users/', include('users.urls')),
     path('api/', include('petitions.urls')),
     path('api/ai/', include('ai_agent.urls')),
+    # Uploaded files: permission-checked in every environment (not static())
+    re_path(r'^media/(?P<path>.+)$', serve_media, name='protected-media'),
 ]
-
-from django.conf import settings
-from django.conf.urls.static import static
-
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
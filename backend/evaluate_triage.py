@@ -0,0 +1,108 @@
+"""
+Heuristic Triage Evaluation
+
+Runs the local department/urgency classifier (ai_agent.heuristics) against
+labeled samples and reports accuracy, accuracy of the confident (pre-filter)
+subset and per-call latency:
+- ai_agent/triage_samples.json: the samples the lexicons were tuned on
+- ai_agent/triage_holdout.json: held-out petitions, not used for tuning;
+  confident accuracy here is what pre-filtering costs in wrong labels
+
+The classifier has no Django or network dependencies, so this runs without
+a database or API key.
+
+Usage:
+    python evaluate_triage.py
+    python evaluate_triage.py --samples path/to/samples.json --repeat 200 --verbose
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ai_agent.heuristics import classify_department_local, predict_urgency_local, DEFAULT_PREFILTER_CONFIDENCE
+
+DEFAULT_SAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ai_agent', 'triage_samples.json')
+HOLDOUT_SAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ai_agent', 'triage_holdout.json')
+
+def evaluate(samples, classify, label_key, threshold):
+    correct, confident, confident_correct, misses = 0, 0, 0, []
+    for sample in samples:
+        predicted, confidence = classify(sample['title'], sample['description'])
+        hit = predicted == sample[label_key]
+        correct += hit
+        if confidence >= threshold:
+            confident += 1
+            confident_correct += hit
+        if not hit:
+            misses.append((sample['title'], sample[label_key], predicted, confidence))
+    return {
+        'accuracy': correct / len(samples),
+        'coverage': confident / len(samples),
+        'confident_accuracy': confident_correct / confident if confident else 0.0,
+        'misses': misses,
+    }
+
+def measure_latency(samples, repeat):
+    """Per-petition latency (both classifiers) in microseconds."""
+    timings = []
+    for _ in range(repeat):
+        for sample in samples:
+            started = time.perf_counter()
+            classify_department_local(sample['title'], sample['description'])
+            predict_urgency_local(sample['title'], sample['description'])
+            timings.append((time.perf_counter() - started) * 1_000_000)
+    timings.sort()
+    return {
+        'mean': statistics.mean(timings),
+        'p95': timings[int(len(timings) * 0.95) - 1],
+        'max': timings[-1],
+    }
+
+def report(label, samples, threshold_override, verbose):
+    print("=" * 60)
+    print(f"Heuristic triage evaluation: {label} ({len(samples)} samples)")
+    print("=" * 60)
+
+    for name, classify, label_key in (
+        ('Department', classify_department_local, 'department'),
+        ('Urgency', predict_urgency_local, 'urgency'),
+    ):
+        threshold = threshold_override if threshold_override is not None else DEFAULT_PREFILTER_CONFIDENCE[label_key]
+        result = evaluate(samples, classify, label_key, threshold)
+        print(f"\n{name}:")
+        print(f"  Accuracy:                 {result['accuracy']:.1%}")
+        print(f"  Confident (>= {threshold}):       {result['coverage']:.1%} of samples")
+        print(f"  Accuracy when confident:  {result['confident_accuracy']:.1%}")
+        if verbose:
+            for title, expected, predicted, confidence in result['misses']:
+                print(f"    ✗ {title!r}: expected {expected}, got {predicted} ({confidence})")
+    print()
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the local heuristic triage classifier")
+    parser.add_argument('--samples', default=None, help="Labeled samples JSON file (default: tuning and held-out sets)")
+    parser.add_argument('--repeat', type=int, default=100, help="Latency measurement passes over the samples")
+    parser.add_argument('--threshold', type=float, default=None, help="Pre-filter confidence threshold (default: per-feature)")
+    parser.add_argument('--verbose', action='store_true', help="List misclassified samples")
+    args = parser.parse_args()
+
+    sets = [(args.samples, args.samples)] if args.samples else [('tuning', DEFAULT_SAMPLES), ('held-out', HOLDOUT_SAMPLES)]
+    all_samples = []
+    for label, path in sets:
+        with open(path) as f:
+            samples = json.load(f)
+        report(label, samples, args.threshold, args.verbose)
+        all_samples.extend(samples)
+
+    latency = measure_latency(all_samples, args.repeat)
+    print(f"Latency per petition (department + urgency):")
+    print(f"  mean {latency['mean']:.1f}µs   p95 {latency['p95']:.1f}µs   max {latency['max']:.1f}µs")
+
+if __name__ == '__main__':
+    main()
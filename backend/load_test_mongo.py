@@ -0,0 +1,113 @@
+"""
+MongoDB Load Test: sync WSGI vs async ASGI
+
+Compares requests/sec of the MongoDB list and stats endpoints served by
+Waitress (sync views) and Uvicorn (async views).
+
+Usage:
+    1. Start a local MongoDB (e.g. `docker run -p 27017:27017 mongo`)
+    2. python load_test_mongo.py --seed 5000      # fill the stand-in DB
+    3. python run_waitress.py                     # WSGI on :8000
+    4. python run_asgi.py                         # ASGI on :8001
+    5. python load_test_mongo.py --username <user> --password <pass>
+"""
+
+import argparse
+import os
+import sys
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import requests
+
+WSGI_URL = "http://localhost:8000/api"
+ASGI_URL = "http://localhost:8001/api"
+
+TARGETS = [
+    ("WSGI sync  list ", WSGI_URL, "/mongo/petitions/"),
+    ("ASGI async list ", ASGI_URL, "/async/mongo/petitions/"),
+    ("WSGI sync  stats", WSGI_URL, "/mongo/petitions/stats/"),
+    ("ASGI async stats", ASGI_URL, "/async/mongo/petitions/stats/"),
+]
+
+def seed(count):
+    """Insert `count` synthetic petitions into the local MongoDB."""
+    import django
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    django.setup()
+
+    from petitions.mongo_repository import PetitionRepository
+
+    statuses = ['SUBMITTED', 'ASSIGNED', 'IN_PROGRESS', 'RESOLVED']
+    urgencies = ['LOW', 'MEDIUM', 'HIGH', 'CRITICAL']
+    petitions = [
+        {
+            'petition_id': 1_000_000 + i,
+            'title': f'Load test petition {i}',
+            'description': 'Synthetic petition for load testing.',
+            'citizen_id': str(i % 50),
+            'citizen_username': f'citizen{i % 50}',
+            'department': 'General',
+            'status': statuses[i % len(statuses)],
+            'urgency': urgencies[i % len(urgencies)],
+            'is_duplicate': False,
+            'attachments': [],
+        }
+        for i in range(count)
+    ]
+    result = PetitionRepository.bulk_upsert_petitions(petitions)
+    print(f"Seeded {count} petitions: {result}")
+
+def run_target(url, headers, concurrency, duration):
+    """Hammer `url` from `concurrency` threads for `duration` seconds."""
+    deadline = time.perf_counter() + duration
+    counts = {'ok': 0, 'failed': 0}
+    lock = threading.Lock()
+
+    def worker():
+        session = requests.Session()
+        while time.perf_counter() < deadline:
+            try:
+                ok = session.get(url, headers=headers, timeout=30).status_code == 200
+            except requests.RequestException:
+                ok = False
+            with lock:
+                counts['ok' if ok else 'failed'] += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(worker)
+    elapsed = time.perf_counter() - started
+    return counts['ok'] / elapsed, counts['failed']
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seed', type=int, help='Seed N petitions into MongoDB and exit')
+    parser.add_argument('--username')
+    parser.add_argument('--password')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=15.0)
+    args = parser.parse_args()
+
+    if args.seed:
+        seed(args.seed)
+        return
+
+    resp = requests.post(f"{WSGI_URL}/users/login/", json={
+        'username': args.username,
+        'password': args.password,
+    })
+    resp.raise_for_status()
+    headers = {'Authorization': f"Bearer {resp.json()['access']}"}
+
+    print("=" * 60)
+    print(f"MONGODB LOAD TEST ({args.concurrency} clients, {args.duration:.0f}s each)")
+    print("=" * 60)
+    for label, base, path in TARGETS:
+        rps, failed = run_target(base + path, headers, args.concurrency, args.duration)
+        print(f"{label}: {rps:8.1f} req/s  ({failed} failed)")
+
+if __name__ == '__main__':
+    main()
@@ -4,7 +4,9 @@ Audit Logging Utilities
 Track all actions performed on petitions for compliance and transparency.
 """
 
+from django.db import transaction
 from petitions.models import AuditLog
+from petitions.response_cache import invalidate_petitions
 import logging
 
 logger = logging.getLogger(__name__)
@@ -25,15 +27,18 @@ def log_action(petition, user, action, old_value="", new_value="", remarks=""):
         AuditLog instance
     """
     try:
-        audit_entry = AuditLog.objects.create(
-            petition=petition,
-            user=user,
-            action=action,
-            old_value=str(old_value),
-            new_value=str(new_value),
-            remarks=remarks
-        )
+        # Savepoint: a failed insert must not break the caller's transaction
+        with transaction.atomic():
+            audit_entry = AuditLog.objects.create(
+                petition=petition,
+                user=user,
+                action=action,
+                old_value=str(old_value),
+                new_value=str(new_value),
+                remarks=remarks
+            )
         
+        invalidate_petitions(petition.id)
         logger.info(f"📝 Audit log created: {action} on Petition #{petition.id} by {user.username}")
         return audit_entry
         
@@ -82,6 +87,40 @@ def log_document_upload(petition, user, document_type, filename):
         remarks=f"Document uploaded by {user.role}"
     )
 
+def log_retriage_bulk(changes, user=None, remarks="Re-triaged by batch job"):
+    """
+    Log department/urgency re-classification for many petitions at once.
+    
+    Args:
+        changes: Iterable of (petition, old_value, new_value) tuples
+        user: User who ran the re-triage (None for system jobs)
+        remarks: Note stored on every entry
+    
+    Returns:
+        Number of audit entries created
+    """
+    entries = [
+        AuditLog(
+            petition=petition,
+            user=user,
+            action=AuditLog.Action.UPDATED,
+            old_value=str(old_value),
+            new_value=str(new_value),
+            remarks=remarks
+        )
+        for petition, old_value, new_value in changes
+    ]
+    # The petitions themselves were changed by the caller either way
+    invalidate_petitions(*{entry.petition_id for entry in entries})
+    try:
+        # Savepoint so a failure here doesn't break the caller's transaction
+        with transaction.atomic():
+            AuditLog.objects.bulk_create(entries)
+        return len(entries)
+    except Exception as e:
+        logger.error(f"Failed to create re-triage audit logs: {e}")
+        return 0
+
 def get_petition_audit_trail(petition):
     """Get complete audit trail for a petition."""
     return AuditLog.objects.filter(petition=petition).select_related('user')
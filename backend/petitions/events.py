@@ -0,0 +1,216 @@
+"""
+Petition Change Events
+
+Every petition create, status change, assignment and deletion is written to
+PetitionEvent (the catch-up feed behind /api/petitions/changes/?since=) and,
+after commit, published for the WebSocket push channel (petitions.realtime):
+- with PETITION_EVENTS['redis_url'] set, to a Redis pub/sub channel that
+  every ASGI process subscribes to once and fans out to its connections
+- otherwise to the in-process hub, which only reaches WebSocket clients of
+  the same process (single-process development setups)
+
+Cursors are event sequences, not ids. Ids are allocated at insert time, and
+concurrent transactions can commit a lower id after a higher one was already
+delivered. Sequences are handed out after commit under a row lock on
+PetitionEventCounter, so they are dense and follow commit order: once a
+client has seen sequence N, every event up to N is committed and readable.
+Events whose post-commit step never ran (process died) are sequenced by the
+sequence_petition_events task.
+
+Visibility follows the petition list (PetitionViewSet.get_queryset):
+citizens see their own petitions, officers and admins see everything.
+"""
+
+import json
+import threading
+from datetime import timedelta
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from .models import PetitionEvent, PetitionEventCounter
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PETITION_EVENTS = {
+    'redis_url': '',
+    'channel': 'petitions:events',
+    'retention_days': 7,
+    'replay_limit': 500,        # events per catch-up request
+    'queue_size': 200,          # per WebSocket connection before a resync is forced
+    'sequence_grace_seconds': 30,   # unsequenced events older than this are swept
+}
+
+def events_settings():
+    return {**DEFAULT_PETITION_EVENTS, **getattr(settings, 'PETITION_EVENTS', {})}
+
+def viewer_scope(user):
+    """What a user may see: {'citizen_id'} or {} for everything."""
+    if user.role == 'CITIZEN':
+        return {'citizen_id': user.id}
+    return {}
+
+def event_visible(scope, event):
+    if 'citizen_id' in scope:
+        return event['citizen_id'] == scope['citizen_id']
+    return True
+
+def _scope_q(scope):
+    if 'citizen_id' in scope:
+        return Q(citizen_id=scope['citizen_id'])
+    return Q()
+
+def petition_delta(petition):
+    """Petition fields dashboards render, as sent in events."""
+    return {
+        'id': petition.id,
+        'title': petition.title,
+        'description': petition.description,
+        'status': petition.status,
+        'urgency': petition.urgency,
+        'department': petition.department_id,
+        'department_name': petition.department.name if petition.department_id else None,
+        'citizen_username': petition.citizen.username,
+        'assigned_officer': petition.assigned_officer_id,
+        'assigned_officer_username': petition.assigned_officer.username if petition.assigned_officer_id else None,
+        'is_duplicate': petition.is_duplicate,
+        'created_at': petition.created_at,
+        'updated_at': petition.updated_at,
+    }
+
+def serialize_event(event):
+    return {
+        'id': event.sequence,
+        'type': event.type,
+        'petition_id': event.petition_id,
+        'citizen_id': event.citizen_id,
+        'department_id': event.department_id,
+        'officer_id': event.officer_id,
+        'petition': event.data,
+        'created_at': event.created_at,
+    }
+
+_redis_client = None
+_redis_lock = threading.Lock()
+
+def _redis(url):
+    global _redis_client
+    with _redis_lock:
+        if _redis_client is None:
+            import redis
+            _redis_client = redis.Redis.from_url(url, socket_timeout=2, socket_connect_timeout=2)
+        return _redis_client
+
+def _publish(payload):
+    config = events_settings()
+    message = json.dumps(payload, cls=DjangoJSONEncoder)
+    try:
+        if config['redis_url']:
+            _redis(config['redis_url']).publish(config['channel'], message)
+        else:
+            from petitions.realtime import hub
+            hub.publish_local(json.loads(message))
+    except Exception as e:
+        # Clients catch up through /changes/ on their next reconnect
+        logger.warning(f"⚠️ Could not publish petition event {payload['id']}: {e}")
+
+def _sequence_and_publish(event_ids):
+    """Number committed events in commit order, then publish them."""
+    try:
+        with transaction.atomic():
+            # Held until commit: the next caller numbers after this commit
+            counter = PetitionEventCounter.objects.select_for_update().get(pk=1)
+            events = list(PetitionEvent.objects.filter(id__in=event_ids, sequence__isnull=True).order_by('id'))
+            for event in events:
+                counter.value += 1
+                event.sequence = counter.value
+            PetitionEvent.objects.bulk_update(events, ['sequence'])
+            counter.save(update_fields=['value'])
+    except Exception as e:
+        # sequence_pending_events() picks these up
+        logger.warning(f"⚠️ Could not sequence petition events {list(event_ids)}: {e}")
+        return 0
+    for event in events:
+        _publish(serialize_event(event))
+    return len(events)
+
+def record_event(petition, event_type):
+    """Store a petition event; it is sequenced and published once the transaction commits."""
+    data = {'id': petition.id} if event_type == PetitionEvent.Type.DELETED else petition_delta(petition)
+    try:
+        with transaction.atomic():
+            event = PetitionEvent.objects.create(
+                petition_id=petition.id,
+                citizen_id=petition.citizen_id,
+                department_id=petition.department_id,
+                officer_id=petition.assigned_officer_id,
+                type=event_type,
+                data=data,
+            )
+    except Exception as e:
+        logger.error(f"Failed to record petition event: {e}")
+        return None
+    transaction.on_commit(lambda: _sequence_and_publish([event.id]))
+    return event
+
+def sequence_pending_events():
+    """Sequence and publish committed events whose post-commit step never ran."""
+    cutoff = timezone.now() - timedelta(seconds=events_settings()['sequence_grace_seconds'])
+    pending = list(
+        PetitionEvent.objects.filter(sequence__isnull=True, created_at__lt=cutoff)
+        .order_by('id').values_list('id', flat=True)
+    )
+    return _sequence_and_publish(pending) if pending else 0
+
+def latest_cursor():
+    return PetitionEventCounter.objects.filter(pk=1).values_list('value', flat=True).first() or 0
+
+def events_in_range(start, end):
+    """Serialized events with start <= sequence < end, for every viewer."""
+    return [
+        serialize_event(e)
+        for e in PetitionEvent.objects.filter(sequence__gte=start, sequence__lt=end).order_by('sequence')
+    ]
+
+def events_since(user, since, limit=None):
+    """
+    Events visible to `user` after cursor `since`.
+
+    Returns:
+        dict with 'events', 'cursor' (pass as the next `since`), 'has_more',
+        and 'reset' (True when `since` predates retained events: refetch
+        the full list instead)
+    """
+    limit = limit or events_settings()['replay_limit']
+    oldest = (
+        PetitionEvent.objects.filter(sequence__isnull=False)
+        .order_by('sequence').values_list('sequence', flat=True).first()
+    )
+    if oldest is not None and since < oldest - 1:
+        return {'events': [], 'cursor': latest_cursor(), 'has_more': False, 'reset': True}
+
+    # Read the cursor first: everything up to it is committed
+    cursor = latest_cursor()
+    events = list(
+        PetitionEvent.objects.filter(_scope_q(viewer_scope(user)), sequence__gt=since, sequence__lte=cursor)
+        .order_by('sequence')[:limit + 1]
+    )
+    has_more = len(events) > limit
+    events = events[:limit]
+    # Advance past invisible events too, so the next poll does not rescan them
+    if has_more:
+        cursor = events[-1].sequence
+    return {
+        'events': [serialize_event(e) for e in events],
+        'cursor': max(since, cursor),
+        'has_more': has_more,
+        'reset': False,
+    }
+
+def purge_events():
+    """Delete events older than `retention_days`."""
+    cutoff = timezone.now() - timedelta(days=events_settings()['retention_days'])
+    deleted, _ = PetitionEvent.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,151 @@
+"""
+Document Text Extraction
+
+Pulls text out of PDF and plain-text attachments and resolution documents,
+splits it into overlapping chunks and adds the chunk embeddings to the
+duplicate-detection index (see ai_agent.duplicate_detection), so evidence in
+attached documents counts when new petitions are checked for duplicates.
+
+Extraction runs in the `documents` Celery queue, separate from the default
+worker pool. Each document gets a cooperative deadline (checked between PDF
+pages) plus hard page / character caps, and the Celery task has a hard time
+limit as a backstop, so one huge file cannot stall the queue.
+
+PDF support needs the optional `pypdf` package; without it PDFs are skipped.
+"""
+
+import os
+import time
+from django.conf import settings
+from django.utils import timezone
+import logging
+
+logger = logging.getLogger(__name__)
+
+TEXT_EXTENSIONS = {'.txt', '.md', '.csv'}
+PDF_EXTENSIONS = {'.pdf'}
+
+DEFAULT_EXTRACTION_SETTINGS = {
+    'time_limit_seconds': 30,       # cooperative per-document deadline
+    'max_pages': 50,
+    'max_chars': 100_000,
+    'max_file_size': 20 * 1024 * 1024,
+    'chunk_chars': 1000,
+    'chunk_overlap': 150,
+    'max_chunks': 40,               # per document
+    'embed_batch_size': 20,         # chunks per embedding request
+}
+
+def extraction_settings():
+    return {**DEFAULT_EXTRACTION_SETTINGS, **getattr(settings, 'DOCUMENT_EXTRACTION', {})}
+
+class ExtractionError(Exception):
+    """Text could not be extracted from a document."""
+
+def is_extractable_name(name):
+    ext = os.path.splitext(name or '')[1].lower()
+    return ext in TEXT_EXTENSIONS or ext in PDF_EXTENSIONS
+
+def _extract_pdf(f, config, deadline):
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise ExtractionError("pypdf is not installed")
+
+    try:
+        reader = PdfReader(f)
+    except Exception as e:
+        raise ExtractionError(f"Unreadable PDF: {e}")
+
+    parts, chars = [], 0
+    for page_number, page in enumerate(reader.pages):
+        if page_number >= config['max_pages'] or chars >= config['max_chars']:
+            break
+        if time.monotonic() > deadline:
+            logger.warning(f"⚠️ PDF extraction hit the {config['time_limit_seconds']}s limit after {page_number} pages")
+            break
+        text = page.extract_text() or ''
+        parts.append(text)
+        chars += len(text)
+    return '\n'.join(parts)
+
+def _extract_plain(f, config):
+    data = f.read(config['max_chars'] * 4)
+    return data.decode('utf-8', errors='replace')
+
+def extract_text(field_file):
+    """Text content of a stored PDF / text file, capped at `max_chars`."""
+    config = extraction_settings()
+    if field_file.size > config['max_file_size']:
+        raise ExtractionError(f"File exceeds the {config['max_file_size']} byte extraction limit")
+
+    deadline = time.monotonic() + config['time_limit_seconds']
+    ext = os.path.splitext(field_file.name)[1].lower()
+    with field_file.open('rb') as f:
+        if ext in PDF_EXTENSIONS:
+            text = _extract_pdf(f, config, deadline)
+        elif ext in TEXT_EXTENSIONS:
+            text = _extract_plain(f, config)
+        else:
+            raise ExtractionError(f"Unsupported document type: {ext or 'no extension'}")
+
+    # Collapse PDF layout whitespace so chunks carry more content
+    return ' '.join(text.split())[:config['max_chars']]
+
+def chunk_text(text, size=None, overlap=None, max_chunks=None):
+    """Split text into overlapping chunks, preferring to break at whitespace."""
+    config = extraction_settings()
+    size = size or config['chunk_chars']
+    overlap = config['chunk_overlap'] if overlap is None else overlap
+    max_chunks = max_chunks or config['max_chunks']
+
+    chunks, start = [], 0
+    while start < len(text) and len(chunks) < max_chunks:
+        end = min(start + size, len(text))
+        if end < len(text):
+            space = text.rfind(' ', start + size // 2, end)
+            end = space if space > 0 else end
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        if end >= len(text):
+            break
+        start = max(end - overlap, start + 1)
+    return chunks
+
+def mark_indexed(document, chunks):
+    """Record that a document was processed (0 chunks: nothing extractable)."""
+    document.text_indexed_at = timezone.now()
+    document.text_chunks = chunks
+    document.save(update_fields=['text_indexed_at', 'text_chunks'])
+
+def index_document(document):
+    """
+    Extract, chunk and index one Attachment or ResolutionDocument.
+
+    Returns the number of chunks indexed. Raises ExtractionError if the
+    document has no usable text. The document is only marked indexed once
+    every chunk was written to the shared index; otherwise it stays unmarked,
+    so `index_documents` picks it up again later.
+    """
+    from petitions.models import Attachment
+    from ai_agent.duplicate_detection import add_document_chunks_to_index
+
+    source = 'attachment' if isinstance(document, Attachment) else 'resolution'
+    text = extract_text(document.file)
+    chunks = chunk_text(text)
+    if not chunks:
+        raise ExtractionError("No text found")
+
+    petition = document.petition
+    indexed = add_document_chunks_to_index(
+        petition.id, petition.title, source, document.id, chunks,
+        batch_size=extraction_settings()['embed_batch_size'],
+    )
+    if indexed < len(chunks):
+        # Unmarked documents are picked up again; re-indexing replaces partial chunks
+        logger.warning(f"⚠️ Only {indexed}/{len(chunks)} chunks of {source} {document.id} reached the index")
+        return 0
+    mark_indexed(document, indexed)
+    logger.info(f"✅ Indexed {source} {document.id} of petition {petition.id}: {len(text)} chars, {indexed}/{len(chunks)} chunks")
+    return indexed
@@ -0,0 +1,112 @@
+"""
+Attachment Image Processing
+
+Runs in a Celery task after an image attachment is created:
+- applies the EXIF orientation, then re-saves the original without EXIF
+  metadata (GPS location, device details)
+- records width/height
+- writes a small thumbnail and a web-optimized variant (WEBP by default)
+
+Variants are stored in content-addressed storage and referenced from
+Attachment.variants, so list views load a few KB per image.
+"""
+
+import io
+import os
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.utils import timezone
+from PIL import Image, ImageOps
+from petitions.storage import adjust_content_references
+from petitions.response_cache import invalidate_petitions
+import logging
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp', '.gif', '.bmp', '.tif', '.tiff'}
+
+DEFAULT_IMAGE_SETTINGS = {
+    'variants': {
+        'thumbnail': {'max_size': (320, 320), 'quality': 70},
+        'web': {'max_size': (1600, 1600), 'quality': 80},
+    },
+    'format': 'WEBP',
+    'original_quality': 92,        # JPEG re-save quality when stripping EXIF
+    'max_pixels': 50_000_000,      # refuse decompression bombs
+}
+
+def image_settings():
+    return {**DEFAULT_IMAGE_SETTINGS, **getattr(settings, 'ATTACHMENT_IMAGES', {})}
+
+def is_image_name(name):
+    return os.path.splitext(name or '')[1].lower() in IMAGE_EXTENSIONS
+
+def _encode(image, image_format, **options):
+    buffer = io.BytesIO()
+    if image_format in ('JPEG', 'BMP') and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    elif image.mode not in ('RGB', 'RGBA', 'L', 'LA'):
+        image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+    image.save(buffer, format=image_format, **options)
+    return buffer.getvalue()
+
+def _has_metadata(image):
+    return bool(image.getexif()) or 'exif' in image.info or 'xmp' in image.info
+
+def process_attachment_image(attachment):
+    """
+    Strip EXIF, record dimensions and generate variants for one attachment.
+
+    Returns True if the attachment was processed, False if skipped.
+    """
+    config = image_settings()
+    storage = attachment.file.storage
+    base_name = os.path.splitext(os.path.basename(attachment.file.name))[0]
+
+    with attachment.file.open('rb') as f:
+        with Image.open(f) as source:
+            if source.width * source.height > config['max_pixels']:
+                logger.warning(f"⚠️ Attachment {attachment.id} too large to process ({source.width}x{source.height})")
+                return False
+
+            source_format = source.format
+            strip = _has_metadata(source)
+            image = ImageOps.exif_transpose(source)
+            image.load()
+
+    new_names = []
+    original_name = attachment.file.name
+
+    if strip and source_format in ('JPEG', 'PNG', 'WEBP'):
+        options = {'quality': config['original_quality'], 'optimize': True} if source_format == 'JPEG' else {}
+        if image.info.get('icc_profile'):
+            options['icc_profile'] = image.info['icc_profile']
+        data = _encode(image, source_format, **options)
+        original_name = storage.save(os.path.basename(attachment.file.name), ContentFile(data))
+        new_names.append(original_name)
+
+    variants = {}
+    extension = '.' + config['format'].lower()
+    for variant, spec in config['variants'].items():
+        resized = image.copy()
+        resized.thumbnail(spec['max_size'], Image.Resampling.LANCZOS)
+        options = {'quality': spec['quality']}
+        options.update({'method': 4} if config['format'] == 'WEBP' else {'optimize': True})
+        data = _encode(resized, config['format'], **options)
+        variants[variant] = storage.save(f"{base_name}-{variant}{extension}", ContentFile(data))
+        new_names.append(variants[variant])
+
+    old_names = [attachment.file.name] if original_name != attachment.file.name else []
+    old_names += list((attachment.variants or {}).values())
+
+    attachment.file.name = original_name
+    attachment.width, attachment.height = image.size
+    attachment.variants = variants
+    attachment.processed_at = timezone.now()
+    attachment.save(update_fields=['file', 'width', 'height', 'variants', 'processed_at'])
+
+    adjust_content_references(new_names, 1)
+    adjust_content_references(old_names, -1)
+    invalidate_petitions(attachment.petition_id)
+    logger.info(f"✅ Processed attachment {attachment.id}: {attachment.width}x{attachment.height}, variants {list(variants)}")
+    return True
@@ -0,0 +1,29 @@
+"""
+Archive Inline Remarks
+
+Copies remarks stored inline on MongoDB petition documents created before
+the `petition_remarks` collection existed into that collection. Run once
+after upgrading; add_remark also archives a petition's legacy remarks before
+its first capped push, so no history is lost either way.
+
+Usage:
+    python manage.py archive_inline_remarks
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from petitions.mongo_repository import PetitionRepository
+
+class Command(BaseCommand):
+    help = "Copy legacy inline petition remarks into the petition_remarks collection"
+
+    def handle(self, *args, **options):
+        collection = PetitionRepository._get_collection()
+        remarks_collection = PetitionRepository._get_remarks_collection()
+        if collection is None or remarks_collection is None:
+            raise CommandError("MongoDB is not available")
+
+        pending = collection.count_documents({'remarks_archived': {'$ne': True}})
+        archived = PetitionRepository.archive_inline_remarks(collection, remarks_collection, {})
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {archived} remarks from {pending} petitions"
+        ))
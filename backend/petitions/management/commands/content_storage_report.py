@@ -0,0 +1,49 @@
+"""
+Content Storage Report
+
+Shows how much disk space deduplication saves: logical bytes (every upload
+counted) against physical bytes (each distinct file stored once), plus the
+most duplicated files and what garbage collection would reclaim.
+
+Usage:
+    python manage.py content_storage_report
+"""
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, Sum
+from petitions.models import ContentObject
+
+class Command(BaseCommand):
+    help = "Report bytes saved by content-addressed deduplication"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=10, help="Most duplicated files to list (default: 10)")
+
+    def handle(self, *args, **options):
+        totals = ContentObject.objects.aggregate(
+            objects=Count('sha256'),
+            physical=Sum('size'),
+            logical=Sum(F('size') * F('upload_count')),
+            uploads=Sum('upload_count'),
+        )
+        physical = totals['physical'] or 0
+        logical = totals['logical'] or 0
+        saved = logical - physical
+
+        unreferenced = ContentObject.objects.filter(ref_count__lte=0).aggregate(count=Count('sha256'), size=Sum('size'))
+
+        self.stdout.write("Content-addressed storage")
+        self.stdout.write(f"  Distinct files:   {totals['objects']}")
+        self.stdout.write(f"  Uploads:          {totals['uploads'] or 0}")
+        self.stdout.write(f"  Logical bytes:    {logical}")
+        self.stdout.write(f"  Physical bytes:   {physical}")
+        self.stdout.write(self.style.SUCCESS(
+            f"  Bytes saved:      {saved} ({saved / logical:.1%} of uploads)" if logical else "  Bytes saved:      0"
+        ))
+        self.stdout.write(f"  Unreferenced:     {unreferenced['count']} files, {unreferenced['size'] or 0} bytes (run gc_content_storage)")
+
+        duplicated = ContentObject.objects.filter(upload_count__gt=1).order_by('-upload_count')[:options['top']]
+        if duplicated:
+            self.stdout.write("\nMost duplicated:")
+            for obj in duplicated:
+                self.stdout.write(f"  {obj.name}: {obj.upload_count} uploads, {obj.size * (obj.upload_count - 1)} bytes saved")
@@ -0,0 +1,113 @@
+"""
+Content Storage Garbage Collection
+
+Deletes content-addressed files no longer referenced by any attachment,
+resolution document or blob. Objects touched within the grace period are
+kept, so a file that is being re-uploaded (deduplicated) is never removed
+underneath the request.
+
+Usage:
+    python manage.py gc_content_storage --dry-run
+    python manage.py gc_content_storage --recount --grace-hours 48
+"""
+
+from collections import Counter
+from datetime import timedelta
+import os
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from petitions.models import Attachment, Blob, ContentObject, ResolutionDocument
+from petitions.signals import content_names
+from petitions.storage import content_hash, content_storage
+
+DEFAULT_GRACE_HOURS = 24
+
+def count_references():
+    """sha256 -> number of rows referencing it, computed from the tables."""
+    counts = Counter()
+    for model in (Attachment, ResolutionDocument, Blob):
+        for instance in model.objects.iterator():
+            for name in content_names(instance):
+                sha256 = content_hash(name)
+                if sha256:
+                    counts[sha256] += 1
+    return counts
+
+class Command(BaseCommand):
+    help = "Delete unreferenced files from content-addressed storage"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="List what would be deleted")
+        parser.add_argument('--grace-hours', type=float, default=DEFAULT_GRACE_HOURS,
+                            help=f"Keep objects touched within this many hours (default: {DEFAULT_GRACE_HOURS})")
+        parser.add_argument('--recount', action='store_true', help="Recompute reference counts from the tables first")
+
+    def handle(self, *args, **options):
+        storage = content_storage()
+        cutoff = timezone.now() - timedelta(hours=options['grace_hours'])
+
+        if options['recount']:
+            self._recount(options['dry_run'])
+
+        candidates = ContentObject.objects.filter(ref_count__lte=0, updated_at__lt=cutoff)
+        deleted, freed = 0, 0
+        for obj in candidates.iterator():
+            if options['dry_run']:
+                self.stdout.write(f"  Would delete {obj.name} ({obj.size} bytes)")
+                deleted += 1
+                freed += obj.size
+                continue
+
+            # Re-check under the same conditions; a new reference may have appeared
+            removed, _ = ContentObject.objects.filter(
+                sha256=obj.sha256, ref_count__lte=0, updated_at__lt=cutoff
+            ).delete()
+            if removed:
+                storage.delete(obj.name)
+                deleted += 1
+                freed += obj.size
+
+        orphans, orphan_bytes = self._delete_orphan_files(storage, options['grace_hours'], options['dry_run'])
+
+        verb = "Would free" if options['dry_run'] else "Freed"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {freed + orphan_bytes} bytes: {deleted} unreferenced objects, {orphans} orphan files"
+        ))
+
+    def _recount(self, dry_run):
+        counts = count_references()
+        drift = 0
+        with transaction.atomic():
+            for obj in ContentObject.objects.select_for_update().iterator():
+                actual = counts.get(obj.sha256, 0)
+                if obj.ref_count != actual:
+                    drift += 1
+                    if not dry_run:
+                        # update() leaves updated_at alone, so the grace period still applies
+                        ContentObject.objects.filter(sha256=obj.sha256).update(ref_count=actual)
+        self.stdout.write(f"Reference counts corrected: {drift}")
+
+    def _delete_orphan_files(self, storage, grace_hours, dry_run):
+        """Files under cas/ without a ContentObject row (e.g. a crash mid-upload)."""
+        root = storage.path('cas')
+        if not os.path.isdir(root):
+            return 0, 0
+
+        known = set(ContentObject.objects.values_list('name', flat=True))
+        cutoff = time.time() - grace_hours * 3600
+        count, size = 0, 0
+        for directory, _, files in os.walk(root):
+            for filename in files:
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, storage.location).replace(os.sep, '/')
+                if name in known or os.path.getmtime(path) > cutoff:
+                    continue
+                count += 1
+                size += os.path.getsize(path)
+                if dry_run:
+                    self.stdout.write(f"  Would delete orphan {name}")
+                else:
+                    os.remove(path)
+        return count, size
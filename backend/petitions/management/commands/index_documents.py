@@ -0,0 +1,86 @@
+"""
+Index Document Text
+
+Backfills the duplicate-detection index with text from PDF / text
+attachments and resolution documents not indexed yet (new uploads are
+indexed by the `index_document_text` task).
+
+- Inline runs use a bounded thread pool; PDF parsing holds the GIL, but
+  embedding requests overlap, and every document keeps its extraction
+  deadline (DOCUMENT_EXTRACTION['time_limit_seconds'])
+- --queue sends the documents to the `documents` Celery queue instead, so a
+  separate worker pool does the extraction
+- --reindex also processes documents that were indexed before
+
+Usage:
+    python manage.py index_documents
+    python manage.py index_documents --workers 8 --limit 500
+    python manage.py index_documents --queue
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import time
+from django.core.management.base import BaseCommand
+from petitions.models import Attachment, ResolutionDocument
+from petitions.extraction import ExtractionError, index_document, is_extractable_name, mark_indexed
+
+def _index(document):
+    """(chunks indexed, error message) for one document."""
+    try:
+        return index_document(document), None
+    except ExtractionError as e:
+        mark_indexed(document, 0)
+        return 0, str(e)
+    except Exception as e:
+        return 0, f"failed: {e}"
+
+class Command(BaseCommand):
+    help = "Extract text from attached documents and add it to the duplicate index"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help="Parallel documents when running inline")
+        parser.add_argument('--limit', type=int, default=0, help="Process at most this many documents")
+        parser.add_argument('--reindex', action='store_true', help="Include documents that were already indexed")
+        parser.add_argument('--queue', action='store_true', help="Queue documents for Celery workers instead of running inline")
+
+    def _pending(self, reindex, limit):
+        documents = []
+        for source, model in (('attachment', Attachment), ('resolution', ResolutionDocument)):
+            queryset = model.objects.select_related('petition').order_by('id')
+            if not reindex:
+                queryset = queryset.filter(text_indexed_at__isnull=True)
+            documents += [(source, d) for d in queryset.iterator() if is_extractable_name(d.file.name)]
+        return documents[:limit] if limit else documents
+
+    def handle(self, *args, **options):
+        documents = self._pending(options['reindex'], options['limit'])
+        if not documents:
+            self.stdout.write(self.style.SUCCESS("No documents to index."))
+            return
+
+        if options['queue']:
+            from petitions.tasks import index_document_text
+            for source, document in documents:
+                if options['reindex']:
+                    document.text_indexed_at = None
+                    document.save(update_fields=['text_indexed_at'])
+                index_document_text.delay(source, document.id)
+            self.stdout.write(self.style.SUCCESS(f"Queued {len(documents)} documents on the 'documents' queue."))
+            return
+
+        started = time.monotonic()
+        indexed = chunks = 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            for (source, document), (count, error) in zip(documents, pool.map(lambda item: _index(item[1]), documents)):
+                if error:
+                    self.stdout.write(self.style.WARNING(f"  {source} {document.id}: {error}"))
+                elif count:
+                    indexed += 1
+                    chunks += count
+                else:
+                    self.stdout.write(self.style.WARNING(f"  {source} {document.id}: not written to the index, left for the next run"))
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {indexed}/{len(documents)} documents ({chunks} chunks) in {elapsed:.1f}s."
+        ))
@@ -0,0 +1,100 @@
+"""
+Merge Departments
+
+Consolidates duplicate Department rows (e.g. "Roads and Transport",
+"Water Supply.") into their canonical taxonomy entry, re-pointing petitions,
+officers and SLAs in bulk before deleting the duplicate.
+
+SLAs are moved unless the target already has one for the same urgency, in
+which case the target's SLA is kept and the duplicate's is dropped.
+Departments that match nothing in the taxonomy are reported and left alone.
+
+Usage:
+    python manage.py merge_departments --dry-run
+    python manage.py merge_departments
+    python manage.py merge_departments --source "Fire Services" --target General
+"""
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from petitions.models import Department, Petition, SLA
+from petitions.mongo_repository import PetitionRepository
+from petitions.taxonomy import match_department, clear_department_cache
+from petitions.response_cache import invalidate_all_petitions
+
+User = get_user_model()
+
+class Command(BaseCommand):
+    help = "Merge duplicate departments into their canonical taxonomy entry"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Show planned merges without changing anything")
+        parser.add_argument('--source', help="Merge only this department (by name)")
+        parser.add_argument('--target', help="Department to merge --source into (default: its canonical match)")
+
+    def handle(self, *args, **options):
+        if options['target'] and not options['source']:
+            raise CommandError("--target requires --source")
+
+        plan = self._plan(options['source'], options['target'])
+        if not plan:
+            self.stdout.write(self.style.SUCCESS("No duplicate departments found."))
+            return
+
+        for source, target_name in plan:
+            petitions = Petition.objects.filter(department=source).count()
+            officers = User.objects.filter(department=source).count()
+            slas = SLA.objects.filter(department=source).count()
+            prefix = "Would merge" if options['dry_run'] else "Merging"
+            self.stdout.write(
+                f"{prefix} {source.name!r} -> {target_name!r} "
+                f"({petitions} petitions, {officers} officers, {slas} SLAs)"
+            )
+            if not options['dry_run']:
+                self._merge(source, target_name)
+
+        if not options['dry_run']:
+            clear_department_cache()
+            invalidate_all_petitions()
+            self.stdout.write(self.style.SUCCESS(f"Merged {len(plan)} departments."))
+
+    def _plan(self, source_name, target_name):
+        """List of (source Department, target name) merges."""
+        if source_name:
+            source = Department.objects.filter(name=source_name).first()
+            if source is None:
+                raise CommandError(f"Department {source_name!r} not found")
+            target_name = target_name or match_department(source.name)
+            if not target_name:
+                raise CommandError(f"{source_name!r} matches no canonical department; pass --target")
+            if target_name == source.name:
+                raise CommandError("Source and target are the same department")
+            return [(source, target_name)]
+
+        plan = []
+        for department in Department.objects.order_by('name'):
+            canonical = match_department(department.name)
+            if canonical is None:
+                self.stdout.write(self.style.WARNING(f"Skipping {department.name!r}: no canonical match"))
+            elif canonical != department.name:
+                plan.append((department, canonical))
+        return plan
+
+    def _merge(self, source, target_name):
+        with transaction.atomic():
+            target, _ = Department.objects.get_or_create(name=target_name)
+
+            Petition.objects.filter(department=source).update(department=target)
+            User.objects.filter(department=source).update(department=target)
+
+            # unique (department, urgency): keep the target's SLA where both exist
+            existing = SLA.objects.filter(department=target).values_list('urgency', flat=True)
+            SLA.objects.filter(department=source).exclude(urgency__in=list(existing)).update(department=target)
+            dropped, _ = SLA.objects.filter(department=source).delete()
+
+            source_name = source.name
+            source.delete()
+
+        renamed = PetitionRepository.rename_department(source_name, target_name)
+        self.stdout.write(f"  ✅ {source_name!r} merged ({dropped} conflicting SLAs dropped, {renamed} MongoDB petitions updated)")
@@ -0,0 +1,220 @@
+"""
+Re-triage Petitions
+
+Re-runs department and urgency classification over existing petitions,
+e.g. after the department list or urgency criteria in ai_agent/services.py
+change.
+
+- Petitions are processed in id order in batches; each batch is classified
+  by a bounded thread pool (model calls are still capped by AI_CONCURRENCY)
+- Progress is checkpointed to a JSON file after every batch, so an
+  interrupted run continues where it stopped
+- --dry-run only reports how many petitions would change department/urgency
+- Without --local-only, labels that fell back to the heuristics (model
+  unavailable, circuit open, no API key) are never written: such petitions
+  are skipped and listed, and a batch with no model answers at all stops
+  the run (rerun to resume once the model is back)
+- Changes are applied with bulk_update, with one audit entry per petition,
+  and mirrored to MongoDB
+
+Usage:
+    python manage.py retriage_petitions --dry-run
+    python manage.py retriage_petitions --workers 8 --batch-size 200
+    python manage.py retriage_petitions --local-only --status SUBMITTED --status UNDER_REVIEW
+"""
+
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from petitions.models import Petition
+from petitions.taxonomy import get_department
+from petitions.audit import log_retriage_bulk
+from petitions.mongo_repository import PetitionRepository
+from ai_agent.services import classify_department, predict_urgency
+from ai_agent.heuristics import classify_department_local, predict_urgency_local
+
+DEFAULT_CHECKPOINT = '.retriage_checkpoint.json'
+
+FALLBACK = 'fallback'
+
+def _classify(petition, local_only):
+    """(department, urgency, fell_back)"""
+    if local_only:
+        department, _ = classify_department_local(petition.title, petition.description)
+        urgency, _ = predict_urgency_local(petition.title, petition.description)
+        return department, urgency, False
+    department, department_source = classify_department(petition.title, petition.description, with_source=True)
+    urgency, urgency_source = predict_urgency(petition.title, petition.description, with_source=True)
+    return department, urgency, FALLBACK in (department_source, urgency_source)
+
+class Command(BaseCommand):
+    help = "Re-classify department and urgency of existing petitions in parallel batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Report changes without saving them")
+        parser.add_argument('--workers', type=int, default=4, help="Concurrent classifications (default: 4)")
+        parser.add_argument('--batch-size', type=int, default=100, help="Petitions per batch (default: 100)")
+        parser.add_argument('--status', action='append', dest='statuses', help="Only petitions with this status (repeatable)")
+        parser.add_argument('--limit', type=int, help="Stop once this many petitions are processed (including resumed progress)")
+        parser.add_argument('--local-only', action='store_true', help="Use the keyword heuristics only (no Gemini calls)")
+        parser.add_argument('--checkpoint', default=DEFAULT_CHECKPOINT, help=f"Checkpoint file (default: {DEFAULT_CHECKPOINT})")
+        parser.add_argument('--restart', action='store_true', help="Ignore an existing checkpoint and start from the first petition")
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1 or options['batch_size'] < 1:
+            raise CommandError("--workers and --batch-size must be positive")
+
+        checkpoint_path = options['checkpoint']
+        if options['dry_run']:
+            # Dry runs keep their own checkpoint so they never skip real work
+            checkpoint_path = f"{checkpoint_path}.dry-run"
+
+        state = self._load_checkpoint(checkpoint_path, options)
+        if state['last_id']:
+            self.stdout.write(f"Resuming after petition #{state['last_id']} ({state['processed']} already processed)")
+
+        queryset = Petition.objects.select_related('department').order_by('id')
+        if options['statuses']:
+            queryset = queryset.filter(status__in=options['statuses'])
+
+        finished = False
+        started = time.monotonic()
+
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            while True:
+                batch_size = options['batch_size']
+                if options['limit']:
+                    batch_size = min(batch_size, options['limit'] - state['processed'])
+                    if batch_size <= 0:
+                        break
+
+                # Keyset pagination: stable across restarts and concurrent inserts
+                batch = list(queryset.filter(id__gt=state['last_id'])[:batch_size])
+                if not batch:
+                    finished = True
+                    break
+
+                results = list(pool.map(lambda p: _classify(p, options['local_only']), batch))
+                if all(fell_back for _, _, fell_back in results):
+                    self._save_checkpoint(checkpoint_path, state)
+                    self._report(state, options['dry_run'])
+                    raise CommandError(
+                        f"No model results for petitions #{batch[0].id}-#{batch[-1].id} (model unavailable?); "
+                        "stopped without writing fallback labels. Rerun to resume."
+                    )
+                changes = self._diff(batch, results, state)
+
+                if changes and not options['dry_run']:
+                    self._apply(changes)
+
+                state['last_id'] = batch[-1].id
+                state['processed'] += len(batch)
+                self._save_checkpoint(checkpoint_path, state)
+                self.stdout.write(
+                    f"  #{batch[0].id}-#{batch[-1].id}: {len(changes)} of {len(batch)} changed "
+                    f"({state['processed']} processed, {time.monotonic() - started:.1f}s)"
+                )
+
+        self._report(state, options['dry_run'])
+        # Completed runs start from the beginning next time
+        if finished and os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+
+    def _diff(self, batch, results, state):
+        """Collect (petition, new_department, new_urgency) for petitions whose triage changed."""
+        changes = []
+        for petition, (department, urgency, fell_back) in zip(batch, results):
+            if fell_back:
+                state['skipped_ids'].append(petition.id)
+                continue
+            old_department = petition.department.name if petition.department else ''
+            department_changed = department != old_department
+            urgency_changed = urgency != petition.urgency
+
+            if department_changed:
+                state['department_changed'] += 1
+                state['department_moves'][f"{old_department or '(none)'} -> {department}"] += 1
+            if urgency_changed:
+                state['urgency_changed'] += 1
+                state['urgency_moves'][f"{petition.urgency} -> {urgency}"] += 1
+            if department_changed or urgency_changed:
+                changes.append((petition, department, urgency))
+        return changes
+
+    def _apply(self, changes):
+        now = timezone.now()
+        audit_entries, mongo_updates = [], []
+
+        for petition, department_name, urgency in changes:
+            old_value = f"Department: {petition.department}, Urgency: {petition.urgency}"
+            petition.department = get_department(department_name)
+            petition.urgency = urgency
+            petition.updated_at = now
+            audit_entries.append((petition, old_value, f"Department: {department_name}, Urgency: {urgency}"))
+            mongo_updates.append({'petition_id': petition.id, 'department': department_name, 'urgency': urgency})
+
+        petitions = [petition for petition, _, _ in changes]
+        with transaction.atomic():
+            Petition.objects.bulk_update(petitions, ['department', 'urgency', 'updated_at'])
+            log_retriage_bulk(audit_entries)
+
+        try:
+            summary = PetitionRepository.bulk_update_triage(mongo_updates)
+            if summary['errors']:
+                self.stderr.write(f"⚠️ MongoDB sync errors: {summary['errors']}")
+        except Exception as e:
+            self.stderr.write(f"⚠️ MongoDB sync failed: {e}")
+
+    def _load_checkpoint(self, path, options):
+        state = {
+            'last_id': 0,
+            'processed': 0,
+            'department_changed': 0,
+            'urgency_changed': 0,
+            'department_moves': Counter(),
+            'urgency_moves': Counter(),
+            'skipped_ids': [],
+        }
+        if options['restart'] or not os.path.exists(path):
+            return state
+
+        try:
+            with open(path) as f:
+                saved = json.load(f)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Unreadable checkpoint {path}: {e} (use --restart to ignore it)")
+
+        state.update(saved)
+        state['department_moves'] = Counter(saved.get('department_moves', {}))
+        state['urgency_moves'] = Counter(saved.get('urgency_moves', {}))
+        state['skipped_ids'] = saved.get('skipped_ids', [])
+        return state
+
+    def _save_checkpoint(self, path, state):
+        # Write-then-rename so an interrupted run never leaves a half-written file
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
+
+    def _report(self, state, dry_run):
+        verb = "would change" if dry_run else "changed"
+        self.stdout.write("")
+        self.stdout.write(self.style.SUCCESS(f"{'Dry run: ' if dry_run else ''}{state['processed']} petitions processed"))
+        self.stdout.write(f"  Department {verb}: {state['department_changed']}")
+        for move, count in state['department_moves'].most_common(10):
+            self.stdout.write(f"    {move}: {count}")
+        self.stdout.write(f"  Urgency {verb}: {state['urgency_changed']}")
+        for move, count in state['urgency_moves'].most_common(10):
+            self.stdout.write(f"    {move}: {count}")
+        if state['skipped_ids']:
+            shown = ', '.join(f"#{pid}" for pid in state['skipped_ids'][:20])
+            more = f" and {len(state['skipped_ids']) - 20} more" if len(state['skipped_ids']) > 20 else ''
+            self.stdout.write(self.style.WARNING(
+                f"  Skipped (model unavailable, heuristic fallback not written): {len(state['skipped_ids'])}: {shown}{more}"
+            ))
@@ -0,0 +1,207 @@
+"""
+Protected Media Serving
+
+GET/HEAD /media/<path>
+
+Files are served only when the request carries a valid signed URL (the
+`exp`/`sig` query string added by ContentAddressedStorage.url) or an
+authenticated user allowed to see the petition the file belongs to:
+- citizens: files of their own petitions and their own uploads
+- officers / admins: any petition file
+
+After the permission check the byte transfer is handed to the front web
+server when MEDIA_SERVING['accel'] is set ('nginx' -> X-Accel-Redirect,
+'apache' -> X-Sendfile), so no Python worker is held for the download.
+Otherwise the file is streamed from Django with ETag / Last-Modified
+conditional GETs and single byte-range (206) support for resumable
+downloads and video/PDF seeking.
+"""
+
+import mimetypes
+import os
+import re
+import time
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.db.models import Q
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse, Http404
+from django.utils.cache import get_conditional_response
+from django.utils.crypto import constant_time_compare
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from .models import Attachment, Blob, ResolutionDocument
+from .storage import DEFAULT_URL_TTL_SECONDS, HASH_BLOCK_SIZE, content_hash, content_storage, media_signature
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MEDIA_SERVING = {
+    'url_ttl_seconds': DEFAULT_URL_TTL_SECONDS,
+    'accel': '',                          # '', 'nginx' or 'apache'
+    'accel_prefix': '/protected-media/',  # nginx `internal` location aliasing MEDIA_ROOT
+}
+
+RANGE_PATTERN = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+def media_settings():
+    return {**DEFAULT_MEDIA_SERVING, **getattr(settings, 'MEDIA_SERVING', {})}
+
+def _valid_signature(request, name):
+    expires = request.GET.get('exp', '')
+    signature = request.GET.get('sig', '')
+    if not expires.isdigit() or not signature or int(expires) < time.time():
+        return False
+    return constant_time_compare(signature, media_signature(name, int(expires)))
+
+def _authenticate(request):
+    """Session user, else the JWT bearer token user, else None."""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user
+    try:
+        result = JWTAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return None
+    return result[0] if result else None
+
+def _variant_query(name):
+    from petitions.imaging import image_settings
+
+    query = Q(file=name)
+    for variant in image_settings()['variants']:
+        query |= Q(**{f'variants__{variant}': name})
+    return query
+
+def _can_access(user, name):
+    """Whether `user` may read the stored file `name`."""
+    if Blob.objects.filter(file=name, owner=user).exists():
+        return True
+
+    attachments = Attachment.objects.filter(_variant_query(name))
+    documents = ResolutionDocument.objects.filter(file=name)
+    if user.role == 'CITIZEN':
+        attachments = attachments.filter(petition__citizen=user)
+        documents = documents.filter(petition__citizen=user)
+    return attachments.exists() or documents.exists()
+
+def _parse_range(header, size):
+    """(start, end) inclusive for a single byte range, None to ignore, or 'unsatisfiable'."""
+    match = RANGE_PATTERN.match(header.strip())
+    if not match:
+        # Multiple or malformed ranges: serve the whole file
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        length = int(last)
+        if length == 0:
+            return 'unsatisfiable'
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return 'unsatisfiable'
+    return start, end
+
+def _if_range_matches(request, etag, last_modified):
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+def _read_range(path, start, end):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            block = f.read(min(HASH_BLOCK_SIZE, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            yield block
+
+def _set_common_headers(response, name, etag, last_modified):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Accept-Ranges'] = 'bytes'
+    response['X-Content-Type-Options'] = 'nosniff'
+    # Content-addressed files never change under the same name
+    response['Cache-Control'] = 'private, max-age=31536000, immutable' if content_hash(name) else 'private, max-age=3600'
+    return response
+
+def serve_media(request, path):
+    """Serve a stored file after checking the signature or petition permissions."""
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponse(status=405, headers={'Allow': 'GET, HEAD'})
+
+    storage = content_storage()
+    try:
+        full_path = storage.path(path)
+    except SuspiciousFileOperation:
+        raise Http404("File not found")
+    name = os.path.relpath(full_path, storage.location).replace(os.sep, '/')
+
+    if not _valid_signature(request, name):
+        user = _authenticate(request)
+        if user is None:
+            return HttpResponse(status=401, headers={'WWW-Authenticate': 'Bearer'})
+        if not _can_access(user, name):
+            # 404 rather than 403 so file names of other petitions are not confirmed
+            raise Http404("File not found")
+
+    try:
+        stat = os.stat(full_path)
+    except (FileNotFoundError, NotADirectoryError):
+        raise Http404("File not found")
+
+    size = stat.st_size
+    last_modified = int(stat.st_mtime)
+    sha256 = content_hash(name)
+    etag = f'"{sha256}"' if sha256 else f'"{last_modified:x}-{size:x}"'
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return _set_common_headers(not_modified, name, etag, last_modified)
+
+    content_type, encoding = mimetypes.guess_type(name)
+    content_type = content_type or 'application/octet-stream'
+    config = media_settings()
+
+    if config['accel'] == 'nginx':
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = config['accel_prefix'].rstrip('/') + '/' + name
+        return _set_common_headers(response, name, etag, last_modified)
+    if config['accel'] == 'apache':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = full_path
+        return _set_common_headers(response, name, etag, last_modified)
+
+    byte_range = None
+    if 'Range' in request.headers and _if_range_matches(request, etag, last_modified):
+        byte_range = _parse_range(request.headers['Range'], size)
+
+    if byte_range == 'unsatisfiable':
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return _set_common_headers(response, name, etag, last_modified)
+
+    if byte_range:
+        start, end = byte_range
+        body = _read_range(full_path, start, end) if request.method == 'GET' else []
+        response = StreamingHttpResponse(body, status=206, content_type=content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(end - start + 1)
+    elif request.method == 'HEAD':
+        response = HttpResponse(content_type=content_type)
+        response['Content-Length'] = str(size)
+    else:
+        # FileResponse uses wsgi.file_wrapper (sendfile) when the server offers it
+        response = FileResponse(open(full_path, 'rb'), content_type=content_type)
+
+    if encoding:
+        response['Content-Encoding'] = encoding
+    return _set_common_headers(response, name, etag, last_modified)
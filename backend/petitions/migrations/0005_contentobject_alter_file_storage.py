@@ -0,0 +1,41 @@
+# Generated by Django 5.2.8 on 2026-10-19 15:00
+
+import petitions.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('petitions', '0004_blob_uploadsession_attachment_blob_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentObject',
+            fields=[
+                ('sha256', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('name', models.CharField(help_text='Storage path (cas/ab/cd/<sha256><ext>)', max_length=255)),
+                ('size', models.PositiveBigIntegerField()),
+                ('ref_count', models.IntegerField(default=0, help_text='Attachments, resolution documents and blobs using this file')),
+                ('upload_count', models.PositiveIntegerField(default=0, help_text='Times this content was uploaded')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='attachment',
+            name='file',
+            field=models.FileField(storage=petitions.storage.content_storage, upload_to='attachments/'),
+        ),
+        migrations.AlterField(
+            model_name='blob',
+            name='file',
+            field=models.FileField(storage=petitions.storage.content_storage, upload_to='blobs/'),
+        ),
+        migrations.AlterField(
+            model_name='resolutiondocument',
+            name='file',
+            field=models.FileField(storage=petitions.storage.content_storage, upload_to='resolutions/'),
+        ),
+    ]
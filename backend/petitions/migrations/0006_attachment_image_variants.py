@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-19 16:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('petitions', '0005_contentobject_alter_file_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attachment',
+            name='width',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='attachment',
+            name='height',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='attachment',
+            name='variants',
+            field=models.JSONField(blank=True, default=dict, help_text="Image variant storage names, e.g. {'thumbnail': ..., 'web': ...}"),
+        ),
+        migrations.AddField(
+            model_name='attachment',
+            name='processed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-19 17:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('petitions', '0006_attachment_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attachment',
+            name='text_indexed_at',
+            field=models.DateTimeField(blank=True, help_text='When document text was added to the duplicate index', null=True),
+        ),
+        migrations.AddField(
+            model_name='attachment',
+            name='text_chunks',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='resolutiondocument',
+            name='text_indexed_at',
+            field=models.DateTimeField(blank=True, help_text='When document text was added to the duplicate index', null=True),
+        ),
+        migrations.AddField(
+            model_name='resolutiondocument',
+            name='text_chunks',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,96 @@
+# Generated by Django 5.2.8 on 2026-10-19 18:00
+
+from django.db import migrations
+
+# Full-text index over title, description and audit remarks (see petitions.search).
+# Maintained by database triggers, so bulk writes and raw updates stay indexed.
+
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE petitions_petition_fts USING fts5("
+    "title, description, remarks, tokenize='porter unicode61 remove_diacritics 2')",
+    """CREATE TRIGGER petitions_petition_fts_insert AFTER INSERT ON petitions_petition BEGIN
+        INSERT INTO petitions_petition_fts(rowid, title, description, remarks) VALUES (new.id, new.title, new.description, '');
+    END""",
+    """CREATE TRIGGER petitions_petition_fts_update AFTER UPDATE OF title, description ON petitions_petition BEGIN
+        UPDATE petitions_petition_fts SET title = new.title, description = new.description WHERE rowid = new.id;
+    END""",
+    """CREATE TRIGGER petitions_petition_fts_delete AFTER DELETE ON petitions_petition BEGIN
+        DELETE FROM petitions_petition_fts WHERE rowid = old.id;
+    END""",
+    """CREATE TRIGGER petitions_auditlog_fts_insert AFTER INSERT ON petitions_auditlog WHEN new.remarks <> '' BEGIN
+        UPDATE petitions_petition_fts SET remarks = remarks || ' ' || new.remarks WHERE rowid = new.petition_id;
+    END""",
+    """INSERT INTO petitions_petition_fts(rowid, title, description, remarks)
+        SELECT p.id, p.title, p.description,
+               COALESCE((SELECT group_concat(a.remarks, ' ') FROM petitions_auditlog a
+                         WHERE a.petition_id = p.id AND a.remarks <> ''), '')
+        FROM petitions_petition p""",
+]
+
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS petitions_auditlog_fts_insert",
+    "DROP TRIGGER IF EXISTS petitions_petition_fts_delete",
+    "DROP TRIGGER IF EXISTS petitions_petition_fts_update",
+    "DROP TRIGGER IF EXISTS petitions_petition_fts_insert",
+    "DROP TABLE IF EXISTS petitions_petition_fts",
+]
+
+POSTGRESQL_FORWARD = [
+    "ALTER TABLE petitions_petition ADD COLUMN search_vector tsvector",
+    """CREATE FUNCTION petitions_petition_search_vector() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('english', COALESCE(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('english', COALESCE(NEW.description, '')), 'B') ||
+            setweight(to_tsvector('english', COALESCE(
+                (SELECT string_agg(a.remarks, ' ') FROM petitions_auditlog a
+                 WHERE a.petition_id = NEW.id AND a.remarks <> ''), '')), 'C');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql""",
+    """CREATE TRIGGER petitions_petition_search_vector
+        BEFORE INSERT OR UPDATE OF title, description ON petitions_petition
+        FOR EACH ROW EXECUTE FUNCTION petitions_petition_search_vector()""",
+    """CREATE FUNCTION petitions_auditlog_search_vector() RETURNS trigger AS $$
+    BEGIN
+        UPDATE petitions_petition
+        SET search_vector = COALESCE(search_vector, ''::tsvector) || setweight(to_tsvector('english', NEW.remarks), 'C')
+        WHERE id = NEW.petition_id;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql""",
+    """CREATE TRIGGER petitions_auditlog_search_vector
+        AFTER INSERT ON petitions_auditlog
+        FOR EACH ROW WHEN (NEW.remarks <> '') EXECUTE FUNCTION petitions_auditlog_search_vector()""",
+    # Fires the BEFORE UPDATE trigger for existing rows
+    "UPDATE petitions_petition SET title = title",
+    "CREATE INDEX petitions_petition_search_gin ON petitions_petition USING GIN (search_vector)",
+]
+
+POSTGRESQL_REVERSE = [
+    "DROP TRIGGER IF EXISTS petitions_auditlog_search_vector ON petitions_auditlog",
+    "DROP FUNCTION IF EXISTS petitions_auditlog_search_vector()",
+    "DROP TRIGGER IF EXISTS petitions_petition_search_vector ON petitions_petition",
+    "DROP FUNCTION IF EXISTS petitions_petition_search_vector()",
+    "ALTER TABLE petitions_petition DROP COLUMN IF EXISTS search_vector",
+]
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('petitions', '0007_document_text_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRESQL_FORWARD}),
+            _run({'sqlite': SQLITE_REVERSE, 'postgresql': POSTGRESQL_REVERSE}),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.8 on 2026-10-19 19:00
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('petitions', '0008_petition_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PetitionEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('petition_id', models.BigIntegerField()),
+                ('citizen_id', models.BigIntegerField(db_index=True, null=True)),
+                ('department_id', models.BigIntegerField(db_index=True, null=True)),
+                ('officer_id', models.BigIntegerField(db_index=True, null=True)),
+                ('type', models.CharField(choices=[('CREATED', 'Created'), ('STATUS_CHANGED', 'Status Changed'), ('ASSIGNED', 'Assigned to Officer'), ('DELETED', 'Deleted')], max_length=20)),
+                ('data', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder, help_text='Changed petition fields')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.8 on 2026-10-19 21:00
+
+from django.db import migrations, models
+from django.db.models import F, Max
+
+
+def sequence_existing_events(apps, schema_editor):
+    # Existing cursors are event ids, so keep them valid
+    PetitionEvent = apps.get_model('petitions', 'PetitionEvent')
+    PetitionEventCounter = apps.get_model('petitions', 'PetitionEventCounter')
+    PetitionEvent.objects.update(sequence=F('id'))
+    last = PetitionEvent.objects.aggregate(last=Max('id'))['last'] or 0
+    PetitionEventCounter.objects.create(pk=1, value=last)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('petitions', '0009_petitionevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='petitionevent',
+            name='sequence',
+            field=models.BigIntegerField(null=True, unique=True),
+        ),
+        migrations.AlterModelOptions(
+            name='petitionevent',
+            options={'ordering': ['sequence']},
+        ),
+        migrations.CreateModel(
+            name='PetitionEventCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(sequence_existing_events, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.8 on 2026-10-19 23:00
+
+from django.db import migrations
+
+# Index only remarks typed by officers (STATUS_CHANGED entries); the canned
+# CREATED/ASSIGNED/DOCUMENT_UPLOADED/UPDATED remarks matched almost every
+# petition. Rebuilds the remarks part of existing search documents.
+
+SQLITE_TRIGGER = """CREATE TRIGGER petitions_auditlog_fts_insert AFTER INSERT ON petitions_auditlog
+    WHEN new.remarks <> ''{condition} BEGIN
+        UPDATE petitions_petition_fts SET remarks = remarks || ' ' || new.remarks WHERE rowid = new.petition_id;
+    END"""
+
+SQLITE_REBUILD = """UPDATE petitions_petition_fts SET remarks = COALESCE(
+        (SELECT group_concat(a.remarks, ' ') FROM petitions_auditlog a
+         WHERE a.petition_id = petitions_petition_fts.rowid AND a.remarks <> ''{condition}), '')"""
+
+POSTGRESQL_FUNCTION = """CREATE OR REPLACE FUNCTION petitions_petition_search_vector() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('english', COALESCE(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('english', COALESCE(NEW.description, '')), 'B') ||
+            setweight(to_tsvector('english', COALESCE(
+                (SELECT string_agg(a.remarks, ' ') FROM petitions_auditlog a
+                 WHERE a.petition_id = NEW.id AND a.remarks <> ''{condition}), '')), 'C');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql"""
+
+POSTGRESQL_TRIGGER = """CREATE TRIGGER petitions_auditlog_search_vector
+        AFTER INSERT ON petitions_auditlog
+        FOR EACH ROW WHEN (NEW.remarks <> ''{condition}) EXECUTE FUNCTION petitions_auditlog_search_vector()"""
+
+def _statements(new_condition, row_condition):
+    """Trigger/rebuild SQL; the conditions filter the NEW row and aggregated rows."""
+    return {
+        'sqlite': [
+            "DROP TRIGGER IF EXISTS petitions_auditlog_fts_insert",
+            SQLITE_TRIGGER.format(condition=new_condition),
+            SQLITE_REBUILD.format(condition=row_condition),
+        ],
+        'postgresql': [
+            "DROP TRIGGER IF EXISTS petitions_auditlog_search_vector ON petitions_auditlog",
+            POSTGRESQL_FUNCTION.format(condition=row_condition),
+            POSTGRESQL_TRIGGER.format(condition=new_condition),
+            # Fires the BEFORE UPDATE trigger for existing rows
+            "UPDATE petitions_petition SET title = title",
+        ],
+    }
+
+FORWARD = _statements(" AND new.action = 'STATUS_CHANGED'", " AND a.action = 'STATUS_CHANGED'")
+REVERSE = _statements('', '')
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('petitions', '0010_petitionevent_sequence'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run(FORWARD),
+            _run(REVERSE),
+        ),
+    ]
@@ -1,5 +1,8 @@
+import uuid
 from django.db import models
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from .storage import content_storage
 
 class Department(models.Model):
     name = models.CharField(max_length=100, unique=True)
@@ -56,9 +59,57 @@ class Petition(models.Model):
     def __str__(self):
         return f"{self.title} ({self.status})"
 
+class ContentObject(models.Model):
+    """A file stored once by SHA-256 in content-addressed storage."""
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    name = models.CharField(max_length=255, help_text="Storage path (cas/ab/cd/<sha256><ext>)")
+    size = models.PositiveBigIntegerField()
+    ref_count = models.IntegerField(default=0, help_text="Attachments, resolution documents and blobs using this file")
+    upload_count = models.PositiveIntegerField(default=0, help_text="Times this content was uploaded")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.size} bytes, {self.ref_count} refs)"
+
+class Blob(models.Model):
+    """A completed chunked upload that petitions and resolution documents reference by id."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='blobs')
+    file = models.FileField(upload_to='blobs/', storage=content_storage)
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100, blank=True)
+    size = models.PositiveBigIntegerField()
+    sha256 = models.CharField(max_length=64, db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.filename} ({self.size} bytes)"
+
+class UploadSession(models.Model):
+    """An in-progress resumable upload; chunks are appended to a staging file."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='upload_sessions')
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100, blank=True)
+    size = models.PositiveBigIntegerField(help_text="Declared total size in bytes")
+    received = models.PositiveBigIntegerField(default=0, help_text="Contiguous bytes received so far")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Upload {self.id}: {self.filename} ({self.received}/{self.size})"
+
 class Attachment(models.Model):
     petition = models.ForeignKey(Petition, on_delete=models.CASCADE, related_name='attachments')
-    file = models.FileField(upload_to='attachments/')
+    file = models.FileField(upload_to='attachments/', storage=content_storage)
+    blob = models.ForeignKey(Blob, on_delete=models.SET_NULL, null=True, blank=True, related_name='attachments')
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    variants = models.JSONField(default=dict, blank=True, help_text="Image variant storage names, e.g. {'thumbnail': ..., 'web': ...}")
+    processed_at = models.DateTimeField(null=True, blank=True)
+    text_indexed_at = models.DateTimeField(null=True, blank=True, help_text="When document text was added to the duplicate index")
+    text_chunks = models.PositiveIntegerField(default=0)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
@@ -67,9 +118,12 @@ class Attachment(models.Model):
 class ResolutionDocument(models.Model):
     """Documents uploaded by officers as proof of resolution"""
     petition = models.ForeignKey(Petition, on_delete=models.CASCADE, related_name='resolution_documents')
-    file = models.FileField(upload_to='resolutions/')
+    file = models.FileField(upload_to='resolutions/', storage=content_storage)
+    blob = models.ForeignKey(Blob, on_delete=models.SET_NULL, null=True, blank=True, related_name='resolution_documents')
     description = models.TextField(blank=True, help_text="Description of the resolution document")
     uploaded_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True)
+    text_indexed_at = models.DateTimeField(null=True, blank=True, help_text="When document text was added to the duplicate index")
+    text_chunks = models.PositiveIntegerField(default=0)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
@@ -97,3 +151,33 @@ class AuditLog(models.Model):
 
     def __str__(self):
         return f"{self.action} on Petition #{self.petition.id} by {self.user}"
+
+class PetitionEvent(models.Model):
+    """Change feed for real-time dashboards; the sequence is the client's `since` cursor"""
+    class Type(models.TextChoices):
+        CREATED = 'CREATED', 'Created'
+        STATUS_CHANGED = 'STATUS_CHANGED', 'Status Changed'
+        ASSIGNED = 'ASSIGNED', 'Assigned to Officer'
+        DELETED = 'DELETED', 'Deleted'
+
+    # Plain ids rather than foreign keys: events outlive deleted petitions
+    petition_id = models.BigIntegerField()
+    citizen_id = models.BigIntegerField(null=True, db_index=True)
+    department_id = models.BigIntegerField(null=True, db_index=True)
+    officer_id = models.BigIntegerField(null=True, db_index=True)
+    type = models.CharField(max_length=20, choices=Type.choices)
+    data = models.JSONField(default=dict, encoder=DjangoJSONEncoder, help_text="Changed petition fields")
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    # Assigned after commit, in commit order (ids follow insert order, which
+    # concurrent transactions can commit out of)
+    sequence = models.BigIntegerField(null=True, unique=True)
+
+    class Meta:
+        ordering = ['sequence']
+
+    def __str__(self):
+        return f"{self.type} on Petition #{self.petition_id}"
+
+class PetitionEventCounter(models.Model):
+    """Single row holding the last PetitionEvent sequence handed out"""
+    value = models.BigIntegerField(default=0)
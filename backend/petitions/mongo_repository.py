@@ -7,21 +7,95 @@ Handles Petition data storage and retrieval in MongoDB.
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from bson import ObjectId
-from config.mongodb import get_collection
+from pymongo import UpdateOne, InsertOne, ASCENDING, DESCENDING
+from django.conf import settings
+from config.mongodb import get_collection, get_async_collection, bulk_write_in_batches
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 
+PENDING_STATUSES = ['SUBMITTED', 'UNDER_REVIEW', 'ASSIGNED', 'IN_PROGRESS']
+DEFAULT_INLINE_REMARKS_LIMIT = 20
+
+def _inline_remarks_push(*remarks: Dict) -> Dict:
+    """$push spec that keeps only the latest N remarks inline on the petition."""
+    limit = settings.MONGODB_SETTINGS.get('inline_remarks_limit', DEFAULT_INLINE_REMARKS_LIMIT)
+    return {'$each': list(remarks), '$slice': -limit}
+
+def _remarks_page(count: int, page: int, page_size: int, results: List[Dict]) -> Dict:
+    return {'count': count, 'page': page, 'page_size': page_size, 'results': results}
+
 class PetitionRepository:
     """Repository for Petition operations in MongoDB."""
     
     COLLECTION_NAME = 'petitions'
+    REMARKS_COLLECTION_NAME = 'petition_remarks'
+    _remarks_indexed = False
     
     @staticmethod
     def _get_collection():
         """Get petitions collection."""
         return get_collection(PetitionRepository.COLLECTION_NAME)
     
+    @staticmethod
+    def _get_remarks_collection():
+        """Get the time-ordered remarks collection (full remark history)."""
+        collection = get_collection(PetitionRepository.REMARKS_COLLECTION_NAME)
+        if collection is not None and not PetitionRepository._remarks_indexed:
+            collection.create_index([('petition_oid', ASCENDING), ('timestamp', DESCENDING)])
+            PetitionRepository._remarks_indexed = True
+        return collection
+    
+    @staticmethod
+    def _petition_filter(petition_id) -> Dict:
+        """Match by MongoDB ObjectId, falling back to the Django petition id."""
+        if isinstance(petition_id, ObjectId):
+            return {'_id': petition_id}
+        if isinstance(petition_id, str) and ObjectId.is_valid(petition_id):
+            return {'_id': ObjectId(petition_id)}
+        return {'petition_id': int(petition_id)}
+    
+    @staticmethod
+    def _valid_petition_filter(petition_id, invalid: List) -> Optional[Dict]:
+        """_petition_filter that records malformed ids in ``invalid`` instead of raising."""
+        try:
+            return PetitionRepository._petition_filter(petition_id)
+        except (TypeError, ValueError, OverflowError):
+            invalid.append(petition_id)
+            return None
+    
+    @staticmethod
+    def _report_invalid_ids(summary: Dict, invalid: List) -> Dict:
+        """Add malformed petition ids to a bulk write summary's errors."""
+        if invalid:
+            summary['errors'].append({
+                'batch': None,
+                'error': 'Invalid petition id',
+                'petition_ids': invalid
+            })
+        return summary
+    
+    @staticmethod
+    def _build_petition_doc(data: Dict) -> Dict:
+        """Build a new petition document from input data."""
+        return {
+            'petition_id': data.get('petition_id'),
+            'title': data.get('title'),
+            'description': data.get('description'),
+            'citizen_id': data.get('citizen_id'),
+            'citizen_username': data.get('citizen_username'),
+            'department': data.get('department', 'General'),
+            'status': data.get('status', 'SUBMITTED'),
+            'urgency': data.get('urgency', 'LOW'),
+            'is_duplicate': data.get('is_duplicate', False),
+            'created_at': datetime.utcnow(),
+            'updated_at': datetime.utcnow(),
+            'attachments': data.get('attachments', []),
+            'remarks': [],
+            'remarks_archived': True
+        }
+    
     @staticmethod
     def create_petition(data: Dict) -> Optional[Dict]:
         """
@@ -39,20 +113,7 @@ class PetitionRepository:
             return None
         
         try:
-            petition_doc = {
-                'title': data.get('title'),
-                'description': data.get('description'),
-                'citizen_id': data.get('citizen_id'),
-                'citizen_username': data.get('citizen_username'),
-                'department': data.get('department', 'General'),
-                'status': data.get('status', 'SUBMITTED'),
-                'urgency': data.get('urgency', 'LOW'),
-                'is_duplicate': data.get('is_duplicate', False),
-                'created_at': datetime.utcnow(),
-                'updated_at': datetime.utcnow(),
-                'attachments': data.get('attachments', []),
-                'remarks': []
-            }
+            petition_doc = PetitionRepository._build_petition_doc(data)
             
             result = collection.insert_one(petition_doc)
             petition_doc['_id'] = result.inserted_id
@@ -131,28 +192,101 @@ class PetitionRepository:
             logger.error(f"Failed to update petition: {e}")
             return False
     
+    @staticmethod
+    def archive_inline_remarks(collection, remarks_collection, query: Dict) -> int:
+        """
+        Copy inline remarks of petitions created before the remarks collection
+        existed into it, so capping the inline array never drops history.
+        
+        Each petition is claimed atomically via its `remarks_archived` flag; the
+        flag is reset if the copy fails.
+        
+        Returns:
+            Number of remarks archived
+        """
+        archived = 0
+        claim = {**query, 'remarks_archived': {'$ne': True}}
+        while True:
+            petition = collection.find_one_and_update(
+                claim, {'$set': {'remarks_archived': True}}, projection={'remarks': 1}
+            )
+            if petition is None:
+                return archived
+            remarks = [{**r, 'petition_oid': petition['_id']} for r in petition.get('remarks') or []]
+            try:
+                if remarks:
+                    remarks_collection.insert_many(remarks, ordered=False)
+            except Exception:
+                collection.update_one({'_id': petition['_id']}, {'$unset': {'remarks_archived': ''}})
+                raise
+            archived += len(remarks)
+    
     @staticmethod
     def add_remark(petition_id: str, remark: Dict) -> bool:
-        """Add a remark to petition."""
+        """
+        Add a remark to petition.
+        
+        The full history is stored in the remarks collection; only the latest
+        `inline_remarks_limit` remarks stay inline on the petition document.
+        The archive is written first, so a failed inline push loses nothing.
+        """
         collection = PetitionRepository._get_collection()
-        if collection is None:
+        remarks_collection = PetitionRepository._get_remarks_collection()
+        if collection is None or remarks_collection is None:
             return False
         
         try:
             remark['timestamp'] = datetime.utcnow()
             
-            result = collection.update_one(
-                {'_id': ObjectId(petition_id)},
+            petition = collection.find_one(PetitionRepository._petition_filter(petition_id), {'_id': 1})
+            if petition is None:
+                return False
+            
+            PetitionRepository.archive_inline_remarks(collection, remarks_collection, {'_id': petition['_id']})
+            remarks_collection.insert_one({**remark, 'petition_oid': petition['_id']})
+            collection.update_one(
+                {'_id': petition['_id']},
                 {
-                    '$push': {'remarks': remark},
+                    '$push': {'remarks': _inline_remarks_push(remark)},
                     '$set': {'updated_at': datetime.utcnow()}
                 }
             )
-            return result.modified_count > 0
+            return True
         except Exception as e:
             logger.error(f"Failed to add remark: {e}")
             return False
     
+    @staticmethod
+    def get_remarks(petition_id: str, page: int = 1, page_size: int = 20) -> Dict:
+        """
+        Get a page of a petition's remarks, newest first.
+        
+        Returns:
+            dict with 'count', 'page', 'page_size' and 'results'
+        """
+        collection = PetitionRepository._get_collection()
+        remarks_collection = PetitionRepository._get_remarks_collection()
+        if collection is None or remarks_collection is None:
+            return _remarks_page(0, page, page_size, [])
+        
+        try:
+            petition = collection.find_one(PetitionRepository._petition_filter(petition_id), {'_id': 1})
+            if petition is None:
+                return _remarks_page(0, page, page_size, [])
+            
+            query = {'petition_oid': petition['_id']}
+            count = remarks_collection.count_documents(query)
+            results = list(
+                remarks_collection.find(query, {'_id': 0, 'petition_oid': 0})
+                .sort('timestamp', -1)
+                .skip((page - 1) * page_size)
+                .limit(page_size)
+            )
+            return _remarks_page(count, page, page_size, results)
+        except Exception as e:
+            logger.error(f"Failed to get remarks: {e}")
+            return _remarks_page(0, page, page_size, [])
+    
     @staticmethod
     def delete_petition(petition_id: str) -> bool:
         """Delete petition from MongoDB."""
@@ -162,23 +296,482 @@ class PetitionRepository:
         
         try:
             result = collection.delete_one({'_id': ObjectId(petition_id)})
+            remarks_collection = PetitionRepository._get_remarks_collection()
+            if remarks_collection is not None:
+                remarks_collection.delete_many({'petition_oid': ObjectId(petition_id)})
             return result.deleted_count > 0
         except Exception as e:
             logger.error(f"Failed to delete petition: {e}")
             return False
     
     @staticmethod
-    def get_statistics() -> Dict:
-        """Get petition statistics."""
+    def get_statistics(filters: Optional[Dict] = None) -> Dict:
+        """Get petition statistics, optionally over petitions matching `filters`."""
+        collection = PetitionRepository._get_collection()
+        if collection is None:
+            return {}
+        
+        base = filters or {}
+        try:
+            total = collection.count_documents(base)
+            pending = collection.count_documents({**base, 'status': {'$in': PENDING_STATUSES}})
+            resolved = collection.count_documents({**base, 'status': 'RESOLVED'})
+            critical = collection.count_documents({**base, 'urgency': 'CRITICAL'})
+            
+            return {
+                'total': total,
+                'pending': pending,
+                'resolved': resolved,
+                'critical': critical
+            }
+        except Exception as e:
+            logger.error(f"Failed to get statistics: {e}")
+            return {}
+    
+    @staticmethod
+    def bulk_upsert_petitions(petitions: List[Dict], batch_size: Optional[int] = None) -> Dict:
+        """
+        Insert or update many petitions keyed by their Django ``petition_id``.
+        
+        Items without a valid integer ``petition_id`` are skipped and reported.
+        A ``remarks`` list is appended to the petition's remark history via
+        bulk_add_remarks (archive plus capped inline copy), so re-running a
+        backfill with the same remarks appends them again.
+        
+        Args:
+            petitions: Petition dicts, each containing 'petition_id'
+            batch_size: Operations per bulk_write batch
+        
+        Returns:
+            Bulk write summary with per-batch errors (including invalid
+            petition ids) and an 'archived' count of remarks written
+        """
+        now = datetime.utcnow()
+        operations = []
+        remarks = []
+        invalid = []
+        invalid_remarks = []
+        
+        for data in petitions:
+            petition_id = data.get('petition_id')
+            try:
+                if isinstance(petition_id, bool):
+                    raise TypeError(petition_id)
+                petition_id = int(petition_id)
+            except (TypeError, ValueError, OverflowError):
+                invalid.append(petition_id)
+                continue
+            
+            item_remarks = data.get('remarks') or []
+            if not isinstance(item_remarks, list) or not all(isinstance(r, dict) for r in item_remarks):
+                invalid_remarks.append(petition_id)
+                continue
+            
+            fields = {k: v for k, v in data.items() if k not in ('_id', 'remarks', 'created_at')}
+            fields['petition_id'] = petition_id
+            fields['updated_at'] = now
+            operations.append(UpdateOne(
+                {'petition_id': petition_id},
+                {
+                    '$set': fields,
+                    '$setOnInsert': {
+                        'created_at': data.get('created_at', now),
+                        'remarks': [],
+                        'remarks_archived': True
+                    }
+                },
+                upsert=True
+            ))
+            remarks += [{'petition_id': petition_id, 'remark': remark} for remark in item_remarks]
+        
+        summary = bulk_write_in_batches(PetitionRepository._get_collection(), operations, batch_size)
+        summary['archived'] = 0
+        if remarks:
+            remarks_summary = PetitionRepository.bulk_add_remarks(remarks, batch_size)
+            summary['archived'] = remarks_summary.get('archived', 0)
+            summary['errors'].extend(remarks_summary['errors'])
+        if invalid_remarks:
+            summary['errors'].append({
+                'batch': None,
+                'error': 'Remarks must be a list of remark documents',
+                'petition_ids': invalid_remarks
+            })
+        return PetitionRepository._report_invalid_ids(summary, invalid)
+    
+    @staticmethod
+    def bulk_update_status(updates: List[Dict], batch_size: Optional[int] = None) -> Dict:
+        """
+        Update status (and optionally urgency) for many petitions.
+        
+        Args:
+            updates: Dicts with 'petition_id', 'status' and optional 'urgency'
+            batch_size: Operations per bulk_write batch
+        
+        Returns:
+            Bulk write summary with per-batch errors and any invalid petition ids
+        """
+        now = datetime.utcnow()
+        operations = []
+        invalid = []
+        
+        for update in updates:
+            query = PetitionRepository._valid_petition_filter(update['petition_id'], invalid)
+            if query is None:
+                continue
+            fields = {'status': update['status'], 'updated_at': now}
+            if 'urgency' in update:
+                fields['urgency'] = update['urgency']
+            operations.append(UpdateOne(query, {'$set': fields}))
+        
+        summary = bulk_write_in_batches(PetitionRepository._get_collection(), operations, batch_size)
+        return PetitionRepository._report_invalid_ids(summary, invalid)
+    
+    @staticmethod
+    def bulk_update_triage(updates: List[Dict], batch_size: Optional[int] = None) -> Dict:
+        """
+        Update department and urgency for many existing petitions (no upsert).
+        
+        Args:
+            updates: Dicts with 'petition_id', 'department' and 'urgency'
+            batch_size: Operations per bulk_write batch
+        
+        Returns:
+            Bulk write summary with per-batch errors and any invalid petition ids
+        """
+        now = datetime.utcnow()
+        operations = []
+        invalid = []
+        
+        for update in updates:
+            query = PetitionRepository._valid_petition_filter(update['petition_id'], invalid)
+            if query is None:
+                continue
+            operations.append(UpdateOne(query, {'$set': {
+                'department': update['department'],
+                'urgency': update['urgency'],
+                'updated_at': now
+            }}))
+        
+        summary = bulk_write_in_batches(PetitionRepository._get_collection(), operations, batch_size)
+        return PetitionRepository._report_invalid_ids(summary, invalid)
+    
+    @staticmethod
+    def rename_department(old_name: str, new_name: str) -> int:
+        """
+        Re-point all petitions from one department name to another.
+        
+        Returns:
+            Number of petitions updated
+        """
+        try:
+            collection = PetitionRepository._get_collection()
+            result = collection.update_many(
+                {'department': old_name},
+                {'$set': {'department': new_name, 'updated_at': datetime.utcnow()}}
+            )
+            return result.modified_count
+        except Exception as e:
+            logger.error(f"❌ Error renaming department {old_name!r}: {e}")
+            return 0
+    
+    @staticmethod
+    def _resolve_object_ids(collection, petition_ids: List) -> Dict:
+        """Map petition identifiers (ObjectId or Django id) to petition ObjectIds."""
+        resolved = {}
+        django_ids = {}
+        
+        for petition_id in petition_ids:
+            try:
+                query = PetitionRepository._petition_filter(petition_id)
+            except (TypeError, ValueError):
+                continue
+            if '_id' in query:
+                resolved[petition_id] = query['_id']
+            else:
+                django_ids[petition_id] = query['petition_id']
+        
+        if django_ids:
+            by_django_id = {
+                doc['petition_id']: doc['_id']
+                for doc in collection.find(
+                    {'petition_id': {'$in': list(django_ids.values())}},
+                    {'_id': 1, 'petition_id': 1}
+                )
+            }
+            for petition_id, django_id in django_ids.items():
+                if django_id in by_django_id:
+                    resolved[petition_id] = by_django_id[django_id]
+        
+        return resolved
+    
+    @staticmethod
+    def bulk_add_remarks(remarks: List[Dict], batch_size: Optional[int] = None) -> Dict:
+        """
+        Append remarks to many petitions.
+        
+        Each remark is archived in the remarks collection and then pushed onto
+        the petition's capped inline array.
+        
+        Args:
+            remarks: Dicts with 'petition_id' and 'remark' (the remark document)
+            batch_size: Operations per bulk_write batch
+        
+        Returns:
+            Bulk write summary with per-batch errors (including invalid or
+            unknown petition ids) and an 'archived' count
+        """
         collection = PetitionRepository._get_collection()
+        remarks_collection = PetitionRepository._get_remarks_collection()
+        if collection is None or remarks_collection is None:
+            return bulk_write_in_batches(None, [], batch_size)
+        
+        now = datetime.utcnow()
+        invalid = []
+        remarks = [
+            item for item in remarks
+            if PetitionRepository._valid_petition_filter(item['petition_id'], invalid) is not None
+        ]
+        object_ids = PetitionRepository._resolve_object_ids(
+            collection, [item['petition_id'] for item in remarks]
+        )
+        inline_operations = []
+        archive_operations = []
+        missing = []
+        
+        for item in remarks:
+            petition_oid = object_ids.get(item['petition_id'])
+            if petition_oid is None:
+                missing.append(item['petition_id'])
+                continue
+            
+            remark = dict(item['remark'])
+            remark.setdefault('timestamp', now)
+            inline_operations.append(UpdateOne(
+                {'_id': petition_oid},
+                {
+                    '$push': {'remarks': _inline_remarks_push(remark)},
+                    '$set': {'updated_at': now}
+                }
+            ))
+            archive_operations.append(InsertOne({**remark, 'petition_oid': petition_oid}))
+        
+        PetitionRepository.archive_inline_remarks(
+            collection, remarks_collection, {'_id': {'$in': list(set(object_ids.values()))}}
+        )
+        archive_summary = bulk_write_in_batches(remarks_collection, archive_operations, batch_size)
+        summary = bulk_write_in_batches(collection, inline_operations, batch_size)
+        summary['archived'] = archive_summary['inserted']
+        summary['errors'].extend(archive_summary['errors'])
+        if missing:
+            summary['errors'].append({
+                'batch': None,
+                'error': 'Petition not found',
+                'petition_ids': missing
+            })
+        
+        return PetitionRepository._report_invalid_ids(summary, invalid)
+
+
+class AsyncPetitionRepository:
+    """
+    Async repository for Petition operations in MongoDB.
+    
+    Mirrors PetitionRepository for ASGI views so Mongo I/O does not block the
+    event loop. Bulk operations stay on the sync repository (offline jobs).
+    """
+    
+    COLLECTION_NAME = PetitionRepository.COLLECTION_NAME
+    
+    REMARKS_COLLECTION_NAME = PetitionRepository.REMARKS_COLLECTION_NAME
+    
+    @staticmethod
+    async def _get_collection():
+        """Get petitions collection."""
+        return await get_async_collection(AsyncPetitionRepository.COLLECTION_NAME)
+    
+    @staticmethod
+    async def _get_remarks_collection():
+        """Get the time-ordered remarks collection (indexed by the sync repository)."""
+        return await get_async_collection(AsyncPetitionRepository.REMARKS_COLLECTION_NAME)
+    
+    @staticmethod
+    async def create_petition(data: Dict) -> Optional[Dict]:
+        """Create a new petition in MongoDB."""
+        collection = await AsyncPetitionRepository._get_collection()
+        if collection is None:
+            logger.error("MongoDB collection not available")
+            return None
+        
+        try:
+            petition_doc = PetitionRepository._build_petition_doc(data)
+            
+            result = await collection.insert_one(petition_doc)
+            petition_doc['_id'] = result.inserted_id
+            
+            logger.info(f"✅ Petition created in MongoDB: {petition_doc['_id']}")
+            return petition_doc
+            
+        except Exception as e:
+            logger.error(f"Failed to create petition: {e}")
+            return None
+    
+    @staticmethod
+    async def get_petition_by_id(petition_id: str) -> Optional[Dict]:
+        """Get petition by MongoDB ObjectId."""
+        collection = await AsyncPetitionRepository._get_collection()
+        if collection is None:
+            return None
+        
+        try:
+            return await collection.find_one({'_id': ObjectId(petition_id)})
+        except Exception:
+            return None
+    
+    @staticmethod
+    async def get_petitions_by_citizen(citizen_id: str) -> List[Dict]:
+        """Get all petitions for a specific citizen."""
+        collection = await AsyncPetitionRepository._get_collection()
+        if collection is None:
+            return []
+        
+        cursor = collection.find({'citizen_id': citizen_id}).sort('created_at', -1)
+        return await cursor.to_list(length=None)
+    
+    @staticmethod
+    async def get_all_petitions(filters: Optional[Dict] = None) -> List[Dict]:
+        """Get all petitions with optional filters."""
+        collection = await AsyncPetitionRepository._get_collection()
+        if collection is None:
+            return []
+        
+        query = filters if filters else {}
+        cursor = collection.find(query).sort('created_at', -1)
+        return await cursor.to_list(length=None)
+    
+    @staticmethod
+    async def update_petition(petition_id: str, updates: Dict) -> bool:
+        """Update petition document."""
+        collection = await AsyncPetitionRepository._get_collection()
+        if collection is None:
+            return False
+        
+        try:
+            updates['updated_at'] = datetime.utcnow()
+            
+            result = await collection.update_one(
+                {'_id': ObjectId(petition_id)},
+                {'$set': updates}
+            )
+            return result.modified_count > 0
+        except Exception as e:
+            logger.error(f"Failed to update petition: {e}")
+            return False
+    
+    @staticmethod
+    async def _archive_inline_remarks(collection, remarks_collection, petition_oid) -> None:
+        """Async PetitionRepository.archive_inline_remarks for one petition."""
+        petition = await collection.find_one_and_update(
+            {'_id': petition_oid, 'remarks_archived': {'$ne': True}},
+            {'$set': {'remarks_archived': True}},
+            projection={'remarks': 1}
+        )
+        if petition is None:
+            return
+        remarks = [{**r, 'petition_oid': petition_oid} for r in petition.get('remarks') or []]
+        try:
+            if remarks:
+                await remarks_collection.insert_many(remarks, ordered=False)
+        except Exception:
+            await collection.update_one({'_id': petition_oid}, {'$unset': {'remarks_archived': ''}})
+            raise
+    
+    @staticmethod
+    async def add_remark(petition_id: str, remark: Dict) -> bool:
+        """Add a remark to petition (archived first, then a capped inline copy)."""
+        collection = await AsyncPetitionRepository._get_collection()
+        remarks_collection = await AsyncPetitionRepository._get_remarks_collection()
+        if collection is None or remarks_collection is None:
+            return False
+        
+        try:
+            remark['timestamp'] = datetime.utcnow()
+            
+            petition = await collection.find_one(PetitionRepository._petition_filter(petition_id), {'_id': 1})
+            if petition is None:
+                return False
+            
+            await AsyncPetitionRepository._archive_inline_remarks(collection, remarks_collection, petition['_id'])
+            await remarks_collection.insert_one({**remark, 'petition_oid': petition['_id']})
+            await collection.update_one(
+                {'_id': petition['_id']},
+                {
+                    '$push': {'remarks': _inline_remarks_push(remark)},
+                    '$set': {'updated_at': datetime.utcnow()}
+                }
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Failed to add remark: {e}")
+            return False
+    
+    @staticmethod
+    async def get_remarks(petition_id: str, page: int = 1, page_size: int = 20) -> Dict:
+        """Get a page of a petition's remarks, newest first."""
+        collection = await AsyncPetitionRepository._get_collection()
+        remarks_collection = await AsyncPetitionRepository._get_remarks_collection()
+        if collection is None or remarks_collection is None:
+            return _remarks_page(0, page, page_size, [])
+        
+        try:
+            petition = await collection.find_one(PetitionRepository._petition_filter(petition_id), {'_id': 1})
+            if petition is None:
+                return _remarks_page(0, page, page_size, [])
+            
+            query = {'petition_oid': petition['_id']}
+            count = await remarks_collection.count_documents(query)
+            cursor = (
+                remarks_collection.find(query, {'_id': 0, 'petition_oid': 0})
+                .sort('timestamp', -1)
+                .skip((page - 1) * page_size)
+                .limit(page_size)
+            )
+            return _remarks_page(count, page, page_size, await cursor.to_list(length=None))
+        except Exception as e:
+            logger.error(f"Failed to get remarks: {e}")
+            return _remarks_page(0, page, page_size, [])
+    
+    @staticmethod
+    async def delete_petition(petition_id: str) -> bool:
+        """Delete petition from MongoDB."""
+        collection = await AsyncPetitionRepository._get_collection()
+        if collection is None:
+            return False
+        
+        try:
+            result = await collection.delete_one({'_id': ObjectId(petition_id)})
+            remarks_collection = await AsyncPetitionRepository._get_remarks_collection()
+            if remarks_collection is not None:
+                await remarks_collection.delete_many({'petition_oid': ObjectId(petition_id)})
+            return result.deleted_count > 0
+        except Exception as e:
+            logger.error(f"Failed to delete petition: {e}")
+            return False
+    
+    @staticmethod
+    async def get_statistics(filters: Optional[Dict] = None) -> Dict:
+        """Get petition statistics (counts run concurrently), optionally over `filters`."""
+        collection = await AsyncPetitionRepository._get_collection()
         if collection is None:
             return {}
         
+        base = filters or {}
         try:
-            total = collection.count_documents({})
-            pending = collection.count_documents({'status': {'$in': ['SUBMITTED', 'UNDER_REVIEW', 'ASSIGNED', 'IN_PROGRESS']}})
-            resolved = collection.count_documents({'status': 'RESOLVED'})
-            critical = collection.count_documents({'urgency': 'CRITICAL'})
+            total, pending, resolved, critical = await asyncio.gather(
+                collection.count_documents(base),
+                collection.count_documents({**base, 'status': {'$in': PENDING_STATUSES}}),
+                collection.count_documents({**base, 'status': 'RESOLVED'}),
+                collection.count_documents({**base, 'urgency': 'CRITICAL'}),
+            )
             
             return {
                 'total': total,
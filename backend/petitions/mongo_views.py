@@ -0,0 +1,93 @@
+"""
+MongoDB Read Endpoints
+
+List and statistics endpoints served straight from the MongoDB petition store.
+Each endpoint has a sync DRF view (WSGI) and an async Django view (ASGI) that
+uses AsyncPetitionRepository so Mongo I/O does not block the event loop.
+"""
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from .mongo_repository import PetitionRepository, AsyncPetitionRepository
+
+def _serialize_petition(doc):
+    """Make a petition document JSON-safe."""
+    doc = dict(doc)
+    doc['_id'] = str(doc['_id'])
+    return doc
+
+def _role_filters(user):
+    """Mongo filters limiting a user to the petitions their role may see."""
+    if user.role == 'CITIZEN':
+        return {'citizen_id': str(user.id)}
+    return {}
+
+def _list_filters(user, query_params):
+    """Build Mongo filters for the requesting user's role and query params."""
+    filters = _role_filters(user)
+
+    for field in ('status', 'department', 'urgency'):
+        value = query_params.get(field)
+        if value:
+            filters[field] = value
+
+    return filters
+
+class MongoPetitionListView(APIView):
+    """List petitions from MongoDB (sync)."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        filters = _list_filters(request.user, request.query_params)
+        petitions = PetitionRepository.get_all_petitions(filters)
+        return Response([_serialize_petition(p) for p in petitions])
+
+class MongoPetitionStatsView(APIView):
+    """Petition statistics from MongoDB (sync), over the petitions the user may see."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response(PetitionRepository.get_statistics(_role_filters(request.user)))
+
+async def _authenticate(request):
+    """Authenticate a plain Django request with the JWT header."""
+    try:
+        result = await sync_to_async(JWTAuthentication().authenticate)(request)
+    except AuthenticationFailed:
+        return None
+    return result[0] if result else None
+
+def _unauthorized():
+    return JsonResponse(
+        {'detail': 'Authentication credentials were not provided.'},
+        status=401
+    )
+
+async def async_petition_list(request):
+    """List petitions from MongoDB (async)."""
+    if request.method != 'GET':
+        return JsonResponse({'detail': f'Method "{request.method}" not allowed.'}, status=405)
+
+    user = await _authenticate(request)
+    if user is None:
+        return _unauthorized()
+
+    filters = _list_filters(user, request.GET)
+    petitions = await AsyncPetitionRepository.get_all_petitions(filters)
+    return JsonResponse([_serialize_petition(p) for p in petitions], safe=False)
+
+async def async_petition_stats(request):
+    """Petition statistics from MongoDB (async), over the petitions the user may see."""
+    if request.method != 'GET':
+        return JsonResponse({'detail': f'Method "{request.method}" not allowed.'}, status=405)
+
+    user = await _authenticate(request)
+    if user is None:
+        return _unauthorized()
+
+    return JsonResponse(await AsyncPetitionRepository.get_statistics(_role_filters(user)))
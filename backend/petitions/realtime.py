@@ -0,0 +1,259 @@
+"""
+WebSocket Push for Petition Updates
+
+ASGI WebSocket endpoint (routed in config/asgi.py) that pushes petition
+events (see petitions.events) to dashboards, so they apply deltas instead
+of re-fetching the whole petition list.
+
+    ws://<host>/ws/petitions/?token=<JWT access token>&since=<cursor>
+
+Server messages (JSON):
+    {"type": "hello", "cursor": N}      sent after connecting
+    {"type": "event", "event": {...}}   a petition change, event["id"] (its sequence) is the new cursor
+    {"type": "resync", "cursor": N}     events were missed: fetch /api/petitions/changes/?since=
+    {"type": "pong"}                    reply to {"type": "ping"}
+
+With `since`, events after that cursor are replayed before live ones.
+
+Each process holds one Redis subscription (started with the first
+connection) and fans events out to its connections whose viewer scope
+matches. A connection whose queue fills up (slow client) gets a resync
+instead of unbounded buffering.
+
+Sequences are dense and follow commit order (see petitions.events), but
+publishers race to Redis, so N+1 can arrive before N. The hub delivers in
+sequence order: on a gap it loads the missing events from the database
+(they are committed before anything later is sequenced) and drops the
+late copies when they arrive.
+"""
+
+import asyncio
+import json
+from urllib.parse import parse_qs
+from asgiref.sync import sync_to_async
+from .events import events_settings, viewer_scope, event_visible, latest_cursor, events_since, events_in_range
+import logging
+
+logger = logging.getLogger(__name__)
+
+WEBSOCKET_PATH = '/ws/petitions/'
+CLOSE_UNAUTHORIZED = 4401
+REDIS_RETRY_SECONDS = 2
+SUBSCRIBE_TIMEOUT_SECONDS = 5
+
+class _Connection:
+    def __init__(self, scope, queue_size):
+        self.scope = scope
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.last_id = 0
+        self.overflowed = False
+
+    def offer(self, message):
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    def force_resync(self):
+        self.overflowed = True
+        try:
+            # Wake the sender if it is waiting on an empty queue
+            self.queue.put_nowait({'type': 'wake'})
+        except asyncio.QueueFull:
+            pass
+
+class EventHub:
+    """Per-process fan-out of petition events to WebSocket connections."""
+
+    def __init__(self):
+        self._connections = set()
+        self._loop = None
+        self._listener = None
+        self._lock = None
+        self._ready = None
+        self._next_sequence = None
+
+    def connect(self, scope):
+        self._loop = asyncio.get_running_loop()
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+            self._ready = asyncio.Event()
+        connection = _Connection(scope, events_settings()['queue_size'])
+        self._connections.add(connection)
+        config = events_settings()
+        if not config['redis_url']:
+            self._ready.set()
+        elif self._listener is None or self._listener.done():
+            self._ready.clear()
+            self._listener = asyncio.create_task(self._listen(config['redis_url'], config['channel']))
+        return connection
+
+    async def wait_ready(self, timeout=SUBSCRIBE_TIMEOUT_SECONDS):
+        """Wait until published events reach this process (the subscription is up)."""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def disconnect(self, connection):
+        self._connections.discard(connection)
+
+    def _fan_out(self, event):
+        message = {'type': 'event', 'event': event}
+        for connection in list(self._connections):
+            if event_visible(connection.scope, event):
+                connection.offer(message)
+
+    async def dispatch(self, event):
+        """Deliver an event to matching connections, in sequence order."""
+        async with self._lock:
+            sequence = event['id']
+            if self._next_sequence is not None:
+                if sequence < self._next_sequence:
+                    return  # already delivered (gap fill)
+                if sequence - self._next_sequence > events_settings()['replay_limit']:
+                    self.resync_all()
+                elif sequence > self._next_sequence:
+                    try:
+                        missing = await sync_to_async(events_in_range)(self._next_sequence, sequence)
+                    except Exception as e:
+                        logger.warning(f"⚠️ Could not load missed petition events: {e}")
+                        self.resync_all()
+                        missing = []
+                    for earlier in missing:
+                        self._fan_out(earlier)
+            self._fan_out(event)
+            self._next_sequence = sequence + 1
+
+    def resync_all(self):
+        for connection in list(self._connections):
+            connection.force_resync()
+
+    def publish_local(self, event):
+        """Thread-safe: deliver an event published in this process."""
+        if self._loop is not None and not self._loop.is_closed():
+            asyncio.run_coroutine_threadsafe(self.dispatch(event), self._loop)
+
+    async def _listen(self, url, channel):
+        import redis.asyncio as aioredis
+
+        failed = False
+        while self._connections:
+            client = aioredis.from_url(url)
+            try:
+                async with client.pubsub() as pubsub:
+                    await pubsub.subscribe(channel)
+                    # Everything after this cursor is published after we subscribed
+                    cursor = await sync_to_async(latest_cursor)()
+                    async with self._lock:
+                        self._next_sequence = cursor + 1
+                    if failed:
+                        # Events published while disconnected were lost
+                        self.resync_all()
+                        failed = False
+                    self._ready.set()
+                    while self._connections:
+                        message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=5.0)
+                        if message and message['type'] == 'message':
+                            await self.dispatch(json.loads(message['data']))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                failed = True
+                self._ready.clear()
+                logger.warning(f"⚠️ Petition event subscription lost: {e}")
+                await asyncio.sleep(REDIS_RETRY_SECONDS)
+            finally:
+                await client.aclose()
+
+hub = EventHub()
+
+async def _authenticate(raw_token):
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    from rest_framework_simplejwt.exceptions import InvalidToken, AuthenticationFailed
+
+    if not raw_token:
+        return None
+    authentication = JWTAuthentication()
+    try:
+        validated = authentication.get_validated_token(raw_token)
+        return await sync_to_async(authentication.get_user)(validated)
+    except (InvalidToken, AuthenticationFailed):
+        return None
+
+async def _send_json(send, message):
+    from django.core.serializers.json import DjangoJSONEncoder
+    await send({'type': 'websocket.send', 'text': json.dumps(message, cls=DjangoJSONEncoder)})
+
+async def _read_client(receive, connection):
+    """Handle client messages until the socket closes."""
+    while True:
+        message = await receive()
+        if message['type'] == 'websocket.disconnect':
+            return
+        if message['type'] == 'websocket.receive':
+            try:
+                data = json.loads(message.get('text') or '{}')
+            except ValueError:
+                continue
+            if data.get('type') == 'ping':
+                connection.offer({'type': 'pong'})
+
+async def websocket_application(scope, receive, send):
+    """ASGI app for WEBSOCKET_PATH."""
+    message = await receive()
+    if message['type'] != 'websocket.connect':
+        return
+
+    params = parse_qs(scope.get('query_string', b'').decode())
+    user = await _authenticate(params.get('token', [''])[0])
+    if user is None:
+        await send({'type': 'websocket.close', 'code': CLOSE_UNAUTHORIZED})
+        return
+    await send({'type': 'websocket.accept'})
+
+    # Register (and wait for the subscription) before replaying, so nothing
+    # published in between is missed
+    connection = hub.connect(viewer_scope(user))
+    reader = asyncio.create_task(_read_client(receive, connection))
+    try:
+        if not await hub.wait_ready():
+            connection.force_resync()
+        since = params.get('since', [''])[0]
+        if since.isdigit():
+            replay = await sync_to_async(events_since)(user, int(since))
+            if replay['reset'] or replay['has_more']:
+                await _send_json(send, {'type': 'resync', 'cursor': int(since)})
+            else:
+                for event in replay['events']:
+                    await _send_json(send, {'type': 'event', 'event': event})
+                    connection.last_id = event['id']
+        await _send_json(send, {'type': 'hello', 'cursor': await sync_to_async(latest_cursor)()})
+
+        while not reader.done():
+            if connection.overflowed:
+                while not connection.queue.empty():
+                    connection.queue.get_nowait()
+                connection.overflowed = False
+                await _send_json(send, {'type': 'resync', 'cursor': connection.last_id})
+                continue
+
+            getter = asyncio.create_task(connection.queue.get())
+            done, _ = await asyncio.wait({getter, reader}, return_when=asyncio.FIRST_COMPLETED)
+            if getter not in done:
+                getter.cancel()
+                break
+            message = getter.result()
+            if message['type'] == 'wake':
+                continue
+            if message['type'] == 'event':
+                if message['event']['id'] <= connection.last_id:
+                    continue
+                connection.last_id = message['event']['id']
+            await _send_json(send, message)
+    finally:
+        hub.disconnect(connection)
+        reader.cancel()
@@ -0,0 +1,138 @@
+"""
+Petition Response Caching
+
+Caches serialized payloads of the petition list, detail and audit-log
+endpoints, keyed by the caller's scope (the user for citizens, the role for
+officers and admins) and by version keys:
+- petitions:cache:generation   bumped by bulk changes (merges, re-triage)
+- petitions:cache:list         bumped by any petition change
+- petitions:cache:petition:<id> bumped when that petition, its attachments,
+                               documents or audit trail change
+
+Writers call invalidate_petitions() after commit, so a changed petition gets
+new version keys and stale entries simply stop being read. Each response
+carries an ETag derived from the versions; a matching If-None-Match returns
+304 without serializing anything.
+
+Signed media URLs in payloads expire (see petitions.storage), so the signing
+window is part of the version and entries roll over with it.
+
+Writers run in other processes too (Celery image processing, re-triage and
+merge commands), so version keys must live in a cache every process shares.
+With a process-local backend (LocMem, the default without REDIS_CACHE_URL)
+their bumps would never reach the web server, and caching stays off.
+"""
+
+import hashlib
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+from .storage import DEFAULT_URL_TTL_SECONDS
+import logging
+
+logger = logging.getLogger(__name__)
+
+GENERATION_KEY = 'petitions:cache:generation'
+LIST_VERSION_KEY = 'petitions:cache:list'
+
+DEFAULT_RESPONSE_CACHE = {
+    'enabled': True,
+    'timeout': 600,     # seconds a payload stays cached
+}
+
+PROCESS_LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+_warned_local_cache = False
+
+def shared_cache_configured():
+    backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+    return backend not in PROCESS_LOCAL_BACKENDS
+
+def response_cache_settings():
+    global _warned_local_cache
+    config = {**DEFAULT_RESPONSE_CACHE, **getattr(settings, 'RESPONSE_CACHE', {})}
+    if config['enabled'] and not shared_cache_configured():
+        if not _warned_local_cache:
+            logger.warning("⚠️ Response cache disabled: the default cache is process-local (set REDIS_CACHE_URL)")
+            _warned_local_cache = True
+        config['enabled'] = False
+    return config
+
+def _petition_version_key(petition_id):
+    return f'petitions:cache:petition:{petition_id}'
+
+def _bump(keys):
+    try:
+        cache.set_many({key: time.time_ns() for key in keys}, timeout=None)
+    except Exception as e:
+        logger.warning(f"⚠️ Response cache invalidation failed: {e}")
+
+def invalidate_petitions(*petition_ids):
+    """Invalidate the list and the given petitions once the transaction commits."""
+    keys = [LIST_VERSION_KEY] + [_petition_version_key(pid) for pid in petition_ids]
+    transaction.on_commit(lambda: _bump(keys))
+
+def invalidate_all_petitions():
+    """Invalidate every cached petition response (bulk updates)."""
+    transaction.on_commit(lambda: _bump([GENERATION_KEY, LIST_VERSION_KEY]))
+
+def _scope(user):
+    if user.role == 'CITIZEN':
+        return f'user:{user.id}'
+    return f'role:{user.role}'
+
+def cached_response(request, kind, build, petition_id=None):
+    """
+    Serve `build()` (a DRF view call) through the response cache.
+
+    Args:
+        kind: endpoint name ('list', 'detail', 'audit_log')
+        petition_id: the petition a detail / audit-log response belongs to
+    """
+    config = response_cache_settings()
+    if not config['enabled'] or request.method != 'GET':
+        return build()
+
+    version_keys = [GENERATION_KEY, LIST_VERSION_KEY if petition_id is None else _petition_version_key(petition_id)]
+    try:
+        versions = cache.get_many(version_keys)
+    except Exception as e:
+        logger.warning(f"⚠️ Response cache unavailable: {e}")
+        return build()
+
+    url_ttl = getattr(settings, 'MEDIA_SERVING', {}).get('url_ttl_seconds', DEFAULT_URL_TTL_SECONDS)
+    fingerprint = '|'.join([
+        kind, _scope(request.user), request.get_host(), request.get_full_path(),
+        *(str(versions.get(key, 0)) for key in version_keys),
+        str(int(time.time()) // url_ttl),
+    ])
+    digest = hashlib.sha256(fingerprint.encode()).hexdigest()[:32]
+    etag = f'"{digest}"'
+    cache_key = f'petitions:response:{digest}'
+
+    data = cache.get(cache_key)
+    if data is not None and etag in parse_etags(request.headers.get('If-None-Match', '')):
+        # Only for payloads this scope was already served, so a 304 never
+        # bypasses the permission checks in build()
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+    if data is None:
+        response = build()
+        if response.status_code != status.HTTP_200_OK:
+            return response
+        data = response.data
+        cache.set(cache_key, data, timeout=min(config['timeout'], url_ttl))
+
+    response = Response(data)
+    response['ETag'] = etag
+    # Clients must revalidate; unchanged data then costs a 304
+    response['Cache-Control'] = 'private, no-cache'
+    response['Vary'] = 'Authorization, Cookie'
+    return response
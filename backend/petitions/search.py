@@ -0,0 +1,237 @@
+"""
+Petition Full-Text Search
+
+Ranked keyword search over petition title, description and the remarks
+officers typed on status changes, backed by the database's own inverted index
+(created in migration 0008_petition_search; since 0011_search_typed_remarks
+generated audit remarks are not indexed):
+- PostgreSQL: trigger-maintained `search_vector` tsvector column with a GIN
+  index; title, description and remarks weighted A/B/C, ranked by ts_rank_cd,
+  highlighted with ts_headline
+- SQLite:     FTS5 table `petitions_petition_fts` kept in sync by triggers,
+  ranked by bm25 with the same field weighting, highlighted with
+  highlight()/snippet()
+
+Other backends fall back to an unranked icontains scan.
+
+User input never reaches the query parser verbatim: it is split into words,
+which are ANDed, and the last word is matched as a prefix.
+"""
+
+import html
+import re
+from django.db import connection
+from django.db.models import Q
+from .models import Petition
+
+HIGHLIGHT_START = '\x02'
+HIGHLIGHT_END = '\x03'
+MAX_QUERY_TERMS = 12
+WORD_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+# Dropped from match-any queries, where they would match nearly every petition
+STOPWORDS = frozenset(
+    'a an and are as at be been but by for from has have in is it its near not of on or '
+    'our the their there this to was were will with'.split()
+)
+
+# (title, description, remarks) weights
+FIELD_WEIGHTS = (10.0, 4.0, 1.0)
+
+TS_HEADLINE_TITLE = f"StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_END}, HighlightAll=true"
+TS_HEADLINE_SNIPPET = f"StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_END}, MaxFragments=2, MaxWords=30, MinWords=10"
+
+def query_terms(query):
+    return WORD_PATTERN.findall(query or '')[:MAX_QUERY_TERMS]
+
+def render_highlight(text):
+    """HTML-escape text and turn highlight markers into <mark> tags."""
+    escaped = html.escape(text or '')
+    return escaped.replace(HIGHLIGHT_START, '<mark>').replace(HIGHLIGHT_END, '</mark>')
+
+def _fts5_query(terms, match_any=False):
+    quoted = [f'"{term}"' for term in terms]
+    if match_any:
+        return ' OR '.join(quoted)
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+def _tsquery(terms, match_any=False):
+    if match_any:
+        return ' | '.join(terms)
+    parts = [f"{term}:*" if i == len(terms) - 1 else term for i, term in enumerate(terms)]
+    return ' & '.join(parts)
+
+def _ts_rank_weights():
+    # ts_rank_cd takes weights as {D, C, B, A}; D is unused
+    return '{0.1, ' + ', '.join(str(w / FIELD_WEIGHTS[0]) for w in reversed(FIELD_WEIGHTS)) + '}'
+
+def _filters(user, filters, alias):
+    """SQL WHERE fragments and params for role scoping and request filters."""
+    clauses, params = [], []
+    if user.role == 'CITIZEN':
+        clauses.append(f"{alias}.citizen_id = %s")
+        params.append(user.id)
+    if filters.get('status'):
+        statuses = filters['status']
+        clauses.append(f"{alias}.status IN ({', '.join(['%s'] * len(statuses))})")
+        params += statuses
+    if filters.get('department'):
+        clauses.append(f"{alias}.department_id IN (SELECT id FROM petitions_department WHERE name = %s)")
+        params.append(filters['department'])
+    if filters.get('urgency'):
+        clauses.append(f"{alias}.urgency = %s")
+        params.append(filters['urgency'])
+    return clauses, params
+
+def _search_sqlite(terms, user, filters, limit, offset):
+    clauses, params = _filters(user, filters, 'p')
+    where = ''.join(f" AND {clause}" for clause in clauses)
+    match = [_fts5_query(terms)]
+    weights = ', '.join(str(w) for w in FIELD_WEIGHTS)
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT COUNT(*) FROM petitions_petition_fts f JOIN petitions_petition p ON p.id = f.rowid "
+            f"WHERE petitions_petition_fts MATCH %s{where}",
+            match + params,
+        )
+        count = cursor.fetchone()[0]
+        cursor.execute(
+            f"SELECT f.rowid, -bm25(petitions_petition_fts, {weights}) AS rank, "
+            "highlight(petitions_petition_fts, 0, %s, %s), "
+            "snippet(petitions_petition_fts, -1, %s, %s, '…', 24) "
+            "FROM petitions_petition_fts f JOIN petitions_petition p ON p.id = f.rowid "
+            f"WHERE petitions_petition_fts MATCH %s{where} "
+            "ORDER BY bm25(petitions_petition_fts, " + weights + "), p.created_at DESC LIMIT %s OFFSET %s",
+            [HIGHLIGHT_START, HIGHLIGHT_END, HIGHLIGHT_START, HIGHLIGHT_END] + match + params + [limit, offset],
+        )
+        rows = cursor.fetchall()
+    return count, rows
+
+def _search_postgresql(terms, user, filters, limit, offset):
+    clauses, params = _filters(user, filters, 'p')
+    where = ''.join(f" AND {clause}" for clause in clauses)
+    tsquery = [_tsquery(terms)]
+    weights = _ts_rank_weights()
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT COUNT(*) FROM petitions_petition p "
+            f"WHERE p.search_vector @@ to_tsquery('english', %s){where}",
+            tsquery + params,
+        )
+        count = cursor.fetchone()[0]
+        # Rank and page first; ts_headline re-parses the text, so it only runs
+        # on the rows of the requested page
+        cursor.execute(
+            "SELECT hit.id, hit.rank, "
+            "ts_headline('english', hit.title, q, %s), "
+            "ts_headline('english', hit.description, q, %s) "
+            "FROM ("
+            "  SELECT p.id, p.title, p.description, p.created_at, ts_rank_cd(%s::float4[], p.search_vector, q) AS rank "
+            "  FROM petitions_petition p, to_tsquery('english', %s) q "
+            f"  WHERE p.search_vector @@ q{where} "
+            "  ORDER BY rank DESC, p.created_at DESC LIMIT %s OFFSET %s"
+            ") hit, to_tsquery('english', %s) q "
+            "ORDER BY hit.rank DESC, hit.created_at DESC",
+            [TS_HEADLINE_TITLE, TS_HEADLINE_SNIPPET, weights]
+            + tsquery + params + [limit, offset] + tsquery,
+        )
+        rows = cursor.fetchall()
+    return count, rows
+
+def _search_fallback(terms, user, filters, limit, offset):
+    queryset = Petition.objects.all() if user.role != 'CITIZEN' else Petition.objects.filter(citizen=user)
+    for term in terms:
+        queryset = queryset.filter(Q(title__icontains=term) | Q(description__icontains=term))
+    if filters.get('status'):
+        queryset = queryset.filter(status__in=filters['status'])
+    if filters.get('department'):
+        queryset = queryset.filter(department__name=filters['department'])
+    if filters.get('urgency'):
+        queryset = queryset.filter(urgency=filters['urgency'])
+    queryset = queryset.order_by('-created_at')
+    rows = [(p.id, 0.0, p.title, p.description[:200]) for p in queryset[offset:offset + limit]]
+    return queryset.count(), rows
+
+def ranked_petition_ids(user, query, filters=None, limit=100, match_any=False):
+    """
+    Ids of the best keyword matches, best first (no count or highlighting).
+
+    With match_any, any word may match (used to find petitions similar to a
+    whole title rather than exact keyword hits).
+    """
+    terms = query_terms(query)
+    if match_any:
+        terms = [term for term in WORD_PATTERN.findall(query or '') if term.lower() not in STOPWORDS][:MAX_QUERY_TERMS]
+    if not terms:
+        return []
+    clauses, params = _filters(user, filters or {}, 'p')
+    where = ''.join(f" AND {clause}" for clause in clauses)
+
+    if connection.vendor == 'sqlite':
+        weights = ', '.join(str(w) for w in FIELD_WEIGHTS)
+        sql = (
+            "SELECT f.rowid FROM petitions_petition_fts f JOIN petitions_petition p ON p.id = f.rowid "
+            f"WHERE petitions_petition_fts MATCH %s{where} "
+            f"ORDER BY bm25(petitions_petition_fts, {weights}) LIMIT %s"
+        )
+        params = [_fts5_query(terms, match_any)] + params + [limit]
+    elif connection.vendor == 'postgresql':
+        weights = _ts_rank_weights()
+        sql = (
+            "SELECT p.id FROM petitions_petition p, to_tsquery('english', %s) q "
+            f"WHERE p.search_vector @@ q{where} "
+            "ORDER BY ts_rank_cd(%s::float4[], p.search_vector, q) DESC LIMIT %s"
+        )
+        params = [_tsquery(terms, match_any)] + params + [weights, limit]
+    else:
+        _, rows = _search_fallback(terms, user, filters or {}, limit, 0)
+        return [row[0] for row in rows]
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+def search_petitions(user, query, filters=None, page=1, page_size=20):
+    """
+    Ranked petition search visible to `user`.
+
+    Args:
+        filters: optional dict with 'status' (list), 'department' (name), 'urgency'
+
+    Returns:
+        dict with 'count', 'page', 'page_size' and 'results'; each result has
+        the petition fields plus 'rank', 'title_highlight' and 'snippet'
+        (HTML-escaped, matches wrapped in <mark>)
+    """
+    terms = query_terms(query)
+    filters = filters or {}
+    if not terms:
+        return {'count': 0, 'page': page, 'page_size': page_size, 'results': []}
+
+    search = {
+        'sqlite': _search_sqlite,
+        'postgresql': _search_postgresql,
+    }.get(connection.vendor, _search_fallback)
+    count, rows = search(terms, user, filters, page_size, (page - 1) * page_size)
+
+    petitions = Petition.objects.select_related('department').in_bulk([row[0] for row in rows])
+    results = []
+    for petition_id, rank, title, snippet in rows:
+        petition = petitions.get(petition_id)
+        if petition is None:
+            continue
+        results.append({
+            'id': petition.id,
+            'title': petition.title,
+            'status': petition.status,
+            'urgency': petition.urgency,
+            'department': petition.department.name if petition.department else None,
+            'created_at': petition.created_at,
+            'rank': round(float(rank), 6),
+            'title_highlight': render_highlight(title),
+            'snippet': render_highlight(snippet),
+        })
+    return {'count': count, 'page': page, 'page_size': page_size, 'results': results}
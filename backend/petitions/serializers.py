@@ -2,9 +2,27 @@ from rest_framework import serializers
 from .models import Petition, Attachment, ResolutionDocument, AuditLog
 
 class AttachmentSerializer(serializers.ModelSerializer):
+    thumbnail_url = serializers.SerializerMethodField()
+    web_url = serializers.SerializerMethodField()
+    
     class Meta:
         model = Attachment
-        fields = ['id', 'file', 'uploaded_at']
+        fields = ['id', 'file', 'thumbnail_url', 'web_url', 'width', 'height', 'uploaded_at']
+    
+    def _variant_url(self, obj, variant):
+        """URL of a processed image variant (None until processing finished)."""
+        name = (obj.variants or {}).get(variant)
+        if not name:
+            return None
+        url = obj.file.storage.url(name)
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+    
+    def get_thumbnail_url(self, obj):
+        return self._variant_url(obj, 'thumbnail')
+    
+    def get_web_url(self, obj):
+        return self._variant_url(obj, 'web')
 
 class ResolutionDocumentSerializer(serializers.ModelSerializer):
     uploaded_by_username = serializers.CharField(source='uploaded_by.username', read_only=True)
@@ -32,6 +50,12 @@ class PetitionSerializer(serializers.ModelSerializer):
         write_only=True,
         required=False
     )
+    blob_ids = serializers.ListField(
+        child=serializers.UUIDField(),
+        write_only=True,
+        required=False,
+        help_text="Ids of completed chunked uploads to attach"
+    )
     
     class Meta:
         model = Petition
@@ -39,6 +63,6 @@ class PetitionSerializer(serializers.ModelSerializer):
             'id', 'title', 'description', 'citizen', 'citizen_username',
             'department', 'department_name', 'assigned_officer', 'assigned_officer_username',
             'status', 'urgency', 'is_duplicate', 'created_at', 'updated_at',
-            'attachments', 'resolution_documents', 'uploaded_files'
+            'attachments', 'resolution_documents', 'uploaded_files', 'blob_ids'
         ]
         read_only_fields = ['citizen', 'department', 'urgency', 'is_duplicate', 'created_at', 'updated_at']
@@ -0,0 +1,71 @@
+"""
+Content Storage Reference Counting and Attachment Processing
+
+Keeps ContentObject.ref_count in step with the rows that point at a
+content-addressed file (an attachment's image variants count too).
+Cascading and queryset deletes also send post_delete, so petition deletion
+releases its attachments.
+
+New image attachments are queued for thumbnailing, and PDF / text
+attachments and resolution documents for text indexing, once the
+transaction commits (see petitions.imaging and petitions.extraction).
+Deleting a document removes its chunks from the duplicate index.
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from petitions.models import Attachment, Blob, ResolutionDocument
+from petitions.storage import adjust_content_references
+import logging
+
+logger = logging.getLogger(__name__)
+
+def content_names(instance):
+    """Storage names referenced by an Attachment, ResolutionDocument or Blob."""
+    names = [instance.file.name]
+    names += list((getattr(instance, 'variants', None) or {}).values())
+    return names
+
+def _queue_image_processing(attachment_id):
+    from petitions.tasks import process_attachment
+    try:
+        process_attachment.delay(attachment_id)
+    except Exception as e:
+        logger.warning(f"⚠️ Could not queue image processing for attachment {attachment_id}: {e}")
+
+def _queue_text_indexing(source, document_id):
+    from petitions.tasks import index_document_text
+    try:
+        index_document_text.delay(source, document_id)
+    except Exception as e:
+        logger.warning(f"⚠️ Could not queue text indexing for {source} {document_id}: {e}")
+
+@receiver(post_save, sender=Attachment)
+@receiver(post_save, sender=ResolutionDocument)
+@receiver(post_save, sender=Blob)
+def add_content_reference(sender, instance, created, **kwargs):
+    if not created:
+        return
+    adjust_content_references(content_names(instance), 1)
+
+    if sender is Attachment:
+        from petitions.imaging import is_image_name
+        if is_image_name(instance.file.name):
+            transaction.on_commit(lambda: _queue_image_processing(instance.id))
+
+    if sender is not Blob:
+        from petitions.extraction import is_extractable_name
+        if is_extractable_name(instance.file.name):
+            source = 'attachment' if sender is Attachment else 'resolution'
+            transaction.on_commit(lambda: _queue_text_indexing(source, instance.id))
+
+@receiver(post_delete, sender=Attachment)
+@receiver(post_delete, sender=ResolutionDocument)
+@receiver(post_delete, sender=Blob)
+def release_content_reference(sender, instance, **kwargs):
+    adjust_content_references(content_names(instance), -1)
+
+    if sender is not Blob and instance.text_chunks:
+        from ai_agent.duplicate_detection import remove_document_from_index
+        remove_document_from_index('attachment' if sender is Attachment else 'resolution', instance.id)
@@ -0,0 +1,149 @@
+"""
+Hybrid Similar-Petition Search
+
+"Petitions like this one" for officers: combines vector nearest neighbours
+from the duplicate-detection index (ai_agent.duplicate_detection) with
+keyword relevance from full-text search (petitions.search) using reciprocal
+rank fusion:
+
+    score(p) = sum over rankings of 1 / (k + rank of p)
+
+RRF needs no score normalization between cosine similarity and bm25 /
+ts_rank, and petitions found by both rankings rise to the top.
+
+The vector side (embedding call + index query) runs in a background thread
+while keyword ranking runs; if it misses the latency budget the response
+uses keyword results only and lists 'vector' in `degraded`.
+"""
+
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+import time
+from django.conf import settings
+from django.db import connection
+from .models import Petition
+from .search import ranked_petition_ids
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIMILAR_SEARCH = {
+    'rrf_k': 60,
+    'candidates': 100,           # per ranking
+    'latency_budget_ms': 1500,
+    'min_similarity': 0.5,       # vector hits below this are ignored
+}
+
+_vector_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix='similar-search')
+
+def similar_search_settings():
+    return {**DEFAULT_SIMILAR_SEARCH, **getattr(settings, 'SIMILAR_SEARCH', {})}
+
+def reciprocal_rank_fusion(rankings, k=60):
+    """Fuse ranked id lists into [(id, score)], best first."""
+    scores = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+def department_scope(user):
+    """Department name an officer is limited to, None for unrestricted."""
+    if user.role == 'OFFICER' and user.department_id:
+        return user.department.name
+    return None
+
+def _vector_ranking(text, petition_id, config):
+    from ai_agent.duplicate_detection import get_embedding, get_petition_embedding, nearest_petitions
+
+    try:
+        embedding = get_petition_embedding(petition_id) if petition_id else None
+        if embedding is None:
+            embedding = get_embedding(text)
+        if embedding is None:
+            return None
+        return [
+            (pid, similarity) for pid, similarity in nearest_petitions(embedding, config['candidates'])
+            if similarity >= config['min_similarity']
+        ]
+    finally:
+        # Usage accounting may have opened a connection in this pool thread
+        connection.close()
+
+def similar_petitions(user, text='', petition=None, filters=None, page=1, page_size=20):
+    """
+    Petitions similar to `petition` or free `text`, visible to `user`.
+
+    Returns:
+        dict with 'count', 'page', 'page_size', 'results' and 'degraded'
+        (rankings left out because they failed or ran over budget)
+    """
+    config = similar_search_settings()
+    deadline = time.monotonic() + config['latency_budget_ms'] / 1000
+    filters = dict(filters or {})
+    scope = department_scope(user)
+    if scope:
+        filters['department'] = scope
+
+    if petition is not None:
+        text = f"{petition.title}\n\n{petition.description}"
+    vector_future = _vector_pool.submit(_vector_ranking, text, petition.id if petition else None, config)
+
+    # Whole-text queries: any word may match, ranking does the rest
+    keyword_ids = ranked_petition_ids(user, text, filters, config['candidates'], match_any=True)
+
+    degraded = []
+    similarities = {}
+    try:
+        vector_hits = vector_future.result(timeout=max(0.0, deadline - time.monotonic()))
+    except FutureTimeout:
+        vector_hits = None
+        logger.warning(f"⚠️ Similar search vector ranking exceeded {config['latency_budget_ms']}ms budget")
+    except Exception as e:
+        vector_hits = None
+        logger.warning(f"⚠️ Similar search vector ranking failed: {e}")
+    if vector_hits is None:
+        degraded.append('vector')
+    else:
+        similarities = dict(vector_hits)
+
+    fused = reciprocal_rank_fusion(
+        [keyword_ids, [pid for pid, _ in vector_hits or []]], k=config['rrf_k']
+    )
+    if petition is not None:
+        fused = [(pid, score) for pid, score in fused if pid != petition.id]
+
+    # Vector hits come from the index unfiltered: apply role, department and
+    # request filters in one query
+    visible = Petition.objects.filter(id__in=[pid for pid, _ in fused])
+    if user.role == 'CITIZEN':
+        visible = visible.filter(citizen=user)
+    if filters.get('department'):
+        visible = visible.filter(department__name=filters['department'])
+    if filters.get('status'):
+        visible = visible.filter(status__in=filters['status'])
+    if filters.get('urgency'):
+        visible = visible.filter(urgency=filters['urgency'])
+    visible_ids = set(visible.values_list('id', flat=True))
+    fused = [(pid, score) for pid, score in fused if pid in visible_ids]
+
+    start = (page - 1) * page_size
+    page_hits = fused[start:start + page_size]
+    petitions = Petition.objects.select_related('department').in_bulk([pid for pid, _ in page_hits])
+    keyword_ranks = {pid: rank for rank, pid in enumerate(keyword_ids, start=1)}
+    results = []
+    for pid, score in page_hits:
+        match = petitions.get(pid)
+        if match is None:
+            continue
+        results.append({
+            'id': match.id,
+            'title': match.title,
+            'status': match.status,
+            'urgency': match.urgency,
+            'department': match.department.name if match.department else None,
+            'created_at': match.created_at,
+            'score': round(score, 6),
+            'similarity': round(similarities[pid], 4) if pid in similarities else None,
+            'keyword_rank': keyword_ranks.get(pid),
+        })
+    return {'count': len(fused), 'page': page, 'page_size': page_size, 'results': results, 'degraded': degraded}
@@ -0,0 +1,138 @@
+"""
+Content-Addressed File Storage
+
+Stores every file under its SHA-256 (cas/ab/cd/<sha256><ext>), so the same
+photo uploaded to several petitions is written to disk once and later copies
+are metadata-only. Each stored object has a ContentObject row that tracks:
+- ref_count:    Attachment / ResolutionDocument / Blob rows pointing at it,
+                maintained by signals (see petitions.signals)
+- upload_count: how many times the content was uploaded (for bytes-saved)
+
+Unreferenced objects are removed by `manage.py gc_content_storage`.
+
+URLs are signed with an expiry (see petitions.media_views), so browsers can
+load protected files in <img> tags without sending a JWT.
+"""
+
+import hashlib
+import os
+import re
+import tempfile
+import time
+from django.conf import settings
+from django.core import signing
+from django.core.files.storage import FileSystemStorage
+from django.db.models import F
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+
+HASH_BLOCK_SIZE = 64 * 1024
+MEDIA_SIGNING_SALT = 'petitions.media'
+DEFAULT_URL_TTL_SECONDS = 3600
+CAS_NAME_PATTERN = re.compile(r'^cas/[0-9a-f]{2}/[0-9a-f]{2}/([0-9a-f]{64})')
+
+def content_hash(name):
+    """SHA-256 encoded in a content-addressed file name, or None for legacy paths."""
+    match = CAS_NAME_PATTERN.match(name or '')
+    return match.group(1) if match else None
+
+def media_signature(name, expires):
+    return signing.Signer(salt=MEDIA_SIGNING_SALT).signature(f"{name}:{expires}")
+
+def sign_media_name(name):
+    """
+    Query string authorizing access to `name` until an expiry time.
+
+    Expiry is rounded up to the next TTL boundary so a file keeps the same URL
+    for a while and browser caches stay effective.
+    """
+    ttl = getattr(settings, 'MEDIA_SERVING', {}).get('url_ttl_seconds', DEFAULT_URL_TTL_SECONDS)
+    expires = (int(time.time()) // ttl + 2) * ttl
+    return f"exp={expires}&sig={media_signature(name, expires)}"
+
+def adjust_content_references(names, delta):
+    """Add `delta` to the reference count of each content-addressed name."""
+    from petitions.models import ContentObject
+
+    for name in names:
+        sha256 = content_hash(name)
+        if sha256:
+            ContentObject.objects.filter(sha256=sha256).update(ref_count=F('ref_count') + delta)
+
+def _extension(name):
+    ext = os.path.splitext(name or '')[1].lower()
+    return ext if re.fullmatch(r'\.[a-z0-9]{1,10}', ext) else ''
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage that names files by the SHA-256 of their content."""
+
+    def _save(self, name, content):
+        sha256 = getattr(content, 'sha256', None)
+        tmp_path = None
+
+        if sha256 is None:
+            # Hash while spooling to a temp file in the same filesystem, so the
+            # content is read once and can be moved into place atomically
+            os.makedirs(self.location, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.location, prefix='.cas-')
+            hasher = hashlib.sha256()
+            with os.fdopen(fd, 'wb') as tmp:
+                for chunk in content.chunks(HASH_BLOCK_SIZE):
+                    hasher.update(chunk)
+                    tmp.write(chunk)
+            sha256 = hasher.hexdigest()
+
+        cas_name = f"cas/{sha256[:2]}/{sha256[2:4]}/{sha256}{_extension(name)}"
+        size = content.size
+
+        try:
+            existing = self._existing_name(sha256) or (cas_name if self.exists(cas_name) else None)
+            if existing:
+                # Duplicate upload: metadata only
+                self._record_upload(sha256, existing, size)
+                return existing
+
+            path = self.path(cas_name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if tmp_path:
+                os.replace(tmp_path, path)
+                tmp_path = None
+            else:
+                super()._save(cas_name, content)
+            self._record_upload(sha256, cas_name, size)
+            return cas_name
+        finally:
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def url(self, name):
+        url = super().url(name)
+        return f"{url}?{sign_media_name(name)}" if name else url
+
+    def _existing_name(self, sha256):
+        from petitions.models import ContentObject
+
+        name = ContentObject.objects.filter(sha256=sha256).values_list('name', flat=True).first()
+        if name and self.exists(name):
+            return name
+        return None
+
+    def _record_upload(self, sha256, name, size):
+        from petitions.models import ContentObject
+
+        # Touching updated_at also protects the object from a concurrent GC pass
+        updated = ContentObject.objects.filter(sha256=sha256).update(
+            name=name, upload_count=F('upload_count') + 1, updated_at=timezone.now()
+        )
+        if not updated:
+            ContentObject.objects.get_or_create(sha256=sha256, defaults={'name': name, 'size': size, 'upload_count': 1})
+
+_content_storage = None
+
+def content_storage():
+    """Shared storage instance (callable so FileField migrations stay stable)."""
+    global _content_storage
+    if _content_storage is None:
+        _content_storage = ContentAddressedStorage(location=settings.MEDIA_ROOT, base_url=settings.MEDIA_URL)
+    return _content_storage
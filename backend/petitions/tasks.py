@@ -145,3 +145,85 @@ Thank you for using our service.
         return f"Petition {petition_id} not found"
     except Exception as e:
         return f"Failed to send notification: {str(e)}"
+
+@shared_task
+def cleanup_stale_uploads():
+    """Discard abandoned chunked uploads and never-attached blobs (see UPLOADS)."""
+    from petitions.uploads import cleanup_stale_uploads as cleanup
+    removed = cleanup()
+    return f"Removed {removed} stale uploads"
+
+@shared_task
+def gc_content_storage():
+    """Delete unreferenced files from content-addressed storage."""
+    from django.core.management import call_command
+    call_command('gc_content_storage')
+    return "Content storage garbage collection finished"
+
+@shared_task
+def process_attachment(attachment_id):
+    """Strip EXIF, record dimensions and build thumbnail/web variants for an image attachment."""
+    from petitions.models import Attachment
+    from petitions.imaging import process_attachment_image
+
+    try:
+        attachment = Attachment.objects.get(id=attachment_id)
+    except Attachment.DoesNotExist:
+        return f"Attachment {attachment_id} not found"
+    if attachment.processed_at:
+        return f"Attachment {attachment_id} already processed"
+
+    try:
+        processed = process_attachment_image(attachment)
+    except Exception as e:
+        return f"Failed to process attachment {attachment_id}: {str(e)}"
+    return f"{'Processed' if processed else 'Skipped'} attachment {attachment_id}"
+
+@shared_task(soft_time_limit=120, time_limit=150)
+def index_document_text(source, document_id):
+    """
+    Extract text from a PDF / text attachment ('attachment') or resolution
+    document ('resolution') and add its chunks to the duplicate index.
+
+    Routed to the `documents` queue; the time limits stop a pathological file
+    from holding a worker (extraction itself also has a per-document deadline).
+    """
+    from celery.exceptions import SoftTimeLimitExceeded
+    from petitions.models import Attachment, ResolutionDocument
+    from petitions.extraction import ExtractionError, index_document, mark_indexed
+
+    model = Attachment if source == 'attachment' else ResolutionDocument
+    try:
+        document = model.objects.select_related('petition').get(id=document_id)
+    except model.DoesNotExist:
+        return f"{source} {document_id} not found"
+    if document.text_indexed_at:
+        return f"{source} {document_id} already indexed"
+
+    try:
+        chunks = index_document(document)
+    except ExtractionError as e:
+        mark_indexed(document, 0)
+        return f"No text indexed for {source} {document_id}: {str(e)}"
+    except SoftTimeLimitExceeded:
+        mark_indexed(document, 0)
+        return f"Text indexing timed out for {source} {document_id}"
+    except Exception as e:
+        return f"Failed to index {source} {document_id}: {str(e)}"
+    if not chunks:
+        return f"{source} {document_id} not written to the index, left for retry"
+    return f"Indexed {chunks} chunks of {source} {document_id}"
+
+@shared_task
+def sequence_petition_events():
+    """Sequence and publish petition events whose post-commit step never ran."""
+    from petitions.events import sequence_pending_events
+    sequenced = sequence_pending_events()
+    return f"Sequenced {sequenced} petition events"
+
+@shared_task
+def purge_petition_events():
+    """Delete petition change events past their retention (see PETITION_EVENTS)."""
+    from petitions.events import purge_events
+    deleted = purge_events()
+    return f"Purged {deleted} petition events"
@@ -0,0 +1,127 @@
+"""
+Department Taxonomy
+
+Canonical department names and the mapping of free-text department names
+(e.g. Gemini output such as "Roads and Transport" or "Water Supply.") onto
+them, so classification never creates near-duplicate Department rows.
+
+Matching order:
+1. Exact match on the normalized name or a known alias
+2. Edit distance to a canonical name or alias (typos, plurals)
+
+Unmatched names fall back to "General". The taxonomy can be overridden with
+settings.DEPARTMENT_TAXONOMY ({canonical name: [aliases]}); it is built once
+per process, and Department rows are cached after the first lookup.
+"""
+
+from functools import lru_cache
+import re
+import threading
+from django.conf import settings
+from petitions.models import Department
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DEPARTMENT = 'General'
+MAX_EDIT_RATIO = 0.2
+
+DEFAULT_DEPARTMENT_TAXONOMY = {
+    'Roads & Transport': ['roads', 'road', 'transport', 'transportation', 'public works', 'pwd', 'traffic', 'highways'],
+    'Electricity': ['electricity board', 'electrical', 'power', 'power supply', 'energy', 'electricity department'],
+    'Water Supply': ['water', 'water board', 'water works', 'water department', 'drinking water'],
+    'Sanitation': ['solid waste management', 'waste management', 'garbage', 'sewage', 'drainage', 'sanitation and hygiene'],
+    'Police': ['law and order', 'police department', 'public safety', 'home department'],
+    'Health': ['healthcare', 'health care', 'public health', 'medical', 'hospitals', 'health and family welfare'],
+    'Education': ['schools', 'school education', 'education department', 'higher education'],
+    'General': ['other', 'others', 'miscellaneous', 'misc', 'general administration', 'none', 'unknown'],
+}
+
+def _normalize(name):
+    """Lowercase, '&' -> 'and', strip punctuation and 'department (of)' wording."""
+    text = (name or '').lower().replace('&', ' and ')
+    text = " ".join(re.findall(r'[a-z0-9]+', text))
+    text = re.sub(r'^(?:the )?(?:department|dept) of ', '', text)
+    text = re.sub(r' (?:department|dept)$', '', text)
+    return text
+
+def _edit_distance(a, b, limit):
+    """Levenshtein distance, or limit + 1 once it is known to exceed `limit`."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b),
+            ))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+@lru_cache(maxsize=1)
+def _taxonomy():
+    """Normalized name/alias -> canonical name, built once per process."""
+    taxonomy = getattr(settings, 'DEPARTMENT_TAXONOMY', DEFAULT_DEPARTMENT_TAXONOMY)
+    lookup = {}
+    for canonical, aliases in taxonomy.items():
+        lookup[_normalize(canonical)] = canonical
+        for alias in aliases:
+            lookup.setdefault(_normalize(alias), canonical)
+    return lookup
+
+def canonical_department_names():
+    return list(getattr(settings, 'DEPARTMENT_TAXONOMY', DEFAULT_DEPARTMENT_TAXONOMY))
+
+@lru_cache(maxsize=1024)
+def match_department(name):
+    """Canonical department name for `name`, or None if nothing matches."""
+    key = _normalize(name)
+    if not key:
+        return None
+
+    lookup = _taxonomy()
+    if key in lookup:
+        return lookup[key]
+
+    best, best_distance = None, None
+    for candidate, canonical in lookup.items():
+        limit = int(len(candidate) * MAX_EDIT_RATIO)
+        if not limit:
+            # Too short to fuzzy-match safely (e.g. 'pwd')
+            continue
+        distance = _edit_distance(key, candidate, limit)
+        if distance <= limit and (best_distance is None or distance < best_distance):
+            best, best_distance = canonical, distance
+    return best
+
+def normalize_department_name(name):
+    """Canonical department name for `name`, falling back to General."""
+    canonical = match_department(name)
+    if canonical is None:
+        logger.info(f"Unrecognized department {name!r}, using {DEFAULT_DEPARTMENT}")
+        return DEFAULT_DEPARTMENT
+    return canonical
+
+_department_cache = {}
+_department_lock = threading.Lock()
+
+def get_department(name):
+    """Department row for the canonical form of `name` (cached in-process)."""
+    canonical = normalize_department_name(name)
+    department = _department_cache.get(canonical)
+    if department is None:
+        with _department_lock:
+            department = _department_cache.get(canonical)
+            if department is None:
+                department, _ = Department.objects.get_or_create(name=canonical)
+                _department_cache[canonical] = department
+    return department
+
+def clear_department_cache():
+    with _department_lock:
+        _department_cache.clear()
@@ -1,3 +1,891 @@
-from django.test import TestCase
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+from types import SimpleNamespace
+from unittest import mock
+from asgiref.sync import async_to_sync
+from bson import ObjectId
+from PIL import Image
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management import CommandError, call_command
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from petitions import extraction, mongo_views, taxonomy
+from petitions.management.commands import retriage_petitions
+from rest_framework.response import Response
+from rest_framework.test import APIClient
+from petitions import events, imaging, response_cache, storage, uploads
+from petitions.search import ranked_petition_ids, search_petitions
+from petitions.similar import reciprocal_rank_fusion, similar_petitions
+from petitions.tasks import process_attachment
+from petitions.models import (
+    SLA, Attachment, AuditLog, Blob, ContentObject, Department, Petition, PetitionEvent, ResolutionDocument,
+    UploadSession,
+)
+from petitions.mongo_repository import AsyncPetitionRepository, PetitionRepository
 
-# Create your tests here.
+
+def _bulk_collection():
+    """Mock collection whose bulk_write reports every operation as matched."""
+    collection = mock.MagicMock()
+    collection.bulk_write.side_effect = lambda batch, ordered: SimpleNamespace(
+        inserted_count=0, matched_count=len(batch), modified_count=len(batch), upserted_count=0, deleted_count=0
+    )
+    return collection
+
+
+def _use_temp_media(test):
+    """Point MEDIA_ROOT, upload staging and content storage at a temp dir for one test."""
+    media = tempfile.mkdtemp()
+    test.addCleanup(shutil.rmtree, media, True)
+    test.uploads = {'staging_dir': os.path.join(media, 'upload_staging')}
+    settings_override = override_settings(MEDIA_ROOT=media, UPLOADS=test.uploads)
+    settings_override.enable()
+    test.addCleanup(settings_override.disable)
+
+    temp_storage = storage.ContentAddressedStorage(location=media, base_url='/media/')
+    patchers = [mock.patch.object(storage, '_content_storage', temp_storage)]
+    patchers += [
+        mock.patch.object(model._meta.get_field('file'), 'storage', temp_storage)
+        for model in (Attachment, Blob, ResolutionDocument)
+    ]
+    for patcher in patchers:
+        patcher.start()
+        test.addCleanup(patcher.stop)
+    return temp_storage
+
+
+class DocumentIndexingTests(SimpleTestCase):
+    def _index(self, indexed):
+        document = mock.Mock(id=3, text_indexed_at=None)
+        document.petition.id = 7
+        with mock.patch.object(extraction, 'extract_text', return_value='word ' * 600), \
+                mock.patch('ai_agent.duplicate_detection.add_document_chunks_to_index', return_value=indexed):
+            return document, extraction.index_document(document)
+
+    def test_marked_once_every_chunk_is_indexed(self):
+        chunks = len(extraction.chunk_text('word ' * 600))
+        document, count = self._index(chunks)
+        self.assertEqual(count, chunks)
+        self.assertIsNotNone(document.text_indexed_at)
+        document.save.assert_called_once()
+
+    def test_partial_write_leaves_document_for_retry(self):
+        document, count = self._index(1)
+        self.assertEqual(count, 0)
+        self.assertIsNone(document.text_indexed_at)
+        document.save.assert_not_called()
+
+
+class TextExtractionTests(SimpleTestCase):
+    def test_chunks_overlap_and_break_at_words(self):
+        text = ' '.join(f'word{i}' for i in range(100))
+        chunks = extraction.chunk_text(text, size=100, overlap=20, max_chunks=50)
+        self.assertTrue(all(len(chunk) <= 100 for chunk in chunks))
+        self.assertEqual(' '.join(chunks).split()[-1], 'word99')
+        for previous, chunk in zip(chunks, chunks[1:]):
+            self.assertIn(chunk.split()[0], previous.split())
+
+    def test_chunk_count_is_capped(self):
+        self.assertEqual(len(extraction.chunk_text('word ' * 1000, size=50, overlap=0, max_chunks=3)), 3)
+
+    def test_plain_text_is_extracted_and_whitespace_collapsed(self):
+        document = mock.MagicMock(size=30)
+        document.name = 'notes.txt'
+        document.open.return_value = io.BytesIO(b'Broken\n\n pipe   near school')
+        self.assertEqual(extraction.extract_text(document), 'Broken pipe near school')
+
+    def test_unsupported_and_oversized_files_are_refused(self):
+        document = mock.MagicMock(size=10)
+        document.name = 'photo.jpg'
+        self.assertFalse(extraction.is_extractable_name(document.name))
+        with self.assertRaises(extraction.ExtractionError):
+            extraction.extract_text(document)
+        with self.settings(DOCUMENT_EXTRACTION={'max_file_size': 5}), self.assertRaises(extraction.ExtractionError):
+            extraction.extract_text(mock.Mock(size=10))
+
+
+class BulkPetitionWriteTests(SimpleTestCase):
+    def setUp(self):
+        self.collection = _bulk_collection()
+        patcher = mock.patch.object(PetitionRepository, '_get_collection', return_value=self.collection)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _written(self):
+        return [op for call in self.collection.bulk_write.call_args_list for op in call.args[0]]
+
+    def test_upsert_reports_missing_and_malformed_ids(self):
+        summary = PetitionRepository.bulk_upsert_petitions([
+            {'petition_id': 1, 'title': 'ok'},
+            {'title': 'no id'},
+            {'petition_id': 'abc', 'title': 'bad id'},
+            {'petition_id': '2', 'title': 'numeric string'},
+        ])
+        self.assertEqual([op._filter for op in self._written()], [{'petition_id': 1}, {'petition_id': 2}])
+        self.assertIn({'batch': None, 'error': 'Invalid petition id', 'petition_ids': [None, 'abc']}, summary['errors'])
+
+    def test_upsert_appends_supplied_remarks(self):
+        remark = {'text': 'Inspected', 'author': 'officer1'}
+        with mock.patch.object(PetitionRepository, 'bulk_add_remarks', return_value={'archived': 1, 'errors': []}) as add:
+            summary = PetitionRepository.bulk_upsert_petitions([{'petition_id': 5, 'remarks': [remark]}])
+        add.assert_called_once_with([{'petition_id': 5, 'remark': remark}], None)
+        self.assertEqual(summary['archived'], 1)
+        self.assertNotIn('remarks', self._written()[0]._doc['$set'])
+
+    def test_upsert_rejects_malformed_remarks(self):
+        summary = PetitionRepository.bulk_upsert_petitions([{'petition_id': 5, 'remarks': 'Inspected'}])
+        self.assertEqual(self._written(), [])
+        self.assertEqual(summary['errors'][0]['petition_ids'], [5])
+
+    def test_status_update_skips_invalid_ids(self):
+        summary = PetitionRepository.bulk_update_status([
+            {'petition_id': 'not-an-id', 'status': 'RESOLVED'},
+            {'petition_id': 3, 'status': 'RESOLVED'},
+        ])
+        self.assertEqual(summary['matched'], 1)
+        self.assertEqual(summary['errors'][0]['petition_ids'], ['not-an-id'])
+
+
+class AsyncMongoViewTests(SimpleTestCase):
+    def _get(self, view, user, path='/api/async/mongo/petitions/stats/'):
+        request = RequestFactory().get(path)
+        with mock.patch.object(mongo_views, '_authenticate', mock.AsyncMock(return_value=user)):
+            return async_to_sync(view)(request)
+
+    def test_stats_are_limited_to_a_citizens_petitions(self):
+        citizen = SimpleNamespace(id=4, role='CITIZEN')
+        with mock.patch.object(AsyncPetitionRepository, 'get_statistics', mock.AsyncMock(return_value={'total': 1})) as stats:
+            response = self._get(mongo_views.async_petition_stats, citizen)
+        stats.assert_awaited_once_with({'citizen_id': '4'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_list_applies_role_and_query_filters(self):
+        officer = SimpleNamespace(id=9, role='OFFICER')
+        petitions = [{'_id': 'abc', 'petition_id': 1}]
+        with mock.patch.object(AsyncPetitionRepository, 'get_all_petitions', mock.AsyncMock(return_value=petitions)) as listing:
+            response = self._get(mongo_views.async_petition_list, officer, '/api/async/mongo/petitions/?status=PENDING')
+        listing.assert_awaited_once_with({'status': 'PENDING'})
+        self.assertEqual(json.loads(response.content), petitions)
+
+    def test_anonymous_request_is_rejected(self):
+        self.assertEqual(self._get(mongo_views.async_petition_stats, None).status_code, 401)
+
+
+@override_settings(MONGODB_SETTINGS={'inline_remarks_limit': 3})
+class RemarksArchiveTests(SimpleTestCase):
+    petition_oid = ObjectId()
+
+    def setUp(self):
+        self.collection = mock.MagicMock()
+        self.collection.find_one.return_value = {'_id': self.petition_oid}
+        self.collection.find_one_and_update.return_value = None
+        self.remarks = mock.MagicMock()
+        for name, value in (('_get_collection', self.collection), ('_get_remarks_collection', self.remarks)):
+            patcher = mock.patch.object(PetitionRepository, name, return_value=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_remark_is_archived_and_capped_inline(self):
+        self.assertTrue(PetitionRepository.add_remark(str(self.petition_oid), {'text': 'Inspected'}))
+        archived = self.remarks.insert_one.call_args.args[0]
+        self.assertEqual((archived['text'], archived['petition_oid']), ('Inspected', self.petition_oid))
+        push = self.collection.update_one.call_args.args[1]['$push']['remarks']
+        self.assertEqual(push['$slice'], -3)
+        self.assertEqual(push['$each'][0]['text'], 'Inspected')
+
+    def test_legacy_inline_remarks_are_archived_before_the_cap_applies(self):
+        legacy = {'_id': self.petition_oid, 'remarks': [{'text': 'old'}]}
+        self.collection.find_one_and_update.side_effect = [legacy, None]
+        PetitionRepository.add_remark(str(self.petition_oid), {'text': 'new'})
+        self.remarks.insert_many.assert_called_once_with([{'text': 'old', 'petition_oid': self.petition_oid}], ordered=False)
+        # The legacy copy lands in the archive before the new remark
+        self.assertEqual([c[0] for c in self.remarks.method_calls[-2:]], ['insert_many', 'insert_one'])
+
+    def test_failed_archive_copy_releases_the_claim(self):
+        self.collection.find_one_and_update.return_value = {'_id': self.petition_oid, 'remarks': [{'text': 'old'}]}
+        self.remarks.insert_many.side_effect = RuntimeError('down')
+        self.assertFalse(PetitionRepository.add_remark(str(self.petition_oid), {'text': 'new'}))
+        self.collection.update_one.assert_called_once_with({'_id': self.petition_oid}, {'$unset': {'remarks_archived': ''}})
+        self.remarks.insert_one.assert_not_called()
+
+    def test_remarks_are_paged_newest_first(self):
+        self.remarks.count_documents.return_value = 45
+        cursor = self.remarks.find.return_value
+        cursor.sort.return_value.skip.return_value.limit.return_value = [{'text': 'r21'}]
+        page = PetitionRepository.get_remarks(str(self.petition_oid), page=2, page_size=20)
+        cursor.sort.assert_called_once_with('timestamp', -1)
+        cursor.sort.return_value.skip.assert_called_once_with(20)
+        self.assertEqual(page, {'count': 45, 'page': 2, 'page_size': 20, 'results': [{'text': 'r21'}]})
+
+
+class RetriagePetitionsTests(TestCase):
+    def setUp(self):
+        taxonomy.clear_department_cache()
+        self.addCleanup(taxonomy.clear_department_cache)
+        citizen = get_user_model().objects.create_user('asha', password='pass12345')
+        self.pothole = Petition.objects.create(title='Huge pothole', description='Pothole on the main road', citizen=citizen)
+        self.blackout = Petition.objects.create(title='Transformer blew', description='Power cut since morning', citizen=citizen)
+        self.checkpoint = os.path.join(tempfile.mkdtemp(), 'checkpoint.json')
+        patcher = mock.patch.object(PetitionRepository, 'bulk_update_triage', return_value={'errors': []})
+        self.mongo = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _run(self, *args):
+        call_command('retriage_petitions', '--checkpoint', self.checkpoint, *args, stdout=mock.Mock(), stderr=mock.Mock())
+
+    def test_local_run_applies_changes_with_audit_entries(self):
+        self._run('--local-only', '--batch-size', '1')
+        self.pothole.refresh_from_db()
+        self.assertEqual(self.pothole.department.name, 'Roads & Transport')
+        self.assertEqual(AuditLog.objects.filter(remarks='Re-triaged by batch job').count(), 2)
+        self.assertEqual(self.mongo.call_count, 2)
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_dry_run_writes_nothing(self):
+        self._run('--local-only', '--dry-run')
+        self.pothole.refresh_from_db()
+        self.assertIsNone(self.pothole.department)
+        self.mongo.assert_not_called()
+
+    def test_fallback_labels_are_skipped(self):
+        def classify(petition, local_only):
+            return 'Electricity', 'HIGH', petition.id == self.pothole.id
+
+        with mock.patch.object(retriage_petitions, '_classify', side_effect=classify):
+            self._run()
+        self.pothole.refresh_from_db()
+        self.blackout.refresh_from_db()
+        self.assertIsNone(self.pothole.department)
+        self.assertEqual(self.blackout.department.name, 'Electricity')
+
+    def test_batch_without_model_answers_stops_and_keeps_the_checkpoint(self):
+        with mock.patch.object(retriage_petitions, '_classify', return_value=('General', 'LOW', True)), \
+                self.assertRaises(CommandError):
+            self._run('--batch-size', '1', '--limit', '2')
+        with open(self.checkpoint) as f:
+            self.assertEqual(json.load(f)['last_id'], 0)
+
+    def test_interrupted_run_resumes_after_the_checkpoint(self):
+        self._run('--local-only', '--batch-size', '1', '--limit', '1')
+        with open(self.checkpoint) as f:
+            self.assertEqual(json.load(f)['last_id'], self.pothole.id)
+        with mock.patch.object(retriage_petitions, '_classify', wraps=retriage_petitions._classify) as classify:
+            self._run('--local-only')
+        self.assertEqual([c.args[0].id for c in classify.call_args_list], [self.blackout.id])
+
+
+class DepartmentTaxonomyTests(SimpleTestCase):
+    def test_model_output_variants_map_to_the_canonical_name(self):
+        for name in ('Roads and Transport', 'Water Supply.', 'Department of Health', 'Electricty', 'sanitation dept'):
+            with self.subTest(name=name):
+                self.assertIsNotNone(taxonomy.match_department(name))
+        self.assertEqual(taxonomy.normalize_department_name('Roads and Transport'), 'Roads & Transport')
+        self.assertEqual(taxonomy.normalize_department_name('Water Supply.'), 'Water Supply')
+
+    def test_unknown_names_fall_back_to_general(self):
+        self.assertIsNone(taxonomy.match_department('Ministry of Magic'))
+        self.assertEqual(taxonomy.normalize_department_name('Ministry of Magic'), 'General')
+        self.assertEqual(taxonomy.normalize_department_name(''), 'General')
+
+
+class MergeDepartmentsTests(TestCase):
+    def setUp(self):
+        taxonomy.clear_department_cache()
+        self.addCleanup(taxonomy.clear_department_cache)
+        citizen = get_user_model().objects.create_user('asha', password='pass12345')
+        self.canonical = Department.objects.create(name='Roads & Transport')
+        self.duplicate = Department.objects.create(name='Roads and Transport')
+        self.petition = Petition.objects.create(title='Pothole', description='Deep', citizen=citizen, department=self.duplicate)
+        SLA.objects.create(department=self.canonical, urgency='HIGH', resolution_time_hours=24)
+        SLA.objects.create(department=self.duplicate, urgency='HIGH', resolution_time_hours=48)
+        SLA.objects.create(department=self.duplicate, urgency='LOW', resolution_time_hours=240)
+        patcher = mock.patch.object(PetitionRepository, 'rename_department', return_value=1)
+        self.rename = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_duplicate_is_merged_into_the_canonical_department(self):
+        call_command('merge_departments', stdout=mock.Mock())
+        self.petition.refresh_from_db()
+        self.assertEqual(self.petition.department, self.canonical)
+        self.assertFalse(Department.objects.filter(pk=self.duplicate.pk).exists())
+        # The target's own HIGH SLA wins; the LOW one moves over
+        self.assertEqual(
+            dict(SLA.objects.filter(department=self.canonical).values_list('urgency', 'resolution_time_hours')),
+            {'HIGH': 24, 'LOW': 240},
+        )
+        self.rename.assert_called_once_with('Roads and Transport', 'Roads & Transport')
+
+    def test_dry_run_changes_nothing(self):
+        call_command('merge_departments', '--dry-run', stdout=mock.Mock())
+        self.assertTrue(Department.objects.filter(pk=self.duplicate.pk).exists())
+        self.rename.assert_not_called()
+
+    def test_classification_reuses_the_canonical_row(self):
+        self.assertEqual(taxonomy.get_department('roads & transport.'), self.canonical)
+        self.assertEqual(Department.objects.filter(name__startswith='Roads').count(), 2)
+
+
+class ChunkedUploadTests(TestCase):
+    content = b'0123456789' * 10
+
+    def setUp(self):
+        _use_temp_media(self)
+        self.user = get_user_model().objects.create_user('asha', password='pass12345')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _start(self, size=None, filename='photo.jpg'):
+        return self.client.post('/api/uploads/', {'filename': filename, 'size': size or len(self.content)}, format='json')
+
+    def _put(self, upload_id, offset, data):
+        return self.client.put(
+            f'/api/uploads/{upload_id}/', data, content_type='application/octet-stream', HTTP_UPLOAD_OFFSET=str(offset)
+        )
+
+    def test_chunks_are_assembled_into_a_blob(self):
+        upload_id = self._start().data['upload_id']
+        self.assertEqual(self._put(upload_id, 0, self.content[:60]).data['received'], 60)
+        self.assertEqual(self._put(upload_id, 60, self.content[60:]).data['received'], 100)
+        response = self.client.post(
+            f'/api/uploads/{upload_id}/complete/', {'sha256': hashlib.sha256(self.content).hexdigest()}, format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        blob = Blob.objects.get(pk=response.data['blob_id'])
+        with blob.file.open('rb') as f:
+            self.assertEqual(f.read(), self.content)
+        self.assertFalse(UploadSession.objects.exists())
+
+    def test_out_of_order_chunk_is_rejected(self):
+        upload_id = self._start().data['upload_id']
+        response = self._put(upload_id, 50, self.content[50:])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(self.client.get(f'/api/uploads/{upload_id}/').data['received'], 0)
+
+    def test_size_limits_are_checked_before_data_is_sent(self):
+        with self.settings(UPLOADS={**self.uploads, 'max_file_size': 50, 'max_chunk_size': 20}):
+            self.assertEqual(self._start(size=51).status_code, 413)
+            upload_id = self._start(size=40).data['upload_id']
+            self.assertEqual(self._put(upload_id, 0, self.content[:21]).status_code, 413)
+            self.assertEqual(self._put(upload_id, 0, self.content[:41]).status_code, 413)
+
+    def test_pending_upload_quota(self):
+        with self.settings(UPLOADS={**self.uploads, 'max_pending_uploads': 1}):
+            self.assertEqual(self._start().status_code, 201)
+            self.assertEqual(self._start().status_code, 429)
+
+    def test_checksum_mismatch_discards_the_upload(self):
+        upload_id = self._start().data['upload_id']
+        self._put(upload_id, 0, self.content)
+        response = self.client.post(f'/api/uploads/{upload_id}/complete/', {'sha256': '0' * 64}, format='json')
+        self.assertEqual(response.status_code, 422)
+        self.assertFalse(Blob.objects.exists())
+        self.assertFalse(UploadSession.objects.exists())
+
+    def test_digest_is_recomputed_when_hash_state_is_lost(self):
+        upload_id = self._start().data['upload_id']
+        self._put(upload_id, 0, self.content)
+        # e.g. a restart between the last chunk and completion
+        uploads._hashers.clear()
+        response = self.client.post(f'/api/uploads/{upload_id}/complete/', {}, format='json')
+        self.assertEqual(response.data['sha256'], hashlib.sha256(self.content).hexdigest())
+
+    def test_petition_quota_counts_files_and_blobs(self):
+        blob = SimpleNamespace(size=30)
+        with self.settings(UPLOADS={**self.uploads, 'max_files_per_petition': 2, 'max_total_size': 50}):
+            with self.assertRaises(uploads.UploadError):
+                uploads.check_petition_quota([SimpleNamespace(name='a.jpg', size=10)], [blob, blob])
+            with self.assertRaises(uploads.UploadError) as raised:
+                uploads.check_petition_quota([SimpleNamespace(name='a.jpg', size=25)], [blob])
+            self.assertEqual(raised.exception.status, 413)
+
+
+class ContentStorageTests(TestCase):
+    content = b'same photo bytes'
+
+    def setUp(self):
+        self.storage = _use_temp_media(self)
+        self.user = get_user_model().objects.create_user('asha', password='pass12345')
+
+    def _blob(self, content=None, filename='photo.JPG'):
+        content = content or self.content
+        blob = Blob(owner=self.user, filename=filename, size=len(content), sha256=hashlib.sha256(content).hexdigest())
+        blob.file.save(filename, ContentFile(content), save=False)
+        blob.save()
+        return blob
+
+    def _gc(self, *args):
+        out = mock.Mock()
+        call_command('gc_content_storage', '--grace-hours', '0', *args, stdout=out)
+        return out
+
+    def test_duplicate_uploads_share_one_file(self):
+        first, second = self._blob(), self._blob(filename='copy.jpg')
+        sha256 = hashlib.sha256(self.content).hexdigest()
+        self.assertEqual(first.file.name, f"cas/{sha256[:2]}/{sha256[2:4]}/{sha256}.jpg")
+        self.assertEqual(second.file.name, first.file.name)
+        obj = ContentObject.objects.get()
+        self.assertEqual((obj.ref_count, obj.upload_count), (2, 2))
+        self.assertEqual(sum(len(files) for _, _, files in os.walk(self.storage.path('cas'))), 1)
+
+    def test_gc_keeps_referenced_content(self):
+        first, second = self._blob(), self._blob()
+        first.delete()
+        self._gc()
+        self.assertTrue(self.storage.exists(second.file.name))
+        self.assertEqual(ContentObject.objects.get().ref_count, 1)
+
+    def test_gc_deletes_unreferenced_content_after_the_grace_period(self):
+        blob = self._blob()
+        name = blob.file.name
+        blob.delete()
+        call_command('gc_content_storage', stdout=mock.Mock())
+        self.assertTrue(self.storage.exists(name))
+        self._gc()
+        self.assertFalse(self.storage.exists(name))
+        self.assertFalse(ContentObject.objects.exists())
+
+    def test_dry_run_deletes_nothing(self):
+        blob = self._blob()
+        blob.delete()
+        self._gc('--dry-run')
+        self.assertTrue(self.storage.exists(blob.file.name))
+
+    def test_orphan_files_are_removed(self):
+        blob = self._blob()
+        ContentObject.objects.all().delete()
+        self._gc()
+        self.assertFalse(self.storage.exists(blob.file.name))
+
+    def test_recount_repairs_drifted_reference_counts(self):
+        blob = self._blob()
+        ContentObject.objects.update(ref_count=0)
+        self._gc('--recount')
+        self.assertTrue(self.storage.exists(blob.file.name))
+        self.assertEqual(ContentObject.objects.get().ref_count, 1)
+
+
+class AttachmentImageTests(TestCase):
+    def setUp(self):
+        self.storage = _use_temp_media(self)
+        citizen = get_user_model().objects.create_user('asha', password='pass12345')
+        self.petition = Petition.objects.create(title='Pothole', description='Deep', citizen=citizen)
+
+    def _attachment(self, size=(800, 400)):
+        image = Image.new('RGB', size, 'red')
+        exif = Image.Exif()
+        exif[0x0112] = 6          # Orientation: rotate 90 degrees clockwise
+        exif[0x010F] = 'Phone'    # Make
+        buffer = io.BytesIO()
+        image.save(buffer, format='JPEG', exif=exif)
+        attachment = Attachment(petition=self.petition)
+        attachment.file.save('photo.jpg', ContentFile(buffer.getvalue()), save=False)
+        attachment.save()
+        # Fresh instance, as the Celery task loads it
+        return Attachment.objects.get(pk=attachment.pk)
+
+    def test_original_is_rotated_and_stripped_and_variants_are_written(self):
+        attachment = self._attachment()
+        uploaded = attachment.file.name
+        self.assertTrue(imaging.process_attachment_image(attachment))
+        attachment = Attachment.objects.get(pk=attachment.pk)
+
+        self.assertEqual((attachment.width, attachment.height), (400, 800))
+        self.assertNotEqual(attachment.file.name, uploaded)
+        with attachment.file.open('rb') as f, Image.open(f) as original:
+            self.assertFalse(original.getexif())
+        with self.storage.open(attachment.variants['thumbnail']) as f, Image.open(f) as thumbnail:
+            self.assertEqual((thumbnail.format, thumbnail.size), ('WEBP', (160, 320)))
+        self.assertEqual(set(attachment.variants), {'thumbnail', 'web'})
+
+    def test_reference_counts_move_to_the_new_files(self):
+        attachment = self._attachment()
+        uploaded = storage.content_hash(attachment.file.name)
+        imaging.process_attachment_image(attachment)
+        self.assertEqual(ContentObject.objects.get(sha256=uploaded).ref_count, 0)
+        for name in [attachment.file.name, *attachment.variants.values()]:
+            self.assertEqual(ContentObject.objects.get(sha256=storage.content_hash(name)).ref_count, 1)
+
+    def test_oversized_images_are_skipped(self):
+        attachment = self._attachment()
+        with self.settings(ATTACHMENT_IMAGES={'max_pixels': 1000}):
+            self.assertFalse(imaging.process_attachment_image(attachment))
+        self.assertEqual(attachment.variants, {})
+
+    def test_task_processes_an_attachment_once(self):
+        attachment = self._attachment()
+        self.assertTrue(process_attachment(attachment.id).startswith('Processed'))
+        self.assertIn('already processed', process_attachment(attachment.id))
+
+
+class MediaServingTests(TestCase):
+    content = b'%PDF-1.4 resolution letter ' * 4
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.citizen = User.objects.create_user('asha', password='pass12345', role='CITIZEN')
+        cls.neighbour = User.objects.create_user('bob', password='pass12345', role='CITIZEN')
+        cls.officer = User.objects.create_user('officer', password='pass12345', role='OFFICER')
+        cls.petition = Petition.objects.create(title='Pothole', description='Deep', citizen=cls.citizen)
+
+    def setUp(self):
+        self.storage = _use_temp_media(self)
+        attachment = Attachment(petition=self.petition)
+        attachment.file.save('letter.pdf', ContentFile(self.content), save=False)
+        attachment.save()
+        self.name = attachment.file.name
+        self.path = f'/media/{self.name}'
+
+    def _get(self, user=None, path=None, **headers):
+        if user is not None:
+            self.client.force_login(user)
+        return self.client.get(path or self.path, headers=headers)
+
+    def test_signed_url_needs_no_login(self):
+        response = self._get(path=self.storage.url(self.name))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+        self.assertEqual(response['Cache-Control'], 'private, max-age=31536000, immutable')
+
+    def test_tampered_or_expired_signature_is_refused(self):
+        self.assertEqual(self._get(path=f'{self.path}?exp=9999999999&sig=forged').status_code, 401)
+        self.assertEqual(self._get(path=f'{self.path}?exp=1&sig=forged').status_code, 401)
+
+    def test_petition_permissions_apply_to_logged_in_users(self):
+        self.assertEqual(self._get(self.citizen).status_code, 200)
+        self.assertEqual(self._get(self.officer).status_code, 200)
+        self.assertEqual(self._get(self.neighbour).status_code, 404)
+
+    def test_byte_range_is_served_as_partial_content(self):
+        response = self._get(self.citizen, Range='bytes=5-9')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 5-9/{len(self.content)}')
+        self.assertEqual(b''.join(response.streaming_content), self.content[5:10])
+
+    def test_suffix_and_unsatisfiable_ranges(self):
+        response = self._get(self.citizen, Range='bytes=-4')
+        self.assertEqual(b''.join(response.streaming_content), self.content[-4:])
+        response = self._get(self.citizen, Range=f'bytes={len(self.content)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.content)}')
+
+    def test_stale_if_range_gets_the_whole_file(self):
+        response = self._get(self.citizen, Range='bytes=0-3', If_Range='"outdated"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_matching_etag_is_not_modified(self):
+        etag = self._get(self.citizen)['ETag']
+        self.assertEqual(etag, f'"{storage.content_hash(self.name)}"')
+        self.assertEqual(self._get(self.citizen, If_None_Match=etag).status_code, 304)
+
+    def test_nginx_accel_hands_off_the_transfer(self):
+        with self.settings(MEDIA_SERVING={'accel': 'nginx', 'accel_prefix': '/protected-media/'}):
+            response = self._get(self.citizen)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.name}')
+        self.assertEqual(response.content, b'')
+
+
+class PetitionCreateTransactionTests(TestCase):
+    def setUp(self):
+        taxonomy.clear_department_cache()
+        self.addCleanup(taxonomy.clear_department_cache)
+        self.user = get_user_model().objects.create_user('asha', password='pass12345')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        for target, value in (
+            ('petitions.views.check_duplicate', mock.Mock(return_value={'is_duplicate': False})),
+            ('petitions.views.classify_department', mock.Mock(return_value='Roads & Transport')),
+            ('petitions.views.predict_urgency', mock.Mock(return_value='HIGH')),
+            ('petitions.views.add_petition_to_index', mock.Mock()),
+            ('petitions.views.PetitionRepository.create_petition', mock.Mock(return_value={'petition_id': 1})),
+        ):
+            patcher = mock.patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _create(self):
+        return self.client.post('/api/petitions/', {'title': 'Pothole', 'description': 'Deep pothole'}, format='json')
+
+    def test_petition_and_audit_rows_are_written_together(self):
+        self.assertEqual(self._create().status_code, 201)
+        petition = Petition.objects.get()
+        self.assertEqual((petition.department.name, petition.urgency), ('Roads & Transport', 'HIGH'))
+        self.assertTrue(AuditLog.objects.filter(petition=petition, action='CREATED').exists())
+
+    def test_failure_inside_the_transaction_leaves_no_partial_petition(self):
+        with mock.patch('petitions.views.assign_to_officer', side_effect=RuntimeError('assignment failed')), \
+                self.assertRaises(RuntimeError):
+            self._create()
+        self.assertFalse(Petition.objects.exists())
+        self.assertFalse(AuditLog.objects.exists())
+
+
+class PetitionSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.citizen = User.objects.create_user('asha', password='pass12345', role='CITIZEN')
+        cls.neighbour = User.objects.create_user('bob', password='pass12345', role='CITIZEN')
+        cls.officer = User.objects.create_user('officer', password='pass12345', role='OFFICER')
+        cls.in_title = Petition.objects.create(
+            title='Pothole <b>outside</b> school', description='Children trip every day.', citizen=cls.citizen
+        )
+        cls.in_description = Petition.objects.create(
+            title='Road repair needed', description='There is a pothole near the bus stop.', citizen=cls.neighbour
+        )
+        cls.unrelated = Petition.objects.create(title='Streetlight out', description='Dark at night.', citizen=cls.citizen)
+
+    def _ids(self, user, query, **filters):
+        return [result['id'] for result in search_petitions(user, query, filters)['results']]
+
+    def test_title_matches_rank_first(self):
+        self.assertEqual(self._ids(self.officer, 'pothole'), [self.in_title.id, self.in_description.id])
+
+    def test_last_word_matches_as_a_prefix(self):
+        self.assertEqual(self._ids(self.officer, 'bus sto'), [self.in_description.id])
+
+    def test_citizens_only_find_their_own_petitions(self):
+        self.assertEqual(self._ids(self.citizen, 'pothole'), [self.in_title.id])
+
+    def test_highlights_are_html_escaped(self):
+        result = search_petitions(self.officer, 'pothole')['results'][0]
+        self.assertEqual(result['title_highlight'], '<mark>Pothole</mark> &lt;b&gt;outside&lt;/b&gt; school')
+
+    def test_query_syntax_in_user_input_is_not_interpreted(self):
+        self.assertEqual(self._ids(self.officer, 'pothole" OR NEAR(*'), [])
+        self.assertEqual(self._ids(self.officer, '   '), [])
+
+    def test_only_typed_status_remarks_are_indexed(self):
+        AuditLog.objects.create(petition=self.unrelated, action='STATUS_CHANGED', remarks='Crew replaced the bulb')
+        AuditLog.objects.create(petition=self.unrelated, action='CREATED', remarks='Petition created by citizen')
+        self.assertEqual(self._ids(self.officer, 'bulb'), [self.unrelated.id])
+        self.assertEqual(self._ids(self.officer, 'citizen'), [])
+
+    def test_match_any_finds_partially_overlapping_petitions(self):
+        ids = ranked_petition_ids(self.officer, 'pothole at the school gate', match_any=True)
+        self.assertEqual(set(ids), {self.in_title.id, self.in_description.id})
+
+    def test_endpoint_validates_parameters(self):
+        client = APIClient()
+        client.force_authenticate(self.officer)
+        self.assertEqual(client.get('/api/petitions/search/').status_code, 400)
+        self.assertEqual(client.get('/api/petitions/search/', {'q': 'pothole', 'status': 'LOST'}).status_code, 400)
+        response = client.get('/api/petitions/search/', {'q': 'pothole', 'status': 'SUBMITTED'})
+        self.assertEqual(response.data['count'], 2)
+
+
+class SimilarPetitionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        roads = Department.objects.create(name='Roads & Transport')
+        water = Department.objects.create(name='Water Supply')
+        citizen = User.objects.create_user('asha', password='pass12345', role='CITIZEN')
+        cls.citizen = citizen
+        cls.admin = User.objects.create_user('admin', password='pass12345', role='ADMIN')
+        cls.officer = User.objects.create_user('officer', password='pass12345', role='OFFICER', department=roads)
+        cls.source = Petition.objects.create(title='Pothole on main road', description='Deep pothole', citizen=citizen, department=roads)
+        cls.keyword_and_vector = Petition.objects.create(title='Another pothole', description='Main road', citizen=citizen, department=roads)
+        cls.vector_only = Petition.objects.create(title='Crater in the street', description='Cars damaged', citizen=citizen, department=roads)
+        cls.other_department = Petition.objects.create(title='Pipe burst', description='Road flooded', citizen=citizen, department=water)
+
+    def _similar(self, user, vector_hits, **kwargs):
+        with mock.patch('petitions.similar._vector_ranking', return_value=vector_hits):
+            return similar_petitions(user, petition=self.source, **kwargs)
+
+    def test_rank_fusion_favours_items_in_both_rankings(self):
+        fused = reciprocal_rank_fusion([[1, 2, 3], [3, 4]], k=60)
+        self.assertEqual(fused[0][0], 3)
+        self.assertAlmostEqual(fused[0][1], 1 / 63 + 1 / 61)
+
+    def test_keyword_and_vector_hits_are_fused(self):
+        hits = [(self.source.id, 1.0), (self.keyword_and_vector.id, 0.9), (self.vector_only.id, 0.8)]
+        result = self._similar(self.admin, hits)
+        ids = [item['id'] for item in result['results']]
+        # Found by both rankings, so it beats single-ranking hits
+        self.assertEqual(ids[0], self.keyword_and_vector.id)
+        self.assertIn(self.vector_only.id, ids)
+        self.assertNotIn(self.source.id, ids)
+        vector_only = next(item for item in result['results'] if item['id'] == self.vector_only.id)
+        self.assertEqual((vector_only['similarity'], vector_only['keyword_rank']), (0.8, None))
+        self.assertEqual(result['degraded'], [])
+
+    def test_officers_only_see_their_department(self):
+        hits = [(self.other_department.id, 0.95), (self.vector_only.id, 0.8)]
+        ids = [item['id'] for item in self._similar(self.officer, hits)['results']]
+        self.assertNotIn(self.other_department.id, ids)
+        self.assertIn(self.vector_only.id, ids)
+
+    def test_slow_vector_ranking_degrades_to_keywords(self):
+        def slow(*args):
+            time.sleep(0.2)
+            return [(self.vector_only.id, 0.9)]
+
+        with self.settings(SIMILAR_SEARCH={'latency_budget_ms': 20}), \
+                mock.patch('petitions.similar._vector_ranking', side_effect=slow):
+            result = similar_petitions(self.admin, petition=self.source)
+        self.assertEqual(result['degraded'], ['vector'])
+        self.assertEqual([item['id'] for item in result['results']][0], self.keyword_and_vector.id)
+
+    def test_citizens_cannot_use_similar_search(self):
+        client = APIClient()
+        client.force_authenticate(self.citizen)
+        self.assertEqual(client.get('/api/petitions/similar/', {'q': 'pothole'}).status_code, 403)
+
+
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location, True)
+        # A cache every process can share, so caching is enabled
+        settings_override = override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location,
+        }})
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.citizen = SimpleNamespace(id=1, role='CITIZEN')
+        self.build = mock.Mock(side_effect=lambda: Response({'id': 7}))
+
+    def _get(self, kind='detail', petition_id=7, user=None, **headers):
+        request = RequestFactory().get(f'/api/petitions/{petition_id}/', headers=headers)
+        request.user = user or self.citizen
+        return response_cache.cached_response(request, kind, self.build, petition_id=petition_id)
+
+    def test_payload_is_reused_until_the_petition_changes(self):
+        first = self._get()
+        self.assertEqual(self._get().data, {'id': 7})
+        self.assertEqual(self.build.call_count, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response_cache.invalidate_petitions(7)
+        self.assertNotEqual(self._get()['ETag'], first['ETag'])
+        self.assertEqual(self.build.call_count, 2)
+
+    def test_other_petitions_keep_their_entries(self):
+        self._get()
+        with self.captureOnCommitCallbacks(execute=True):
+            response_cache.invalidate_petitions(8)
+        self._get()
+        self.assertEqual(self.build.call_count, 1)
+
+    def test_bulk_invalidation_drops_everything(self):
+        self._get()
+        with self.captureOnCommitCallbacks(execute=True):
+            response_cache.invalidate_all_petitions()
+        self._get()
+        self.assertEqual(self.build.call_count, 2)
+
+    def test_matching_etag_gets_304(self):
+        etag = self._get()['ETag']
+        self.assertEqual(self._get(If_None_Match=etag).status_code, 304)
+
+    def test_scopes_do_not_share_entries(self):
+        etag = self._get()['ETag']
+        response = self._get(user=SimpleNamespace(id=2, role='CITIZEN'), If_None_Match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.build.call_count, 2)
+
+    def test_errors_are_not_cached(self):
+        self.build.side_effect = lambda: Response(status=404)
+        self._get()
+        self._get()
+        self.assertEqual(self.build.call_count, 2)
+
+    def test_process_local_cache_disables_caching(self):
+        with self.settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            response = self._get()
+            self._get()
+        self.assertNotIn('ETag', response)
+        self.assertEqual(self.build.call_count, 2)
+
+
+class PetitionChangesFeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.citizen = User.objects.create_user('asha', password='pass12345', role='CITIZEN')
+        cls.neighbour = User.objects.create_user('bob', password='pass12345', role='CITIZEN')
+        cls.officer = User.objects.create_user('officer', password='pass12345', role='OFFICER')
+
+    def setUp(self):
+        patcher = mock.patch('petitions.events._publish')
+        self.publish = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.start = events.latest_cursor()
+
+    def _record(self, citizen, event_type=PetitionEvent.Type.CREATED):
+        petition = Petition.objects.create(title='Pothole', description='Deep pothole', citizen=citizen)
+        with self.captureOnCommitCallbacks(execute=True):
+            events.record_event(petition, event_type)
+        return petition
+
+    def test_events_are_sequenced_and_published_after_commit(self):
+        petition = Petition.objects.create(title='Pothole', description='Deep pothole', citizen=self.citizen)
+        with self.captureOnCommitCallbacks() as callbacks:
+            event = events.record_event(petition, PetitionEvent.Type.CREATED)
+            self.assertIsNone(event.sequence)
+        for callback in callbacks:
+            callback()
+        event.refresh_from_db()
+        self.assertEqual(event.sequence, self.start + 1)
+        self.assertEqual(events.latest_cursor(), self.start + 1)
+        published = self.publish.call_args.args[0]
+        self.assertEqual((published['id'], published['petition']['title']), (self.start + 1, 'Pothole'))
+
+    def test_catch_up_returns_events_after_the_cursor(self):
+        first = self._record(self.citizen)
+        second = self._record(self.citizen)
+        feed = events.events_since(self.officer, self.start)
+        self.assertEqual([e['petition_id'] for e in feed['events']], [first.id, second.id])
+        self.assertEqual((feed['cursor'], feed['has_more'], feed['reset']), (self.start + 2, False, False))
+        self.assertEqual(events.events_since(self.officer, feed['cursor'])['events'], [])
+
+    def test_citizens_only_see_their_own_petitions_but_the_cursor_advances(self):
+        own = self._record(self.citizen)
+        self._record(self.neighbour)
+        feed = events.events_since(self.citizen, self.start)
+        self.assertEqual([e['petition_id'] for e in feed['events']], [own.id])
+        self.assertEqual(feed['cursor'], self.start + 2)
+
+    def test_pages_end_at_the_last_returned_event(self):
+        petitions = [self._record(self.citizen) for _ in range(3)]
+        feed = events.events_since(self.officer, self.start, limit=2)
+        self.assertEqual([e['petition_id'] for e in feed['events']], [p.id for p in petitions[:2]])
+        self.assertEqual((feed['cursor'], feed['has_more']), (self.start + 2, True))
+        rest = events.events_since(self.officer, feed['cursor'], limit=2)
+        self.assertEqual([e['petition_id'] for e in rest['events']], [petitions[2].id])
+        self.assertFalse(rest['has_more'])
+
+    def test_cursor_older_than_retained_events_asks_for_a_reset(self):
+        for _ in range(3):
+            self._record(self.citizen)
+        PetitionEvent.objects.filter(sequence__lte=self.start + 1).delete()
+        feed = events.events_since(self.officer, self.start)
+        self.assertEqual((feed['events'], feed['reset'], feed['cursor']), ([], True, self.start + 3))
+        self.assertFalse(events.events_since(self.officer, self.start + 1)['reset'])
+
+    def test_unsequenced_events_are_swept(self):
+        petition = Petition.objects.create(title='Pothole', description='Deep pothole', citizen=self.citizen)
+        with self.captureOnCommitCallbacks():
+            event = events.record_event(petition, PetitionEvent.Type.CREATED)
+        # The post-commit step never ran
+        with self.settings(PETITION_EVENTS={'sequence_grace_seconds': -60}):
+            self.assertEqual(events.sequence_pending_events(), 1)
+        event.refresh_from_db()
+        self.assertEqual(event.sequence, self.start + 1)
+
+    def test_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(self.officer)
+        self.assertEqual(client.get('/api/petitions/changes/', {'since': 'latest'}).status_code, 400)
+        response = client.get('/api/petitions/changes/')
+        self.assertEqual((response.data['cursor'], response.data['events']), (self.start, []))
+        petition = self._record(self.citizen, PetitionEvent.Type.DELETED)
+        response = client.get('/api/petitions/changes/', {'since': self.start})
+        self.assertEqual(response.data['events'][0]['type'], 'DELETED')
+        self.assertEqual(response.data['events'][0]['petition'], {'id': petition.id})
@@ -0,0 +1,110 @@
+"""
+Chunked Upload API
+
+POST   /api/uploads/                     start an upload {filename, size, content_type}
+GET    /api/uploads/{id}/                upload status (resume from `received`)
+PUT    /api/uploads/{id}/                append a raw chunk at the `Upload-Offset` header
+POST   /api/uploads/{id}/complete/       finish {sha256 (optional)} -> blob id
+DELETE /api/uploads/{id}/                cancel
+
+Completed uploads are attached by passing their ids as `blob_ids` when
+creating a petition, or `blob_id` when uploading a resolution document.
+"""
+
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from .models import UploadSession
+from .uploads import UploadError, upload_settings, start_upload, append_chunk, complete_upload, abort_upload
+
+def _session_data(session):
+    return {
+        'upload_id': str(session.id),
+        'filename': session.filename,
+        'size': session.size,
+        'received': session.received,
+        'max_chunk_size': upload_settings()['max_chunk_size'],
+    }
+
+def _error(exc):
+    return Response({'error': exc.message}, status=exc.status)
+
+def _int_or_none(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+class UploadSessionListView(APIView):
+    """Start a resumable upload."""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        try:
+            session = start_upload(
+                request.user,
+                request.data.get('filename', ''),
+                _int_or_none(request.data.get('size')),
+                request.data.get('content_type', ''),
+            )
+        except UploadError as e:
+            return _error(e)
+        return Response(_session_data(session), status=status.HTTP_201_CREATED)
+
+class UploadSessionDetailView(APIView):
+    """Status, chunk append and cancel for one upload."""
+    permission_classes = [IsAuthenticated]
+
+    def _get_session(self, request, upload_id):
+        return UploadSession.objects.filter(id=upload_id, owner=request.user).first()
+
+    def get(self, request, upload_id):
+        session = self._get_session(request, upload_id)
+        if session is None:
+            return Response({'error': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(_session_data(session))
+
+    def put(self, request, upload_id):
+        session = self._get_session(request, upload_id)
+        if session is None:
+            return Response({'error': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        offset = _int_or_none(request.headers.get('Upload-Offset', request.query_params.get('offset')))
+        if offset is None:
+            return Response({'error': 'Upload-Offset header is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Quotas are checked against Content-Length before the body is read;
+        # the body is then streamed to disk without request.data buffering it
+        try:
+            received = append_chunk(session, offset, _int_or_none(request.META.get('CONTENT_LENGTH')), request.stream)
+        except UploadError as e:
+            return _error(e)
+        return Response({'upload_id': str(session.id), 'received': received, 'size': session.size})
+
+    def delete(self, request, upload_id):
+        session = self._get_session(request, upload_id)
+        if session is None:
+            return Response({'error': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND)
+        abort_upload(session)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+class UploadCompleteView(APIView):
+    """Finish an upload and turn it into a blob."""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, upload_id):
+        session = UploadSession.objects.filter(id=upload_id, owner=request.user).first()
+        if session is None:
+            return Response({'error': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            blob = complete_upload(session, request.data.get('sha256'))
+        except UploadError as e:
+            return _error(e)
+        return Response({
+            'blob_id': str(blob.id),
+            'filename': blob.filename,
+            'size': blob.size,
+            'sha256': blob.sha256,
+        }, status=status.HTTP_201_CREATED)
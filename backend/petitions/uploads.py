@@ -0,0 +1,242 @@
+"""
+Resumable Chunked Uploads
+
+Upload flow:
+1. init     - declare filename and size; quotas are checked before any data is sent
+2. append   - PUT raw chunks at `Upload-Offset`; each chunk is streamed from the
+              request body straight into a staging file in fixed-size blocks
+3. complete - the staged file is moved into storage as a Blob
+
+A SHA-256 of the content is computed while chunks arrive. If the process
+restarted mid-upload (or chunks went to another worker), it is recomputed
+from the staging file on completion. Petitions and resolution documents then
+reference blobs by id instead of re-uploading the file.
+"""
+
+import hashlib
+import os
+import threading
+from datetime import timedelta
+from django.conf import settings
+from django.core.files import File
+from django.db.models import Sum
+from django.utils import timezone
+from petitions.models import Blob, UploadSession
+import logging
+
+logger = logging.getLogger(__name__)
+
+READ_BLOCK_SIZE = 64 * 1024
+
+DEFAULT_UPLOAD_SETTINGS = {
+    'staging_dir': os.path.join(settings.MEDIA_ROOT, 'upload_staging'),
+    'max_chunk_size': 5 * 1024 * 1024,
+    'max_file_size': 25 * 1024 * 1024,
+    'max_files_per_petition': 10,
+    'max_total_size': 50 * 1024 * 1024,       # per petition
+    'max_pending_uploads': 10,                # per user
+    'max_pending_bytes': 200 * 1024 * 1024,   # per user
+    'session_ttl_hours': 24,
+    'unattached_blob_ttl_hours': 72,
+}
+
+def upload_settings():
+    return {**DEFAULT_UPLOAD_SETTINGS, **getattr(settings, 'UPLOADS', {})}
+
+class UploadError(Exception):
+    """Upload request rejected; `status` is the HTTP status to return."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+# In-process hashing state: session id -> (sha256 hasher, bytes hashed)
+_hashers = {}
+_hashers_lock = threading.Lock()
+# Session ids with a chunk being written in this process
+_active = set()
+
+def staging_path(session):
+    return os.path.join(upload_settings()['staging_dir'], f"{session.id}.part")
+
+def start_upload(user, filename, size, content_type=''):
+    """Create an upload session after checking size and per-user quotas."""
+    config = upload_settings()
+    filename = os.path.basename(filename or '').strip()
+    if not filename:
+        raise UploadError("filename is required")
+    if size is None or size <= 0:
+        raise UploadError("size must be a positive number of bytes")
+    if size > config['max_file_size']:
+        raise UploadError(f"File exceeds the {config['max_file_size']} byte limit", status=413)
+
+    pending = UploadSession.objects.filter(owner=user)
+    if pending.count() >= config['max_pending_uploads']:
+        raise UploadError("Too many unfinished uploads; complete or cancel some first", status=429)
+    pending_bytes = pending.aggregate(total=Sum('size'))['total'] or 0
+    if pending_bytes + size > config['max_pending_bytes']:
+        raise UploadError("Upload quota exceeded; complete or cancel unfinished uploads", status=413)
+
+    session = UploadSession.objects.create(owner=user, filename=filename, size=size, content_type=content_type or '')
+    os.makedirs(config['staging_dir'], exist_ok=True)
+    open(staging_path(session), 'wb').close()
+    with _hashers_lock:
+        _hashers[session.id] = (hashlib.sha256(), 0)
+    return session
+
+def append_chunk(session, offset, length, stream):
+    """
+    Write `length` bytes from `stream` at `offset` and return bytes received.
+
+    Chunks must be contiguous (offset == received). A short read (client
+    disconnect) keeps what arrived, so the client can resume from `received`.
+    """
+    config = upload_settings()
+    if length is None:
+        raise UploadError("Content-Length is required", status=411)
+    if length <= 0:
+        raise UploadError("Empty chunk")
+    if length > config['max_chunk_size']:
+        raise UploadError(f"Chunk exceeds the {config['max_chunk_size']} byte limit", status=413)
+    if offset != session.received:
+        raise UploadError(f"Expected offset {session.received}", status=409)
+    if offset + length > session.size:
+        raise UploadError("Chunk extends past the declared file size", status=413)
+
+    with _hashers_lock:
+        if session.id in _active:
+            raise UploadError("Another chunk for this upload is in progress", status=409)
+        _active.add(session.id)
+        hasher, hashed = _hashers.pop(session.id, (None, None))
+        if hashed != offset:
+            hasher = None
+
+    written = 0
+    try:
+        with open(staging_path(session), 'r+b') as f:
+            f.seek(offset)
+            while written < length:
+                block = stream.read(min(READ_BLOCK_SIZE, length - written))
+                if not block:
+                    break
+                f.write(block)
+                if hasher is not None:
+                    hasher.update(block)
+                written += len(block)
+    except FileNotFoundError:
+        raise UploadError("Upload data is missing; start a new upload", status=410)
+    finally:
+        with _hashers_lock:
+            _active.discard(session.id)
+            if hasher is not None:
+                _hashers[session.id] = (hasher, offset + written)
+
+    # Conditional update guards against a concurrent chunk on another worker
+    updated = UploadSession.objects.filter(id=session.id, received=offset).update(
+        received=offset + written, updated_at=timezone.now()
+    )
+    if not updated:
+        raise UploadError("Upload offset changed concurrently", status=409)
+    session.received = offset + written
+    return session.received
+
+def _digest(session, path):
+    with _hashers_lock:
+        hasher, hashed = _hashers.pop(session.id, (None, None))
+    if hasher is not None and hashed == session.size:
+        return hasher.hexdigest()
+
+    # Hash state was lost (restart / other worker): re-read the staged file
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(READ_BLOCK_SIZE), b''):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+def complete_upload(session, expected_sha256=None):
+    """Move a fully received upload into storage and return its Blob."""
+    if session.received != session.size:
+        raise UploadError(f"Upload incomplete: {session.received} of {session.size} bytes received", status=409)
+
+    path = staging_path(session)
+    if not os.path.exists(path):
+        raise UploadError("Upload data is missing; start a new upload", status=410)
+    with open(path, 'r+b') as f:
+        # Drop bytes past the declared size left by an interrupted retry
+        f.truncate(session.size)
+
+    sha256 = _digest(session, path)
+    if expected_sha256 and expected_sha256.lower() != sha256:
+        abort_upload(session)
+        raise UploadError("Checksum mismatch; the upload was discarded", status=422)
+
+    blob = Blob(
+        owner=session.owner,
+        filename=session.filename,
+        content_type=session.content_type,
+        size=session.size,
+        sha256=sha256,
+    )
+    with open(path, 'rb') as f:
+        content = File(f)
+        # Already hashed: content-addressed storage skips re-reading duplicates
+        content.sha256 = sha256
+        blob.file.save(session.filename, content, save=False)
+    blob.save()
+
+    abort_upload(session)
+    logger.info(f"✅ Upload {session.id} stored as blob {blob.id} ({blob.size} bytes)")
+    return blob
+
+def abort_upload(session):
+    """Discard an upload session and its staged data."""
+    with _hashers_lock:
+        _hashers.pop(session.id, None)
+    try:
+        os.remove(staging_path(session))
+    except FileNotFoundError:
+        pass
+    session.delete()
+
+def cleanup_stale_uploads():
+    """
+    Remove upload sessions idle for longer than `session_ttl_hours` and
+    blobs never attached within `unattached_blob_ttl_hours`. Their stored
+    files are released to content storage garbage collection.
+    """
+    config = upload_settings()
+    now = timezone.now()
+    stale = list(UploadSession.objects.filter(updated_at__lt=now - timedelta(hours=config['session_ttl_hours'])))
+    for session in stale:
+        abort_upload(session)
+
+    unattached = Blob.objects.filter(
+        created_at__lt=now - timedelta(hours=config['unattached_blob_ttl_hours']),
+        attachments__isnull=True,
+        resolution_documents__isnull=True,
+    )
+    blobs, _ = unattached.delete()
+    return len(stale) + blobs
+
+def resolve_blobs(user, blob_ids):
+    """The user's blobs for `blob_ids`, in order; raises UploadError if any is unknown."""
+    blobs = {blob.id: blob for blob in Blob.objects.filter(id__in=blob_ids, owner=user)}
+    missing = [str(blob_id) for blob_id in blob_ids if blob_id not in blobs]
+    if missing:
+        raise UploadError(f"Unknown upload ids: {', '.join(missing)}")
+    return [blobs[blob_id] for blob_id in blob_ids]
+
+def check_petition_quota(files, blobs):
+    """Enforce per-petition file count and size limits on direct files + blobs."""
+    config = upload_settings()
+    if len(files) + len(blobs) > config['max_files_per_petition']:
+        raise UploadError(f"At most {config['max_files_per_petition']} attachments per petition")
+
+    oversized = [f.name for f in files if f.size > config['max_file_size']]
+    if oversized:
+        raise UploadError(f"File exceeds the {config['max_file_size']} byte limit: {', '.join(oversized)}", status=413)
+
+    total = sum(f.size for f in files) + sum(b.size for b in blobs)
+    if total > config['max_total_size']:
+        raise UploadError(f"Attachments exceed the {config['max_total_size']} byte total limit", status=413)
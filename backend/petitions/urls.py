@@ -1,10 +1,22 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import PetitionViewSet
+from .upload_views import UploadSessionListView, UploadSessionDetailView, UploadCompleteView
+from .mongo_views import (
+    MongoPetitionListView, MongoPetitionStatsView,
+    async_petition_list, async_petition_stats,
+)
 
 router = DefaultRouter()
 router.register(r'petitions', PetitionViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('uploads/', UploadSessionListView.as_view(), name='upload-start'),
+    path('uploads/<uuid:upload_id>/', UploadSessionDetailView.as_view(), name='upload-detail'),
+    path('uploads/<uuid:upload_id>/complete/', UploadCompleteView.as_view(), name='upload-complete'),
+    path('mongo/petitions/', MongoPetitionListView.as_view(), name='mongo-petition-list'),
+    path('mongo/petitions/stats/', MongoPetitionStatsView.as_view(), name='mongo-petition-stats'),
+    path('async/mongo/petitions/', async_petition_list, name='async-mongo-petition-list'),
+    path('async/mongo/petitions/stats/', async_petition_stats, name='async-mongo-petition-stats'),
 ]
@@ -1,14 +1,24 @@
 from rest_framework import viewsets, permissions, parsers, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
-from .models import Petition, Attachment, Department, SLA, ResolutionDocument
+from rest_framework.exceptions import ValidationError
+from django.db import transaction
+from .models import Petition, Attachment, Department, SLA, ResolutionDocument, PetitionEvent
 from .serializers import PetitionSerializer, AttachmentSerializer, ResolutionDocumentSerializer, AuditLogSerializer
 from .mongo_repository import PetitionRepository
 from .assignment import assign_to_officer
+from .taxonomy import get_department, match_department
+from .search import search_petitions
+from .similar import similar_petitions
+from .response_cache import cached_response, invalidate_petitions
+from .events import record_event, latest_cursor, events_since
+from .uploads import UploadError, resolve_blobs, check_petition_quota
 from .audit import log_petition_created, log_status_change, log_officer_assigned, log_document_upload, get_petition_audit_trail
 from ai_agent.services import classify_department, predict_urgency
 from ai_agent.duplicate_detection import check_duplicate, add_petition_to_index
 import logging
+import uuid
+from functools import partial
 
 logger = logging.getLogger(__name__)
 
@@ -16,14 +26,21 @@ class PetitionViewSet(viewsets.ModelViewSet):
     queryset = Petition.objects.all().order_by('-created_at')
     serializer_class = PetitionSerializer
     permission_classes = [permissions.IsAuthenticated]
-    parser_classes = [parsers.MultiPartParser, parsers.FormParser]
+    parser_classes = [parsers.MultiPartParser, parsers.FormParser, parsers.JSONParser]
 
     def perform_create(self, serializer):
         title = serializer.validated_data.get('title', '')
         description = serializer.validated_data.get('description', '')
         
-        # Get uploaded files from request
+        # Get uploaded files from request, plus previously uploaded blobs
         uploaded_files = self.request.FILES.getlist('uploaded_files')
+        serializer.validated_data.pop('uploaded_files', None)
+        blob_ids = serializer.validated_data.pop('blob_ids', [])
+        try:
+            blobs = resolve_blobs(self.request.user, blob_ids)
+            check_petition_quota(uploaded_files, blobs)
+        except UploadError as e:
+            raise ValidationError({'attachments': e.message})
         
         # Check for duplicates
         duplicate_check = check_duplicate(title, description)
@@ -32,33 +49,49 @@ class PetitionViewSet(viewsets.ModelViewSet):
         dept_name = classify_department(title, description)
         urgency = predict_urgency(title, description)
         
-        department, _ = Department.objects.get_or_create(name=dept_name)
-        
-        # Save petition in Django ORM
-        petition = serializer.save(
-            citizen=self.request.user, 
-            department=department, 
-            urgency=urgency,
-            is_duplicate=duplicate_check['is_duplicate']
-        )
-        
-        # Save attachments
-        attachment_paths = []
-        for file in uploaded_files:
-            att = Attachment.objects.create(petition=petition, file=file)
-            attachment_paths.append(str(att.file.url))
+        department = get_department(dept_name)
+        dept_name = department.name
         
-        # Auto-assign to officer
-        assigned_officer = assign_to_officer(petition)
-        if assigned_officer:
-            log_officer_assigned(petition, self.request.user, assigned_officer)
+        # Store direct uploads before the transaction, so the database write
+        # lock is not held while files are hashed and written to disk
+        file_field = Attachment._meta.get_field('file')
+        stored_files = [file_field.storage.save(file_field.generate_filename(None, file.name), file) for file in uploaded_files]
         
-        # Audit log: Petition created
-        log_petition_created(petition, self.request.user)
+        # One transaction for petition, attachments, assignment and audit rows:
+        # a single commit instead of one per row
+        with transaction.atomic():
+            # Save petition in Django ORM
+            petition = serializer.save(
+                citizen=self.request.user, 
+                department=department, 
+                urgency=urgency,
+                is_duplicate=duplicate_check['is_duplicate']
+            )
+            
+            # Save attachments
+            attachment_paths = []
+            for name in stored_files:
+                att = Attachment.objects.create(petition=petition, file=name)
+                attachment_paths.append(str(att.file.url))
+            for blob in blobs:
+                # Reference the stored blob; no copy of the file is made
+                att = Attachment.objects.create(petition=petition, file=blob.file.name, blob=blob)
+                attachment_paths.append(str(att.file.url))
+            
+            # Auto-assign to officer
+            assigned_officer = assign_to_officer(petition)
+            if assigned_officer:
+                log_officer_assigned(petition, self.request.user, assigned_officer)
+            
+            # Audit log: Petition created
+            log_petition_created(petition, self.request.user)
+            invalidate_petitions(petition.id)
+            record_event(petition, PetitionEvent.Type.CREATED)
         
         # Also save in MongoDB
         try:
             mongo_petition = PetitionRepository.create_petition({
+                'petition_id': petition.id,
                 'title': title,
                 'description': description,
                 'citizen_id': str(self.request.user.id),
@@ -81,6 +114,21 @@ class PetitionViewSet(viewsets.ModelViewSet):
         # Add to ChromaDB index for future duplicate detection
         add_petition_to_index(petition.id, title, description)
 
+    def list(self, request, *args, **kwargs):
+        return cached_response(request, 'list', partial(super().list, request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        build = partial(super().retrieve, request, *args, **kwargs)
+        pk = str(kwargs.get('pk', ''))
+        if not pk.isdigit():
+            return build()
+        return cached_response(request, 'detail', build, petition_id=int(pk))
+
+    def perform_destroy(self, instance):
+        invalidate_petitions(instance.id)
+        record_event(instance, PetitionEvent.Type.DELETED)
+        instance.delete()
+
     def get_queryset(self):
         user = self.request.user
         if user.role == 'CITIZEN':
@@ -90,26 +138,40 @@ class PetitionViewSet(viewsets.ModelViewSet):
             return Petition.objects.all()
         return Petition.objects.all()
     
-    @action(detail=True, methods=['post'], parser_classes=[parsers.MultiPartParser])
+    @action(detail=True, methods=['post'], parser_classes=[parsers.MultiPartParser, parsers.JSONParser])
     def upload_resolution(self, request, pk=None):
         """Upload resolution document for a petition."""
         petition = self.get_object()
         file = request.FILES.get('file')
+        blob_id = request.data.get('blob_id')
         description = request.data.get('description', '')
         
-        if not file:
+        blob = None
+        if blob_id:
+            try:
+                blob = resolve_blobs(request.user, [uuid.UUID(str(blob_id))])[0]
+            except (ValueError, UploadError):
+                return Response({'error': 'Unknown blob_id'}, status=status.HTTP_400_BAD_REQUEST)
+        elif not file:
             return Response({'error': 'No file provided'}, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            try:
+                check_petition_quota([file], [])
+            except UploadError as e:
+                return Response({'error': e.message}, status=e.status)
         
         # Create resolution document
         doc = ResolutionDocument.objects.create(
             petition=petition,
-            file=file,
+            file=blob.file.name if blob else file,
+            blob=blob,
             description=description,
             uploaded_by=request.user
         )
         
         # Log the upload
-        log_document_upload(petition, request.user, 'Resolution', file.name)
+        log_document_upload(petition, request.user, 'Resolution', blob.filename if blob else file.name)
+        invalidate_petitions(petition.id)
         
         serializer = ResolutionDocumentSerializer(doc)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -117,20 +179,125 @@ class PetitionViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['get'])
     def audit_log(self, request, pk=None):
         """Get audit trail for a petition."""
+        def build():
+            petition = self.get_object()
+            logs = get_petition_audit_trail(petition)
+            serializer = AuditLogSerializer(logs, many=True)
+            return Response(serializer.data)
+
+        if not str(pk).isdigit():
+            return build()
+        return cached_response(request, 'audit_log', build, petition_id=int(pk))
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        Ranked full-text search over title, description and remarks.
+
+        Query params: q (required), status (repeatable or comma-separated),
+        department, urgency, page, page_size.
+        """
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'error': 'q is required'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            page = max(1, int(request.query_params.get('page', 1)))
+            page_size = min(100, max(1, int(request.query_params.get('page_size', 20))))
+        except ValueError:
+            return Response({'error': 'page and page_size must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+
+        statuses = [item for value in request.query_params.getlist('status') for item in value.split(',') if item]
+        invalid = [item for item in statuses if item not in Petition.Status.values]
+        if invalid:
+            return Response({'error': f"Unknown status: {', '.join(invalid)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        department = request.query_params.get('department')
+        filters = {
+            'status': statuses,
+            # Accept aliases ("water board") for canonical department names
+            'department': (match_department(department) or department) if department else None,
+            'urgency': request.query_params.get('urgency'),
+        }
+        return Response(search_petitions(request.user, query, filters, page, page_size))
+
+    @action(detail=False, methods=['get'])
+    def similar(self, request):
+        """
+        Petitions similar to an existing petition (?petition=<id>) or free
+        text (?q=), fusing vector and keyword rankings. Officers only see
+        their own department. Also accepts status, urgency, page, page_size.
+        """
+        if request.user.role == 'CITIZEN':
+            return Response({'error': 'Only officers and admins can use similar search'}, status=status.HTTP_403_FORBIDDEN)
+
+        petition = None
+        petition_id = request.query_params.get('petition')
+        query = request.query_params.get('q', '').strip()
+        if petition_id:
+            if not petition_id.isdigit():
+                return Response({'error': 'petition must be an id'}, status=status.HTTP_400_BAD_REQUEST)
+            petition = self.get_queryset().filter(id=int(petition_id)).first()
+            if petition is None:
+                return Response({'error': 'Petition not found'}, status=status.HTTP_404_NOT_FOUND)
+        elif not query:
+            return Response({'error': 'petition or q is required'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            page = max(1, int(request.query_params.get('page', 1)))
+            page_size = min(100, max(1, int(request.query_params.get('page_size', 20))))
+        except ValueError:
+            return Response({'error': 'page and page_size must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+
+        filters = {
+            'status': [item for value in request.query_params.getlist('status') for item in value.split(',') if item],
+            'urgency': request.query_params.get('urgency'),
+        }
+        return Response(similar_petitions(request.user, query, petition, filters, page, page_size))
+
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        """
+        Petition events after cursor `since` (create, status, assignment,
+        deletion), for catching up after a WebSocket reconnect. Without
+        `since`, returns the current cursor. `reset: true` means the cursor
+        is too old: re-fetch the list.
+        """
+        since = request.query_params.get('since')
+        if since is None:
+            return Response({'events': [], 'cursor': latest_cursor(), 'has_more': False, 'reset': False})
+        if not since.isdigit():
+            return Response({'error': 'since must be a cursor returned earlier'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(events_since(request.user, int(since)))
+
+    @action(detail=True, methods=['get'])
+    def remarks(self, request, pk=None):
+        """Get paginated remark history for a petition (newest first)."""
         petition = self.get_object()
-        logs = get_petition_audit_trail(petition)
-        serializer = AuditLogSerializer(logs, many=True)
-        return Response(serializer.data)
-    
+        try:
+            page = max(1, int(request.query_params.get('page', 1)))
+            page_size = min(100, max(1, int(request.query_params.get('page_size', 20))))
+        except ValueError:
+            return Response({'error': 'page and page_size must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(PetitionRepository.get_remarks(petition.id, page, page_size))
+
     def perform_update(self, serializer):
         """Trigger notification when petition status is updated."""
-        old_status = self.get_object().status
+        old_petition = self.get_object()
+        old_status = old_petition.status
+        old_officer_id = old_petition.assigned_officer_id
         petition = serializer.save()
         new_status = petition.status
+        invalidate_petitions(petition.id)
+        if old_status != new_status:
+            record_event(petition, PetitionEvent.Type.STATUS_CHANGED)
+        if old_officer_id != petition.assigned_officer_id:
+            record_event(petition, PetitionEvent.Type.ASSIGNED)
+        
+        # `remarks` is not a model field, so it never reaches validated_data
+        remarks = str(self.request.data.get('remarks', '') or '').strip()
         
         # Audit log: Status change
         if old_status != new_status:
-            remarks = serializer.validated_data.get('remarks', '')
             log_status_change(petition, self.request.user, old_status, new_status, remarks)
         
         # Sync update to MongoDB
@@ -146,6 +313,18 @@ class PetitionViewSet(viewsets.ModelViewSet):
         except Exception as e:
             logger.error(f"MongoDB sync error: {e}")
         
+        # Remark history served by the remarks action
+        if remarks or old_status != new_status:
+            remark = {
+                'text': remarks,
+                'author': self.request.user.username,
+                'role': self.request.user.role,
+            }
+            if old_status != new_status:
+                remark.update({'old_status': old_status, 'new_status': new_status})
+            if not PetitionRepository.add_remark(petition.id, remark):
+                logger.warning(f"⚠️ Remark for petition {petition.id} not stored in MongoDB")
+        
         # Send notification if status changed
         if old_status != new_status:
             from petitions.tasks import send_status_update_notification
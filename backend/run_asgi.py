@@ -0,0 +1,5 @@
+import uvicorn
+
+if __name__ == '__main__':
+    print("Starting Uvicorn (ASGI) server on http://0.0.0.0:8001")
+    uvicorn.run('config.asgi:application', host='0.0.0.0', port=8001, log_level='warning')
@@ -7,12 +7,20 @@ Handles User data storage and retrieval in MongoDB.
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from bson import ObjectId
-from config.mongodb import get_collection
+from pymongo import UpdateOne
+from config.mongodb import get_collection, get_async_collection, bulk_write_in_batches
 from django.contrib.auth.hashers import make_password, check_password
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 
+USER_ROLES = ('CITIZEN', 'OFFICER', 'ADMIN')
+# Fields bulk_upsert_users copies verbatim; anything else is dropped
+BULK_USER_FIELDS = ('email', 'role', 'is_active', 'last_login')
+# Inputs bulk_upsert_users consumes itself rather than copying
+BULK_USER_INPUTS = ('username', 'password', 'password_hash', 'date_joined', '_id')
+
 class UserRepository:
     """Repository for User operations in MongoDB."""
     
@@ -24,15 +32,41 @@ class UserRepository:
         return get_collection(UserRepository.COLLECTION_NAME)
     
     @staticmethod
-    def create_user(username: str, email: str, password: str, role: str = 'CITIZEN') -> Optional[Dict]:
+    def _resolve_password_hash(password: Optional[str], password_hash: Optional[str]) -> Optional[str]:
+        """Reuse an existing hash; only hash plain passwords when none is supplied."""
+        if password_hash:
+            return password_hash
+        if password:
+            return make_password(password)
+        return None
+    
+    @staticmethod
+    def _build_user_doc(username: str, email: str, password_hash: str, role: str) -> Dict:
+        """Build a new user document."""
+        return {
+            'username': username,
+            'email': email,
+            'password': password_hash,
+            'role': role,
+            'is_active': True,
+            'is_staff': role == 'ADMIN',
+            'is_superuser': role == 'ADMIN',
+            'date_joined': datetime.utcnow(),
+            'last_login': None
+        }
+    
+    @staticmethod
+    def create_user(username: str, email: str, password: Optional[str] = None, role: str = 'CITIZEN',
+                    password_hash: Optional[str] = None) -> Optional[Dict]:
         """
         Create a new user in MongoDB.
         
         Args:
             username: User's username
             email: User's email
-            password: Plain text password (will be hashed)
+            password: Plain text password (hashed only if password_hash is not given)
             role: User role (CITIZEN, OFFICER, ADMIN)
+            password_hash: Already-computed Django password hash to store as-is
         
         Returns:
             Created user document or None
@@ -48,17 +82,9 @@ class UserRepository:
                 logger.warning(f"User {username} already exists")
                 return None
             
-            user_doc = {
-                'username': username,
-                'email': email,
-                'password': make_password(password),
-                'role': role,
-                'is_active': True,
-                'is_staff': role == 'ADMIN',
-                'is_superuser': role == 'ADMIN',
-                'date_joined': datetime.utcnow(),
-                'last_login': None
-            }
+            user_doc = UserRepository._build_user_doc(
+                username, email, UserRepository._resolve_password_hash(password, password_hash), role
+            )
             
             result = collection.insert_one(user_doc)
             user_doc['_id'] = result.inserted_id
@@ -100,7 +126,7 @@ class UserRepository:
             User document if authenticated, None otherwise
         """
         user = UserRepository.get_user_by_username(username)
-        if user and check_password(password, user['password']):
+        if user and user.get('password') and check_password(password, user['password']):
             # Update last login
             collection = UserRepository._get_collection()
             if collection is not None:
@@ -151,3 +177,181 @@ class UserRepository:
         except Exception as e:
             logger.error(f"Failed to delete user: {e}")
             return False
+    
+    @staticmethod
+    def bulk_upsert_users(users: List[Dict], batch_size: Optional[int] = None) -> Dict:
+        """
+        Insert or update many users keyed by username.
+        
+        Only BULK_USER_FIELDS are written. A plain 'password' is hashed (or a
+        ready 'password_hash' stored as-is), and is_staff/is_superuser follow
+        the role exactly as in create_user. Users without a username or with
+        an unknown role are skipped and reported in the errors.
+        
+        Args:
+            users: User dicts, each containing 'username'
+            batch_size: Operations per bulk_write batch
+        
+        Returns:
+            Bulk write summary with per-batch errors
+        """
+        operations = []
+        rejected = []
+        ignored = set()
+        
+        for data in users:
+            username = data.get('username')
+            role = data.get('role')
+            if not username or (role is not None and role not in USER_ROLES):
+                rejected.append(username)
+                continue
+            
+            fields = {k: v for k, v in data.items() if k in BULK_USER_FIELDS}
+            ignored.update(k for k in data if k not in BULK_USER_FIELDS and k not in BULK_USER_INPUTS)
+            password_hash = UserRepository._resolve_password_hash(data.get('password'), data.get('password_hash'))
+            if password_hash:
+                fields['password'] = password_hash
+            if role is not None:
+                fields['is_staff'] = fields['is_superuser'] = role == 'ADMIN'
+            
+            on_insert = {'date_joined': data.get('date_joined', datetime.utcnow())}
+            if 'last_login' not in fields:
+                on_insert['last_login'] = None
+            operations.append(UpdateOne(
+                {'username': username},
+                {'$set': fields, '$setOnInsert': on_insert},
+                upsert=True
+            ))
+        
+        if ignored:
+            logger.warning(f"⚠️ bulk_upsert_users ignored unsupported fields: {sorted(ignored)}")
+        
+        summary = bulk_write_in_batches(UserRepository._get_collection(), operations, batch_size)
+        if rejected:
+            summary['errors'].append({
+                'batch': None,
+                'error': 'Missing username or invalid role',
+                'usernames': rejected
+            })
+        return summary
+
+
+class AsyncUserRepository:
+    """
+    Async repository for User operations in MongoDB.
+    
+    Mirrors UserRepository for ASGI views. Password hashing runs in a worker
+    thread so it does not stall the event loop.
+    """
+    
+    COLLECTION_NAME = UserRepository.COLLECTION_NAME
+    
+    @staticmethod
+    async def _get_collection():
+        """Get users collection."""
+        return await get_async_collection(AsyncUserRepository.COLLECTION_NAME)
+    
+    @staticmethod
+    async def create_user(username: str, email: str, password: Optional[str] = None, role: str = 'CITIZEN',
+                          password_hash: Optional[str] = None) -> Optional[Dict]:
+        """Create a new user in MongoDB."""
+        collection = await AsyncUserRepository._get_collection()
+        if collection is None:
+            logger.error("MongoDB collection not available")
+            return None
+        
+        try:
+            # Check if user exists
+            if await collection.find_one({'username': username}):
+                logger.warning(f"User {username} already exists")
+                return None
+            
+            password_hash = await asyncio.to_thread(UserRepository._resolve_password_hash, password, password_hash)
+            user_doc = UserRepository._build_user_doc(username, email, password_hash, role)
+            
+            result = await collection.insert_one(user_doc)
+            user_doc['_id'] = result.inserted_id
+            
+            logger.info(f"✅ User created in MongoDB: {username}")
+            return user_doc
+            
+        except Exception as e:
+            logger.error(f"Failed to create user: {e}")
+            return None
+    
+    @staticmethod
+    async def get_user_by_username(username: str) -> Optional[Dict]:
+        """Get user by username."""
+        collection = await AsyncUserRepository._get_collection()
+        if collection is None:
+            return None
+        
+        return await collection.find_one({'username': username})
+    
+    @staticmethod
+    async def get_user_by_id(user_id: str) -> Optional[Dict]:
+        """Get user by MongoDB ObjectId."""
+        collection = await AsyncUserRepository._get_collection()
+        if collection is None:
+            return None
+        
+        try:
+            return await collection.find_one({'_id': ObjectId(user_id)})
+        except Exception:
+            return None
+    
+    @staticmethod
+    async def authenticate(username: str, password: str) -> Optional[Dict]:
+        """Authenticate user with username and password."""
+        user = await AsyncUserRepository.get_user_by_username(username)
+        if user and user.get('password') and await asyncio.to_thread(check_password, password, user['password']):
+            # Update last login
+            collection = await AsyncUserRepository._get_collection()
+            if collection is not None:
+                await collection.update_one(
+                    {'_id': user['_id']},
+                    {'$set': {'last_login': datetime.utcnow()}}
+                )
+            return user
+        return None
+    
+    @staticmethod
+    async def get_all_users(role: Optional[str] = None) -> List[Dict]:
+        """Get all users, optionally filtered by role."""
+        collection = await AsyncUserRepository._get_collection()
+        if collection is None:
+            return []
+        
+        query = {'role': role} if role else {}
+        return await collection.find(query).to_list(length=None)
+    
+    @staticmethod
+    async def update_user(user_id: str, updates: Dict) -> bool:
+        """Update user document."""
+        collection = await AsyncUserRepository._get_collection()
+        if collection is None:
+            return False
+        
+        try:
+            result = await collection.update_one(
+                {'_id': ObjectId(user_id)},
+                {'$set': updates}
+            )
+            return result.modified_count > 0
+        except Exception as e:
+            logger.error(f"Failed to update user: {e}")
+            return False
+    
+    @staticmethod
+    async def delete_user(user_id: str) -> bool:
+        """Delete user from MongoDB."""
+        collection = await AsyncUserRepository._get_collection()
+        if collection is None:
+            return False
+        
+        try:
+            result = await collection.delete_one({'_id': ObjectId(user_id)})
+            return result.deleted_count > 0
+        except Exception as e:
+            logger.error(f"Failed to delete user: {e}")
+            return False
@@ -0,0 +1,35 @@
+from celery import shared_task
+from django.contrib.auth import get_user_model
+from users.mongo_repository import UserRepository
+import logging
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+@shared_task
+def sync_user_to_mongo(user_id):
+    """
+    Copy a newly registered Django user into MongoDB.
+    
+    Stores the Django password hash as-is, so the password is hashed once per
+    signup and the sync runs off the request path.
+    """
+    try:
+        user = User.objects.get(id=user_id)
+    except User.DoesNotExist:
+        return f"User {user_id} not found"
+    
+    mongo_user = UserRepository.create_user(
+        username=user.username,
+        email=user.email,
+        role=user.role,
+        password_hash=user.password
+    )
+    
+    if mongo_user:
+        logger.info(f"✅ User synced to MongoDB: {user.username}")
+        return f"Synced user {user.username}"
+    
+    logger.warning(f"⚠️ User created in Django but MongoDB sync failed: {user.username}")
+    return f"MongoDB sync failed for {user.username}"
@@ -1,3 +1,70 @@
-from django.test import TestCase
+from types import SimpleNamespace
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, check_password
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+from users import tasks
+from users.mongo_repository import UserRepository
 
-# Create your tests here.
+
+class BulkUpsertUsersTests(SimpleTestCase):
+    def setUp(self):
+        self.collection = mock.MagicMock()
+        self.collection.bulk_write.side_effect = lambda batch, ordered: SimpleNamespace(
+            inserted_count=0, matched_count=0, modified_count=0, upserted_count=len(batch), deleted_count=0
+        )
+        patcher = mock.patch.object(UserRepository, '_get_collection', return_value=self.collection)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _updates(self):
+        return [op._doc['$set'] for call in self.collection.bulk_write.call_args_list for op in call.args[0]]
+
+    def test_only_whitelisted_fields_are_written(self):
+        UserRepository.bulk_upsert_users([
+            {'username': 'asha', 'email': 'a@example.com', 'role': 'CITIZEN', 'is_superuser': True, 'department': 'x'},
+        ])
+        self.assertEqual(self._updates(), [
+            {'email': 'a@example.com', 'role': 'CITIZEN', 'is_staff': False, 'is_superuser': False},
+        ])
+
+    def test_plain_password_is_hashed(self):
+        UserRepository.bulk_upsert_users([{'username': 'asha', 'password': 's3cret-pass'}])
+        stored = self._updates()[0]['password']
+        self.assertNotEqual(stored, 's3cret-pass')
+        self.assertTrue(check_password('s3cret-pass', stored))
+
+    def test_rows_without_username_or_with_unknown_role_are_reported(self):
+        summary = UserRepository.bulk_upsert_users([{'email': 'x@example.com'}, {'username': 'bob', 'role': 'ROOT'}])
+        self.assertEqual(self._updates(), [])
+        self.assertEqual(summary['errors'][-1]['usernames'], [None, 'bob'])
+
+
+class RegistrationHashingTests(TestCase):
+    def setUp(self):
+        self.collection = mock.MagicMock()
+        self.collection.find_one.return_value = None
+        patcher = mock.patch.object(UserRepository, '_get_collection', return_value=self.collection)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_signup_hashes_the_password_once(self):
+        encode = PBKDF2PasswordHasher.encode
+        with mock.patch.object(PBKDF2PasswordHasher, 'encode', autospec=True, side_effect=encode) as hashed, \
+                mock.patch.object(tasks.sync_user_to_mongo, 'delay', side_effect=tasks.sync_user_to_mongo) as sync:
+            response = APIClient().post('/api/users/register/', {'username': 'asha', 'password': 's3cret-pass'})
+        self.assertEqual(response.status_code, 201)
+        sync.assert_called_once()
+        self.assertEqual(hashed.call_count, 1)
+
+    def test_mongo_copy_reuses_the_django_hash(self):
+        user = get_user_model().objects.create_user('asha', password='s3cret-pass')
+        tasks.sync_user_to_mongo(user.id)
+        stored = self.collection.insert_one.call_args.args[0]
+        self.assertEqual(stored['password'], user.password)
+
+    def test_unavailable_task_queue_does_not_fail_signup(self):
+        with mock.patch.object(tasks.sync_user_to_mongo, 'delay', side_effect=ConnectionError('broker down')):
+            response = APIClient().post('/api/users/register/', {'username': 'bob', 'password': 's3cret-pass'})
+        self.assertEqual(response.status_code, 201)
@@ -2,7 +2,7 @@ from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from .serializers import UserSerializer
-from .mongo_repository import UserRepository
+from .tasks import sync_user_to_mongo
 from django.contrib.auth import get_user_model
 import logging
 
@@ -25,20 +25,9 @@ class RegisterView(generics.CreateAPIView):
         # Create user in Django ORM (for authentication)
         user = serializer.save()
         
-        # Also create in MongoDB
+        # Sync to MongoDB off the request path, reusing the Django password hash
         try:
-            mongo_user = UserRepository.create_user(
-                username=user.username,
-                email=user.email,
-                password=request.data.get('password'),  # Plain password for MongoDB hashing
-                role=user.role
-            )
-            
-            if mongo_user:
-                logger.info(f"✅ User synced to MongoDB: {user.username}")
-            else:
-                logger.warning(f"⚠️ User created in Django but MongoDB sync failed: {user.username}")
-                
+            sync_user_to_mongo.delay(user.id)
         except Exception as e:
             logger.error(f"MongoDB sync error: {e}")
         
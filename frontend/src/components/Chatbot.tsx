@@ -14,6 +14,7 @@ const Chatbot: React.FC = () => {
     ]);
     const [input, setInput] = useState('');
     const [isLoading, setIsLoading] = useState(false);
+    const [sessionId, setSessionId] = useState<string | null>(null);
     const messagesEndRef = useRef<HTMLDivElement>(null);
 
     const scrollToBottom = () => {
@@ -33,18 +34,15 @@ const Chatbot: React.FC = () => {
         setIsLoading(true);
 
         try {
-            // Build conversation history (last 5 messages)
-            const conversationHistory = messages.slice(-5).map(msg => ({
-                role: msg.isUser ? 'user' : 'assistant',
-                content: msg.text
-            }));
-
+            // Conversation context is kept server-side in the chat session
             const response = await api.post('/ai/chat/', {
                 message: userMessage,
-                conversation_history: conversationHistory,
+                session_id: sessionId,
                 timestamp: new Date().toISOString()
             });
 
+            setSessionId(response.data.session_id);
+
             setMessages(prev => [...prev, {
                 text: response.data.response,
                 isUser: false
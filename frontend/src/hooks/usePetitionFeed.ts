@@ -0,0 +1,114 @@
+import { useEffect, useState } from 'react';
+import api, { petitionFeedUrl } from '../services/api';
+
+const PING_INTERVAL_MS = 25000;
+const MAX_RETRY_DELAY_MS = 30000;
+const CLOSE_UNAUTHORIZED = 4401;
+
+export interface PetitionEvent {
+    id: number;
+    type: 'CREATED' | 'STATUS_CHANGED' | 'ASSIGNED' | 'DELETED';
+    petition_id: number;
+    petition: Record<string, any>;
+    created_at: string;
+}
+
+export const applyPetitionEvent = <T extends { id: number }>(petitions: T[], event: PetitionEvent): T[] => {
+    if (event.type === 'DELETED') {
+        return petitions.filter(p => p.id !== event.petition_id);
+    }
+    const index = petitions.findIndex(p => p.id === event.petition_id);
+    if (index === -1) {
+        return [event.petition as T, ...petitions];
+    }
+    const next = [...petitions];
+    next[index] = { ...next[index], ...event.petition };
+    return next;
+};
+
+/**
+ * Loads the petition list once, then keeps it current from the WebSocket
+ * push channel instead of re-fetching. On reconnect the server replays
+ * events after our cursor; when it asks for a resync we page through
+ * petitions/changes/?since= (or reload everything if the cursor expired).
+ */
+export const usePetitionFeed = <T extends { id: number }>() => {
+    const [petitions, setPetitions] = useState<T[]>([]);
+    const [loading, setLoading] = useState(true);
+
+    useEffect(() => {
+        let socket: WebSocket | null = null;
+        let cursor = 0;
+        let closed = false;
+        let retries = 0;
+        let retryTimer: ReturnType<typeof setTimeout> | undefined;
+        let pingTimer: ReturnType<typeof setInterval> | undefined;
+
+        const apply = (event: PetitionEvent) => {
+            cursor = Math.max(cursor, event.id);
+            setPetitions(prev => applyPetitionEvent(prev, event));
+        };
+
+        const loadAll = async () => {
+            // Cursor first, so changes made while the list loads are replayed
+            const changes = await api.get('petitions/changes/');
+            cursor = changes.data.cursor;
+            const response = await api.get('petitions/');
+            setPetitions(response.data);
+        };
+
+        const catchUp = async () => {
+            let hasMore = true;
+            while (hasMore && !closed) {
+                const response = await api.get('petitions/changes/', { params: { since: cursor } });
+                if (response.data.reset) {
+                    await loadAll();
+                    return;
+                }
+                response.data.events.forEach(apply);
+                cursor = Math.max(cursor, response.data.cursor);
+                hasMore = response.data.has_more;
+            }
+        };
+
+        const connect = () => {
+            const token = localStorage.getItem('token');
+            if (!token || closed) return;
+
+            socket = new WebSocket(`${petitionFeedUrl()}?token=${encodeURIComponent(token)}&since=${cursor}`);
+            socket.onopen = () => {
+                retries = 0;
+                pingTimer = setInterval(() => socket?.send(JSON.stringify({ type: 'ping' })), PING_INTERVAL_MS);
+            };
+            socket.onmessage = (message) => {
+                const data = JSON.parse(message.data);
+                if (data.type === 'event') {
+                    apply(data.event);
+                } else if (data.type === 'resync') {
+                    catchUp().catch(error => console.error('Failed to catch up on petition changes', error));
+                }
+            };
+            socket.onclose = (event) => {
+                clearInterval(pingTimer);
+                if (closed || event.code === CLOSE_UNAUTHORIZED) return;
+                const delay = Math.min(MAX_RETRY_DELAY_MS, 1000 * 2 ** retries);
+                retries += 1;
+                retryTimer = setTimeout(connect, delay);
+            };
+        };
+
+        loadAll()
+            .then(connect)
+            .catch(error => console.error('Failed to fetch petitions', error))
+            .finally(() => setLoading(false));
+
+        return () => {
+            closed = true;
+            clearTimeout(retryTimer);
+            clearInterval(pingTimer);
+            socket?.close();
+        };
+    }, []);
+
+    return { petitions, setPetitions, loading };
+};
@@ -1,5 +1,5 @@
-import React, { useEffect, useState } from 'react';
-import api from '../services/api';
+import React, { useMemo } from 'react';
+import { usePetitionFeed } from '../hooks/usePetitionFeed';
 import { BarChart, FileText, Clock, TrendingUp } from 'lucide-react';
 
 interface Stats {
@@ -10,39 +10,16 @@ interface Stats {
 }
 
 const AdminDashboard: React.FC = () => {
-    const [stats, setStats] = useState<Stats>({
-        totalPetitions: 0,
-        pendingPetitions: 0,
-        resolvedPetitions: 0,
-        criticalPetitions: 0,
-    });
-    const [petitions, setPetitions] = useState<any[]>([]);
-    const [loading, setLoading] = useState(true);
+    const { petitions, loading } = usePetitionFeed<any>();
 
-    useEffect(() => {
-        fetchData();
-    }, []);
-
-    const fetchData = async () => {
-        try {
-            const response = await api.get('petitions/');
-            const data = response.data;
-            setPetitions(data);
-
-            setStats({
-                totalPetitions: data.length,
-                pendingPetitions: data.filter((p: any) =>
-                    ['SUBMITTED', 'UNDER_REVIEW', 'ASSIGNED', 'IN_PROGRESS'].includes(p.status)
-                ).length,
-                resolvedPetitions: data.filter((p: any) => p.status === 'RESOLVED').length,
-                criticalPetitions: data.filter((p: any) => p.urgency === 'CRITICAL').length,
-            });
-        } catch (error) {
-            console.error('Failed to fetch data', error);
-        } finally {
-            setLoading(false);
-        }
-    };
+    const stats = useMemo<Stats>(() => ({
+        totalPetitions: petitions.length,
+        pendingPetitions: petitions.filter((p: any) =>
+            ['SUBMITTED', 'UNDER_REVIEW', 'ASSIGNED', 'IN_PROGRESS'].includes(p.status)
+        ).length,
+        resolvedPetitions: petitions.filter((p: any) => p.status === 'RESOLVED').length,
+        criticalPetitions: petitions.filter((p: any) => p.urgency === 'CRITICAL').length,
+    }), [petitions]);
 
     if (loading) {
         return <div className="text-center py-10">Loading...</div>;
@@ -1,6 +1,6 @@
-import React, { useEffect, useState } from 'react';
+import React from 'react';
 import { Link } from 'react-router-dom';
-import api from '../services/api';
+import { usePetitionFeed } from '../hooks/usePetitionFeed';
 import PetitionStatusTimeline from '../components/PetitionStatusTimeline';
 import { Plus } from 'lucide-react';
 
@@ -16,23 +16,7 @@ interface Petition {
 }
 
 const Dashboard: React.FC = () => {
-    const [petitions, setPetitions] = useState<Petition[]>([]);
-    const [loading, setLoading] = useState(true);
-
-    useEffect(() => {
-        const fetchPetitions = async () => {
-            try {
-                const response = await api.get('petitions/');
-                setPetitions(response.data);
-            } catch (error) {
-                console.error('Failed to fetch petitions', error);
-            } finally {
-                setLoading(false);
-            }
-        };
-
-        fetchPetitions();
-    }, []);
+    const { petitions, loading } = usePetitionFeed<Petition>();
 
     if (loading) {
         return <div className="text-center py-10">Loading...</div>;
@@ -1,5 +1,6 @@
-import React, { useEffect, useState } from 'react';
+import React, { useState } from 'react';
 import api from '../services/api';
+import { usePetitionFeed } from '../hooks/usePetitionFeed';
 import { AlertCircle } from 'lucide-react';
 
 interface Petition {
@@ -15,36 +16,20 @@ interface Petition {
 }
 
 const OfficerDashboard: React.FC = () => {
-    const [petitions, setPetitions] = useState<Petition[]>([]);
-    const [loading, setLoading] = useState(true);
+    const { petitions, setPetitions, loading } = usePetitionFeed<Petition>();
     const [selectedPetition, setSelectedPetition] = useState<Petition | null>(null);
     const [newStatus, setNewStatus] = useState('');
     const [remarks, setRemarks] = useState('');
 
-    useEffect(() => {
-        fetchPetitions();
-    }, []);
-
-    const fetchPetitions = async () => {
-        try {
-            const response = await api.get('petitions/');
-            setPetitions(response.data);
-        } catch (error) {
-            console.error('Failed to fetch petitions', error);
-        } finally {
-            setLoading(false);
-        }
-    };
-
     const handleUpdateStatus = async () => {
         if (!selectedPetition || !newStatus) return;
 
         try {
-            await api.patch(`petitions/${selectedPetition.id}/`, {
+            const response = await api.patch(`petitions/${selectedPetition.id}/`, {
                 status: newStatus,
                 remarks: remarks,
             });
-            fetchPetitions();
+            setPetitions(prev => prev.map(p => (p.id === response.data.id ? { ...p, ...response.data } : p)));
             setSelectedPetition(null);
             setNewStatus('');
             setRemarks('');
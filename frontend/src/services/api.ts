@@ -1,6 +1,19 @@
 import axios from 'axios';
 
-const API_URL = 'http://localhost:8000/api/';
+// Build-time overrides (see .env.development); the feed falls back to the API host
+export const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000/api/';
+const PETITION_FEED_PATH = '/ws/petitions/';
+
+/**
+ * WebSocket URL of the petition push channel. VITE_WS_URL may be absolute or
+ * a path on the API host (default /ws/petitions/); the scheme always follows
+ * the page, so the feed uses wss on https.
+ */
+export const petitionFeedUrl = (): string => {
+    const url = new URL(import.meta.env.VITE_WS_URL || PETITION_FEED_PATH, new URL(API_URL, window.location.href));
+    url.protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
+    return url.toString();
+};
 
 const api = axios.create({
     baseURL: API_URL,